@@ -1,23 +1,310 @@
-from flask import request, jsonify, make_response, send_from_directory
-from sqlalchemy.orm import joinedload
-from config import app, db, api, Resource, reqparse, session, os
+import base64
+import hashlib
+import json
+import math
+import random
+import time
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from flask import (
+    Response, abort, request, jsonify, make_response, stream_with_context)
+from sqlalchemy import and_, func, or_, true
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from werkzeug.exceptions import ServiceUnavailable
+from sqlalchemy.orm import selectinload
+from assets import StaticAssets, compress
+from config import app, db, api, Resource, reqparse, session, os, sql_metrics
+from instrumentation import query_budget
 from models import( 
     Hotels, Guests, Rooms, Bookings, BookedRoom, 
-    Admins, Amenities, HotelAmenities, RoomTypes)
-from datetime import datetime
-
-def is_room_available(room_id: int, check_in: datetime, check_out: datetime) -> bool:
-    conflict = (
-        Bookings.query
-        .join(BookedRoom)
-        .filter(
-            BookedRoom.room_id == room_id,
-            Bookings.check_in_date < check_out,
-            Bookings.check_out_date > check_in
+    Admins, Amenities, HotelAmenities, RoomTypes, RoomNights, DailyRoomTypeStats,
+    RoomRateCalendars, HOTEL_SEARCH_DOCUMENT, catalog_cache,
+    has_hotel_search_index, hotel_search, identity_cache, identity_key,
+    rebuild_daily_stats, refresh_room_availability, stay_nights)
+from hotel_search import FIELDS as SEARCH_FIELDS
+from rates import CALENDAR_DAYS, Quoter, compile_calendar, parse_rules
+from serializers import eager_options, serialize
+from datetime import date, datetime, timedelta
+
+class BookingConflict(Exception):
+    pass
+
+
+class UnknownGuest(LookupError):
+    pass
+
+
+class BookingContention(ServiceUnavailable):
+    description = "Too many concurrent bookings for these rooms, please retry."
+
+
+# Deadlock, serialization failure, lock timeout (PostgreSQL); busy (SQLite)
+TRANSIENT_PGCODES = {"40001", "40P01", "55P03"}
+
+
+def is_transient_db_error(error) -> bool:
+    if isinstance(error, IntegrityError):
+        return False
+    orig = getattr(error, "orig", None)
+    if getattr(orig, "pgcode", None) in TRANSIENT_PGCODES:
+        return True
+    return "database is locked" in str(orig)
+
+
+def is_room_night_clash(error) -> bool:
+    """Whether an IntegrityError is a night already held on the room_nights key.
+
+    Foreign key and other violations (an unknown guest, say) are not.
+    """
+    orig = getattr(error, "orig", None)
+    diag = getattr(orig, "diag", None)
+    if diag is not None:
+        return diag.constraint_name == f"{RoomNights.__tablename__}_pkey"
+    return f"UNIQUE constraint failed: {RoomNights.__tablename__}." in str(orig)
+
+
+def guest_foreign_key_failed(error) -> bool:
+    diag = getattr(getattr(error, "orig", None), "diag", None)
+    return diag is not None and diag.constraint_name == "fk_bookings_guest_id_guests"
+
+
+def parse_stay(data) -> tuple:
+    """Return `(room_ids, check_in, check_out)` from one booking request.
+
+    Accepts either `room_id` or a `room_ids` list.
+    """
+    room_ids = data.get("room_ids")
+    if room_ids is None and data.get("room_id") is not None:
+        room_ids = [data["room_id"]]
+    if not isinstance(room_ids, list) or not room_ids:
+        raise ValueError("room_id or room_ids is required")
+    try:
+        room_ids = [int(room_id) for room_id in room_ids]
+        check_in = datetime.fromisoformat(data["check_in"])
+        check_out = datetime.fromisoformat(data["check_out"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("room ids must be integers and check_in/check_out ISO dates")
+    if check_out <= check_in:
+        raise ValueError("check_out must be after check_in")
+    if len(set(room_ids)) != len(room_ids):
+        raise ValueError("A room can only be booked once per stay")
+    return room_ids, check_in, check_out
+
+
+def create_bookings(guest_id, stays, status="pending") -> list:
+    """Insert one booking per `(room_ids, check_in, check_out)` stay.
+
+    Every requested room-night is checked against room_nights in a single
+    query and everything is written in one flush and one commit. Returns the
+    new booking ids, read before the commit expires the rows. Raises
+    LookupError for unknown rooms, UnknownGuest if the guest is gone and
+    BookingConflict if any night is taken, including by a concurrent booking
+    that commits first.
+
+    Nothing is locked up front: the room_nights primary key only makes
+    bookings that want the same room and night wait on each other. Rows are
+    written in room order so multi-room bookings cannot deadlock in the
+    common case, and deadlocks or serialization failures that still happen
+    are retried with jittered backoff.
+    """
+    attempts = app.config["BOOKING_RETRIES"] + 1
+    for attempt in range(attempts):
+        try:
+            return _create_bookings_once(guest_id, stays, status)
+        except DBAPIError as e:
+            db.session.rollback()
+            if isinstance(e, IntegrityError):
+                if is_room_night_clash(e):
+                    raise BookingConflict(None)
+                if guest_foreign_key_failed(e):
+                    raise UnknownGuest(guest_id)
+                raise ValueError("Booking violates a database constraint")
+            if not is_transient_db_error(e):
+                raise
+            if attempt + 1 == attempts:
+                raise BookingContention(retry_after=1)
+            time.sleep(random.uniform(0, 0.02 * 2 ** attempt))
+
+
+def load_rates(room_ids) -> Quoter:
+    """Base prices and rate calendars for `room_ids`, in one query."""
+    quoter = Quoter()
+    for room_id, price, start, blob in db.session.execute(
+        db.select(Rooms.id, Rooms.price_per_night,
+                  RoomRateCalendars.start_date, RoomRateCalendars.nightly_cents)
+        .outerjoin(RoomRateCalendars, RoomRateCalendars.room_id == Rooms.id)
+        .where(Rooms.id.in_(room_ids))
+    ):
+        quoter.add_room(room_id, price, start, blob)
+    return quoter
+
+
+def nightly_average(total_cents, nights) -> Decimal:
+    return (Decimal(total_cents) / nights / 100).quantize(Decimal("0.01"))
+
+
+def _create_bookings_once(guest_id, stays, status):
+    wanted = set()
+    for room_ids, check_in, check_out in stays:
+        for room_id in room_ids:
+            for night in stay_nights(check_in, check_out):
+                if (room_id, night) in wanted:
+                    raise BookingConflict(room_id)
+                wanted.add((room_id, night))
+
+    room_ids = {room_id for room_id, _ in wanted}
+    quoter = load_rates(room_ids)
+    missing = room_ids - quoter.rooms.keys()
+    if missing:
+        raise LookupError(sorted(missing))
+
+    # Each booked room keeps the average nightly rate quoted for its stay
+    priced = [(n, room_id, stay_nights(check_in, check_out))
+              for n, (stay_room_ids, check_in, check_out) in enumerate(stays)
+              for room_id in stay_room_ids]
+    totals = quoter.totals(
+        [(room_id, nights[0].toordinal(), len(nights)) for _, room_id, nights in priced])
+    rates = {(n, room_id): nightly_average(total, len(nights))
+             for (n, room_id, nights), total in zip(priced, totals)}
+
+    taken = db.session.execute(
+        db.select(RoomNights.room_id)
+        .where(RoomNights.matching(wanted))
+        .limit(1)
+    ).first()
+    if taken:
+        raise BookingConflict(taken.room_id)
+
+    bookings = [
+        Bookings(
+            guest_id=guest_id,
+            check_in_date=check_in,
+            check_out_date=check_out,
+            status=status,
+            booked_rooms=[BookedRoom(room_id=room_id, rate=rates[n, room_id])
+                          for room_id in sorted(room_ids)],
         )
-        .first()
-    )
-    return conflict is None
+        for n, (room_ids, check_in, check_out) in enumerate(stays)
+    ]
+    db.session.add_all(bookings)
+    db.session.flush()
+    ids = [booking.id for booking in bookings]
+    db.session.commit()
+    return ids
+
+
+def booking_error(error):
+    if isinstance(error, BookingConflict):
+        return {"error": "Room is not available for the selected dates"}, 409
+    if isinstance(error, UnknownGuest):
+        return {"error": "Guest not found"}, 404
+    if isinstance(error, LookupError):
+        return {"error": f"Room(s) not found: {error.args[0]}"}, 404
+    return {"error": str(error)}, 400
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([str(v) for v in values]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_limit(default=20, maximum=100) -> int:
+    try:
+        limit = int(request.args.get("limit", default))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    return max(1, min(limit, maximum))
+
+
+def catalog_etag(*state) -> str:
+    """Strong ETag for the current request over the given validator state.
+
+    `state` is usually `(count, max(updated_at))` for the rows behind the
+    payload, so inserts, updates and deletes all change it.
+    """
+    return etag_for(request.path, request.query_string, state)
+
+
+def etag_for(path: str, query_string: bytes, state) -> str:
+    raw = repr((path, query_string, state)).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+def not_modified(etag):
+    if etag in request.if_none_match:
+        response = make_response("", 304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def _stream(query, serialize, fmt):
+    rows = query.yield_per(1000)
+    if fmt == "ndjson":
+        for row in rows:
+            yield json.dumps(serialize(row), default=str) + "\n"
+        return
+    yield "["
+    for i, row in enumerate(rows):
+        yield ("," if i else "") + json.dumps(serialize(row), default=str)
+    yield "]"
+
+
+def list_response(query, key, serialize, cache=None):
+    """Return `query` as a list ordered by the unique column `key`.
+
+    - `?stream=ndjson|json` streams every row through `yield_per`.
+    - `?limit=&after=` returns one keyset page as `{results, next_cursor}`.
+    - Otherwise the full list is returned as before.
+
+    `cache`, if given, is called with a loader for the non-streamed payload
+    and returns the payload (see `catalog_cache.get_or_load`).
+    """
+    args = request.args
+    query = query.order_by(key)
+
+    fmt = args.get("stream")
+    if fmt:
+        if fmt not in ("ndjson", "json"):
+            return make_response({"error": "stream must be ndjson or json"}, 400)
+        mimetype = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+        return Response(stream_with_context(_stream(query, serialize, fmt)),
+                        mimetype=mimetype)
+
+    def load():
+        if "limit" not in args and "after" not in args:
+            return [serialize(row) for row in query]
+
+        limit = parse_limit()
+        page = query
+        if "after" in args:
+            page = page.filter(key > int(decode_cursor(args["after"])[0]))
+
+        rows = page.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(getattr(rows[-1], key.key))
+        return {
+            "results": [serialize(row) for row in rows],
+            "next_cursor": next_cursor,
+        }
+
+    try:
+        payload = cache(load) if cache else load()
+    except (ValueError, IndexError):
+        return make_response({"error": "Invalid limit or cursor"}, 400)
+    return make_response(jsonify(payload), 200)
 
 
 # --------------------------------------Resources-----------------------------------------
@@ -29,11 +316,15 @@ class GuestLogin(Resource):
         guest = Guests.query.filter_by(email=data.get('email')).first()
 
         if guest and guest.authenticate(data.get('password')):
+            if db.session.is_modified(guest):
+                # cost factor changed since the hash was stored
+                db.session.commit()
             session['guest_id'] = guest.id
-            return make_response({'message': 'Login successful', 'guest':guest.to_dict(only=("id", "name", "email"))}, 200)
+            return make_response({'message': 'Login successful', 'guest':serialize(guest, ("id", "name", "email"))}, 200)
         else:
             return make_response({'Error 401': 'Invalid Email or Password'}, 401)
 
+@query_budget(get=1)
 class CheckGuestSession(Resource):
     def get(self):
         guest_id = session.get('guest_id')
@@ -41,12 +332,15 @@ class CheckGuestSession(Resource):
         if not guest_id:
             return make_response({'message': '401: Not authorized'}, 401)
 
-        valid_guest = Guests.query.filter(Guests.id == guest_id).first()
+        identity = identity_cache.get(identity_key("guest", guest_id))
+        if identity is None:
+            valid_guest = Guests.query.filter(Guests.id == guest_id).first()
+            if not valid_guest:
+                return make_response({'message': '401: Not authorized'}, 401)
+            identity = serialize(valid_guest, ("id", "name", "email"))
+            identity_cache.set(identity_key("guest", guest_id), identity)
 
-        if valid_guest:
-            return make_response(valid_guest.to_dict(only=("id", "name", "email")), 200)
-        else:
-            return make_response({'message': '401: Not authorized'}, 401)
+        return make_response(identity, 200)
 
         
 class GuestLogout(Resource):
@@ -57,9 +351,13 @@ class GuestLogout(Resource):
 
 
 # Guests Resources
+@query_budget(get=1)
 class GuestsList(Resource):
     def get(self):
-        return [g.to_dict(only=("id", "name", "email")) for g in Guests.query.all()]
+        return list_response(
+            Guests.query, Guests.id,
+            lambda g: serialize(g, ("id", "name", "email")),
+        )
 
     def post(self):
         data = request.get_json()
@@ -72,7 +370,7 @@ class GuestsList(Resource):
         db.session.add(new_guest)
         db.session.commit()
         
-        return new_guest.to_dict(only=("id", "name", "email")), 201
+        return serialize(new_guest, ("id", "name", "email")), 201
 
 class SingleGuest(Resource):
     def get(self, id):
@@ -85,7 +383,7 @@ class SingleGuest(Resource):
             if hasattr(guest, key):
                 setattr(guest, key, value)
         db.session.commit()
-        return guest.to_dict(only=("id", "name", "email"))
+        return serialize(guest, ("id", "name", "email"))
 
     def delete(self, id):
         guest = Guests.query.get_or_404(id)
@@ -96,11 +394,15 @@ class SingleGuest(Resource):
     
 
 # Room Resources
+@query_budget(get=1)
 class RoomsList(Resource):
     def get(self):
-        return [
-            r.to_dict(
-                only=(
+        return list_response(
+            Rooms.query.options(*eager_options(Rooms, ("room_type.type_name",))),
+            Rooms.id,
+            lambda r: serialize(
+                r,
+                (
                     "id",
                     "hotel_id",
                     "room_type.type_name",
@@ -108,9 +410,8 @@ class RoomsList(Resource):
                     "price_per_night",
                     "is_available",
                 )
-            )
-            for r in Rooms.query.all()
-        ]
+            ),
+        )
 
     def post(self):
         data = request.get_json()
@@ -142,35 +443,50 @@ class RoomsList(Resource):
         db.session.commit()
 
         return (
-            room.to_dict(
-                only=("room_name", "price_per_night", "room_type.type_name", "is_available")
+            serialize(
+                room,
+                ("room_name", "price_per_night", "room_type.type_name", "is_available")
             ),
             201,
         )
 
 
 
+@query_budget(get=2)
 class RoomsPerHotel(Resource):
+    fields = (
+        "id",
+        "room_name",
+        "room_type.type_name",
+        "hotel.id",
+        "is_available",
+        "price_per_night",
+    )
+
     def get(self, hotel_id):
-        rooms = Rooms.query.filter(Rooms.hotel_id == hotel_id).all()
-        return make_response(
-            jsonify(
-                [
-                    r.to_dict(
-                        only=(
-                            "id",
-                            "room_name",
-                            "room_type.type_name",
-                            "hotel.id",
-                            "is_available",
-                            "price_per_night",
-                        )
-                    )
-                    for r in rooms
-                ]
-            ),
-            200,
-        )
+        etag = catalog_etag(*db.session.query(
+            func.count(Rooms.id),
+            func.max(Rooms.updated_at),
+            func.max(RoomTypes.updated_at),
+        ).outerjoin(RoomTypes, RoomTypes.id == Rooms.room_type_id)
+         .filter(Rooms.hotel_id == hotel_id).one())
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        def load():
+            rooms = (
+                Rooms.query.filter(Rooms.hotel_id == hotel_id)
+                .options(*eager_options(Rooms, self.fields))
+                .all()
+            )
+            return [serialize(r, self.fields) for r in rooms]
+
+        payload = catalog_cache.get_or_load(
+            "hotel_rooms", (f"rooms:{hotel_id}", "room_types"), load, variant=etag)
+        response = make_response(jsonify(payload), 200)
+        response.set_etag(etag)
+        return response
 
 
 class SingleRoom(Resource):
@@ -222,39 +538,182 @@ class SingleRoom(Resource):
         return make_response({"message": f"Room {id} deleted"}, 200)
 
 
+def rate_calendar_payload(room_id, quoter, rules, first, days):
+    base, _, _ = quoter.rooms[room_id]
+    nightly = quoter.nightly(room_id, first.toordinal(), days)
+    return {
+        "room_id": room_id,
+        "base_rate": base / 100,
+        "rules": rules or {"weekdays": {}, "seasons": []},
+        "nightly": [
+            {"night": (first + timedelta(days=i)).isoformat(), "rate": cents / 100}
+            for i, cents in enumerate(nightly)
+        ],
+    }
+
+
+@query_budget(get=2)
+class RoomRates(Resource):
+    """A room's rate calendar: seasonal and weekday overrides of its price.
+
+    GET shows the rules and the resulting nightly rates for `?from=`
+    (default today) and `?days=` (default 30). PUT replaces the rules (see
+    rates.parse_rules) and DELETE drops them; both need the admin of the
+    room's hotel.
+    """
+    MAX_DAYS = 366
+
+    def get(self, id):
+        try:
+            first = (date.fromisoformat(request.args["from"]) if "from" in request.args
+                     else datetime.utcnow().date())
+            days = int(request.args.get("days", 30))
+        except ValueError:
+            return {"error": "from must be an ISO date and days an integer"}, 400
+        if not 1 <= days <= self.MAX_DAYS:
+            return {"error": f"days must be between 1 and {self.MAX_DAYS}"}, 400
+
+        quoter = load_rates([id])
+        if id not in quoter.rooms:
+            return {"error": "Room not found"}, 404
+        rules = db.session.scalar(
+            db.select(RoomRateCalendars.rules).where(RoomRateCalendars.room_id == id))
+        return make_response(jsonify(rate_calendar_payload(id, quoter, rules, first, days)), 200)
+
+    def _owned_room(self, id):
+        """`(room, None)` if the session admin runs its hotel, else `(None, error)`."""
+        admin_id = session.get("admin_id")
+        if not admin_id:
+            return None, ({"error": "Unauthorized"}, 401)
+        room = Rooms.query.get(id)
+        if not room:
+            return None, ({"error": "Room not found"}, 404)
+        if room.hotel is None or room.hotel.admin_id != admin_id:
+            return None, ({"error": "Only the hotel's admin can change its rates"}, 403)
+        return room, None
+
+    def put(self, id):
+        room, error = self._owned_room(id)
+        if error:
+            return error
+        try:
+            rules = parse_rules(request.get_json(silent=True))
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        today = datetime.utcnow().date()
+        calendar = room.rate_calendar or RoomRateCalendars(room_id=room.id)
+        calendar.rules = rules
+        calendar.start_date = today
+        calendar.nightly_cents = compile_calendar(rules, today)
+        room.rate_calendar = calendar
+        db.session.commit()
+
+        quoter = Quoter()
+        quoter.add_room(room.id, room.price_per_night, today, calendar.nightly_cents)
+        return make_response(jsonify(rate_calendar_payload(room.id, quoter, rules, today, 30)), 200)
+
+    def delete(self, id):
+        room, error = self._owned_room(id)
+        if error:
+            return error
+        room.rate_calendar = None
+        db.session.commit()
+        return {"message": f"Rates for room {id} reset to its base price"}, 200
+
+
+@query_budget(post=1)
+class Quotes(Resource):
+    """Price many stays at once.
+
+    POST {"stays": [{"room_id": 1, "check_in": "...", "check_out": "..."}, ...]}
+    returns one quote per stay, in order, with the total and the average
+    nightly rate. All stays are priced from one query and one vectorised
+    pass over the rooms' rate calendars.
+    """
+    MAX_STAYS = 500
+
+    def post(self):
+        stays = (request.get_json(silent=True) or {}).get("stays")
+        if not isinstance(stays, list) or not stays:
+            return {"error": "stays must be a non-empty list"}, 400
+        if len(stays) > self.MAX_STAYS:
+            return {"error": f"At most {self.MAX_STAYS} stays per request"}, 400
+
+        parsed = []
+        for i, stay in enumerate(stays):
+            try:
+                room_id = int(stay["room_id"])
+                check_in = datetime.fromisoformat(stay["check_in"])
+                check_out = datetime.fromisoformat(stay["check_out"])
+            except (KeyError, TypeError, ValueError):
+                return {"error": f"stay {i}: room_id must be an integer and "
+                                 "check_in/check_out ISO dates"}, 400
+            if check_out <= check_in:
+                return {"error": f"stay {i}: check_out must be after check_in"}, 400
+            nights = stay_nights(check_in, check_out)
+            parsed.append((room_id, check_in, check_out, nights))
+
+        quoter = load_rates({room_id for room_id, _, _, _ in parsed})
+        totals = quoter.totals(
+            [(room_id, nights[0].toordinal(), len(nights)) for room_id, _, _, nights in parsed])
+
+        quotes = []
+        for (room_id, check_in, check_out, nights), total in zip(parsed, totals):
+            quote = {"room_id": room_id, "check_in": check_in.isoformat(),
+                     "check_out": check_out.isoformat(), "nights": len(nights)}
+            if total is None:
+                quote["error"] = "Room not found"
+            else:
+                quote["total"] = total / 100
+                quote["average_rate"] = float(nightly_average(total, len(nights)))
+            quotes.append(quote)
+        return make_response(jsonify({"quotes": quotes}), 200)
+
+
 # Room_types
+@query_budget(get=2)
 class RoomTypesResource(Resource):
     def get(self):
-        return make_response(
-            jsonify(
-                [
-                    r.to_dict(only=("id", "type_name", "description"))
-                    for r in RoomTypes.query.all()
-                ]
-            ),
-            200,
+        etag = catalog_etag(*db.session.query(
+            func.count(RoomTypes.id), func.max(RoomTypes.updated_at)).one())
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        payload = catalog_cache.get_or_load(
+            "room_types", ("room_types",),
+            lambda: [
+                serialize(r, ("id", "type_name", "description"))
+                for r in RoomTypes.query.all()
+            ],
+            variant=etag,
         )
+        response = make_response(jsonify(payload), 200)
+        response.set_etag(etag)
+        return response
 
 
+@query_budget(get=1)
 class AvailableRoomsPerHotel(Resource):
+    fields = (
+        "id",
+        "room_name",
+        "room_type.type_name",
+        "price_per_night",
+        "hotel.name",
+        "is_available",
+    )
+
     def get(self, hotel_id):
         try:
             available_rooms = [
-                r.to_dict(
-                    only=(
-                        "id",
-                        "room_name",
-                        "room_type.type_name",
-                        "price_per_night",
-                        "hotel.name",
-                        "is_available",
-                    )
-                )
+                serialize(r, self.fields)
                 for r in Rooms.query.filter(
                     Rooms.currently_available == True,
                     Rooms.is_available == True,
                     Rooms.hotel_id == hotel_id,
-                ).all()
+                ).options(*eager_options(Rooms, self.fields)).all()
             ]
 
             return make_response(jsonify(available_rooms), 200)
@@ -265,35 +724,143 @@ class AvailableRoomsPerHotel(Resource):
             )
 
 
+# Search Resources
+@query_budget(get=1)
+class SearchRooms(Resource):
+    SORTS = ("price", "-price")
+
+    def get(self):
+        args = request.args
+        try:
+            check_in = datetime.fromisoformat(args["check_in"])
+            check_out = datetime.fromisoformat(args["check_out"])
+        except (KeyError, ValueError):
+            return {"error": "check_in and check_out must be ISO dates"}, 400
+        if check_out <= check_in:
+            return {"error": "check_out must be after check_in"}, 400
+
+        sort = args.get("sort", "price")
+        if sort not in self.SORTS:
+            return {"error": f"sort must be one of {', '.join(self.SORTS)}"}, 400
+
+        try:
+            limit = parse_limit()
+            min_price = Decimal(args["min_price"]) if "min_price" in args else None
+            max_price = Decimal(args["max_price"]) if "max_price" in args else None
+            after = decode_cursor(args["after"]) if "after" in args else None
+            if after is not None:
+                after_price, after_id = Decimal(after[0]), int(after[1])
+        except (ValueError, InvalidOperation, IndexError):
+            return {"error": "Invalid limit, price or cursor"}, 400
+
+        # The same nights booking takes, so a room shown here can be booked
+        nights = stay_nights(check_in, check_out)
+        booked = db.select(RoomNights.room_id).where(
+            RoomNights.room_id == Rooms.id,
+            RoomNights.night.between(nights[0], nights[-1]),
+        )
+        query = (
+            db.session.query(
+                Rooms.id,
+                Rooms.room_name,
+                Rooms.price_per_night,
+                RoomTypes.type_name,
+                Hotels.id.label("hotel_id"),
+                Hotels.name.label("hotel_name"),
+                Hotels.city,
+                Hotels.country,
+            )
+            .join(Hotels, Hotels.id == Rooms.hotel_id)
+            .outerjoin(RoomTypes, RoomTypes.id == Rooms.room_type_id)
+            .filter(~booked.exists())
+        )
+
+        if args.get("city"):
+            query = query.filter(func.lower(Hotels.city) == args["city"].lower())
+        if args.get("country"):
+            query = query.filter(func.lower(Hotels.country) == args["country"].lower())
+        if args.get("room_type"):
+            query = query.filter(func.lower(RoomTypes.type_name) == args["room_type"].lower())
+        if min_price is not None:
+            query = query.filter(Rooms.price_per_night >= min_price)
+        if max_price is not None:
+            query = query.filter(Rooms.price_per_night <= max_price)
+
+        if sort == "price":
+            if after is not None:
+                query = query.filter(or_(
+                    Rooms.price_per_night > after_price,
+                    and_(Rooms.price_per_night == after_price, Rooms.id > after_id),
+                ))
+            query = query.order_by(Rooms.price_per_night, Rooms.id)
+        else:
+            if after is not None:
+                query = query.filter(or_(
+                    Rooms.price_per_night < after_price,
+                    and_(Rooms.price_per_night == after_price, Rooms.id > after_id),
+                ))
+            query = query.order_by(Rooms.price_per_night.desc(), Rooms.id)
+
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        results = [
+            {
+                "id": r.id,
+                "room_name": r.room_name,
+                "price_per_night": str(r.price_per_night),
+                "room_type": {"type_name": r.type_name},
+                "hotel": {
+                    "id": r.hotel_id,
+                    "name": r.hotel_name,
+                    "city": r.city,
+                    "country": r.country,
+                },
+            }
+            for r in rows
+        ]
+        next_cursor = (
+            encode_cursor(rows[-1].price_per_night, rows[-1].id) if has_more else None
+        )
+        return make_response(jsonify({"results": results, "next_cursor": next_cursor}), 200)
+
+
 # Booking Resources
+@query_budget(get=1)
 class BookingListResource(Resource):
     def get(self):
-        return [b.to_dict(only=("id", "guest_id", "check_in_date", "check_out_date", "status",)) 
-                for b in Bookings.query.all()]
+        return list_response(
+            Bookings.query, Bookings.id,
+            lambda b: serialize(b, ("id", "guest_id", "check_in_date", "check_out_date", "status",)),
+        )
 
     def post(self):
         data = request.get_json()
-        
-        booking = Bookings(
-            guest_id=data["guest_id"],
-            check_in_date=datetime.fromisoformat(data["check_in"]),
-            check_out_date=datetime.fromisoformat(data["check_out"]),
-            status="pending"
-        )
-        db.session.add(booking)
-        db.session.commit() 
 
-        booked_room = BookedRoom(
-            booking_id=booking.id,
-            room_id=data["room_id"]
-        )
-        db.session.add(booked_room)
-        db.session.commit()
+        try:
+            guest_id = int(data["guest_id"])
+        except (KeyError, TypeError, ValueError):
+            return {"error": "guest_id must be an integer"}, 400
+        try:
+            if db.session.get(Guests, guest_id) is None:
+                raise UnknownGuest(guest_id)
+            (booking_id,) = create_bookings(guest_id, [parse_stay(data)])
+        except (ValueError, LookupError, BookingConflict) as e:
+            return booking_error(e)
+
+        booking = db.session.get(Bookings, booking_id)
+        return serialize(booking, ("id", "guest_id", "check_in_date", "check_out_date", "status",)), 201
 
-        return booking.to_dict(only=("id", "guest_id", "check_in_date", "check_out_date", "status",)), 201
 
 
+GUEST_BOOKING_FIELDS = (
+    'id','rooms.hotel.name', 'rooms.room_name','rooms.price_per_night',
+    'rooms.room_type.type_name','check_in_date','check_out_date','status',
+)
 
+
+@query_budget(get=2)
 class GuestBookings(Resource):
     def get(self):
 
@@ -301,10 +868,13 @@ class GuestBookings(Resource):
         if not guest_id:
             return {"error": "Unauthorized"}, 401
 
-        bookings = Bookings.query.filter_by(guest_id=guest_id).all()
+        bookings = (
+            Bookings.query.filter_by(guest_id=guest_id)
+            .options(*eager_options(Bookings, GUEST_BOOKING_FIELDS))
+            .all()
+        )
 
-        data = [b.to_dict(only=('id','rooms.hotel.name', 'rooms.room_name','rooms.price_per_night','rooms.room_type.type_name','check_in_date','check_out_date','status',))
-                for b in bookings]
+        data = [serialize(b, GUEST_BOOKING_FIELDS) for b in bookings]
         return make_response(jsonify(data), 200)
     
     def post(self):
@@ -312,27 +882,43 @@ class GuestBookings(Resource):
         if not guest_id:
             return {"error": "Unauthorized"}, 401
 
-        data = request.get_json()
-        room_id = data.get("room_id")
-        check_in = datetime.fromisoformat(data.get("check_in"))
-        check_out = datetime.fromisoformat(data.get("check_out"))
+        try:
+            (booking_id,) = create_bookings(guest_id, [parse_stay(request.get_json())])
+        except (ValueError, LookupError, BookingConflict) as e:
+            return booking_error(e)
+
+        new_booking = (
+            Bookings.query.filter_by(id=booking_id)
+            .options(*eager_options(Bookings, GUEST_BOOKING_FIELDS))
+            .one()
+        )
+        return make_response(serialize(new_booking, GUEST_BOOKING_FIELDS), 201)
 
-        if not is_room_available(room_id, check_in, check_out):
-            return {"error": "Room is not available for the selected dates"}, 400
 
-        new_booking = Bookings(
-            guest_id=guest_id,
-            room_id=room_id,
-            check_in_date=check_in,
-            check_out_date=check_out,
-            status=data.get("status", "pending"),
-        )
-        db.session.add(new_booking)
-        db.session.commit()
+class GuestBookingsBatch(Resource):
+    def post(self):
+        guest_id = session.get("guest_id")
+        if not guest_id:
+            return {"error": "Unauthorized"}, 401
 
-        return make_response(new_booking.to_dict(only=(
-            'id','rooms.hotel.name', 'rooms.room_name','rooms.room_type.type_name','check_in_date','check_out_date','status',)
-        ), 201)
+        items = (request.get_json() or {}).get("bookings")
+        if not isinstance(items, list) or not items:
+            return {"error": "bookings must be a non-empty list"}, 400
+
+        try:
+            stays = [parse_stay(item) for item in items]
+            ids = create_bookings(guest_id, stays)
+        except (ValueError, LookupError, BookingConflict) as e:
+            return booking_error(e)
+
+        bookings = (
+            Bookings.query.filter(Bookings.id.in_(ids))
+            .options(*eager_options(Bookings, GUEST_BOOKING_FIELDS))
+            .order_by(Bookings.id)
+            .all()
+        )
+        return make_response(
+            jsonify([serialize(b, GUEST_BOOKING_FIELDS) for b in bookings]), 201)
 
 
 class BookingById(Resource):
@@ -366,7 +952,15 @@ class BookingById(Resource):
                 else:
                     setattr(booking, key, value)
 
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if is_room_night_clash(e):
+                return {"error": "Room is not available for the selected dates"}, 409
+            if guest_foreign_key_failed(e):
+                return {"error": "Guest not found"}, 404
+            return {"error": "Booking violates a database constraint"}, 400
 
         result = {
             "id": booking.id,
@@ -402,74 +996,91 @@ class BookingById(Resource):
         db.session.delete(booking)
         db.session.commit()
 
-        bookings = Bookings.query.filter_by(guest_id=guest_id).all()
-        data = [
-            b.to_dict(only=(
-                'id','rooms.hotel.name','rooms.room_name', 'rooms.price_per_night',
-                'rooms.room_type.type_name','check_in_date',
-                'check_out_date','status',
-            ))
-            for b in bookings
-        ]
+        bookings = (
+            Bookings.query.filter_by(guest_id=guest_id)
+            .options(*eager_options(Bookings, GUEST_BOOKING_FIELDS))
+            .all()
+        )
+        data = [serialize(b, GUEST_BOOKING_FIELDS) for b in bookings]
         return make_response(jsonify(data), 200)
 
 
+@query_budget(get=4)
 class BookingByHotelId(Resource):
     def get(self, hotel_id):
+        hotel_booking_ids = (
+            db.select(BookedRoom.booking_id)
+            .join(Rooms, Rooms.id == BookedRoom.room_id)
+            .where(Rooms.hotel_id == hotel_id)
+        )
         bookings = (
             db.session.query(Bookings)
-            .join(BookedRoom)
-            .join(Rooms)
-            .filter(Rooms.hotel_id == hotel_id)
+            .filter(Bookings.id.in_(hotel_booking_ids))
             .options(
-                joinedload(Bookings.guest),
-                joinedload(Bookings.booked_rooms).joinedload(BookedRoom.room)
+                selectinload(Bookings.guest),
+                selectinload(Bookings.booked_rooms).selectinload(BookedRoom.room)
             )
-            .all()
         )
+        return list_response(bookings, Bookings.id, self.serialize)
 
-        result = []
-        for b in bookings:
-            result.append({
-                "id": b.id,
-                "check_in_date": b.check_in_date.isoformat(),
-                "check_out_date": b.check_out_date.isoformat(),
-                "status": b.status,
-                "guest": (
-                    {
-                        "id": b.guest.id,
-                        "name": b.guest.name,
-                        "email": b.guest.email,
-                    }
-                    if b.guest
-                    else None
-                ),
-                "rooms": [
-                    {
-                        "id": br.room.id,
-                        "room_name": br.room.room_name,
-                        "price_per_night": float(br.room.price_per_night),
-                        "is_available": str(br.room.is_available),
-                    }
-                    for br in b.booked_rooms
-                ],
-            })
-
-        return make_response(jsonify(result), 200)
+    @staticmethod
+    def serialize(b):
+        return {
+            "id": b.id,
+            "check_in_date": b.check_in_date.isoformat(),
+            "check_out_date": b.check_out_date.isoformat(),
+            "status": b.status,
+            "guest": (
+                {
+                    "id": b.guest.id,
+                    "name": b.guest.name,
+                    "email": b.guest.email,
+                }
+                if b.guest
+                else None
+            ),
+            "rooms": [
+                {
+                    "id": br.room.id,
+                    "room_name": br.room.room_name,
+                    "price_per_night": float(br.room.price_per_night),
+                    "is_available": str(br.room.is_available),
+                }
+                for br in b.booked_rooms
+            ],
+        }
 
 
 # Hotel Resources
+@query_budget(get=2)
 class HotelsList(Resource):
+    fields = (
+        "id",
+        "name",
+        "address",
+        "city",
+        "country",
+        "email",
+        "phone",
+    )
+
     def get(self):
-        return [h.to_dict(only=(
-            "id",
-            "name",
-            "address",
-            "city",
-            "country",
-            "email",
-            "phone"
-        ))for h in Hotels.query.all()]
+        etag = catalog_etag(*db.session.query(
+            func.count(Hotels.id), func.max(Hotels.updated_at)).one())
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        response = list_response(
+            Hotels.query, Hotels.id,
+            lambda h: serialize(h, self.fields),
+            cache=lambda load: catalog_cache.get_or_load(
+                "hotels", ("hotels",), load, variant=etag),
+        )
+        # A 400 for a bad limit or cursor must not be revalidated as cached
+        if response.status_code == 200:
+            response.set_etag(etag)
+        return response
     
 
     def post(self):
@@ -493,7 +1104,7 @@ class HotelsList(Resource):
         )
         db.session.add(hotel)
         db.session.commit()
-        return hotel.to_dict(only=(
+        return serialize(hotel, (
             "id",
             "name",
             "address",
@@ -509,23 +1120,152 @@ class HotelsList(Resource):
             "hotel_amenities",
         )), 201
 
+@lru_cache(maxsize=None)
+def trigram_search_available() -> bool:
+    """Whether PostgreSQL has the hotel search index; checked once per process."""
+    return has_hotel_search_index(db.session.connection())
+
+
+@query_budget(get=2)
+class HotelSearch(Resource):
+    """Typo-tolerant search over hotel name, city, country and address.
+
+    `?q=` is matched word by word: exact words, the word still being typed
+    as a prefix, and misspellings by trigram similarity. Results are ranked
+    best first and paginated with `?limit=&after=` like the other lists.
+    On PostgreSQL with pg_trgm the trigram index answers (see
+    create_hotel_search_index); elsewhere the in-process `hotel_search`
+    index does.
+    """
+    MAX_QUERY = 100
+
+    def get(self):
+        q = request.args.get("q", "")
+        if not q.strip():
+            return {"error": "q is required"}, 400
+        if len(q) > self.MAX_QUERY:
+            return {"error": f"q is limited to {self.MAX_QUERY} characters"}, 400
+        try:
+            limit = parse_limit()
+            after = None
+            if "after" in request.args:
+                after = self.decode_after(request.args["after"])
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        if trigram_search_available():
+            hits = self._search_postgres(q, limit + 1, after)
+        else:
+            hits = hotel_search.search(q, limit + 1, after)
+
+        page = hits[:limit]
+        return make_response(jsonify({
+            "results": [
+                {"id": hotel_id, "score": score, **dict(zip(SEARCH_FIELDS, fields))}
+                for score, hotel_id, fields in page
+            ],
+            "next_cursor": encode_cursor(*page[-1][:2]) if len(hits) > limit else None,
+        }), 200)
+
+    @staticmethod
+    def decode_after(cursor):
+        """`(score, hotel_id)` from a next_cursor; ValueError for anything else."""
+        try:
+            score, hotel_id = decode_cursor(cursor)
+            after = (float(score), int(hotel_id))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        if not math.isfinite(after[0]):
+            raise ValueError("Invalid cursor")
+        return after
+
+    def _search_postgres(self, q, limit, after):
+        # `<%` is the indexed word-similarity match (pg_trgm's default
+        # threshold, 0.6); scores are float4, so compare cursors as REAL
+        q = db.literal(q.lower())
+        document = db.literal_column(HOTEL_SEARCH_DOCUMENT)
+        score = func.word_similarity(q, document)
+        query = (
+            db.select(score, Hotels.id, *(getattr(Hotels, f) for f in SEARCH_FIELDS))
+            .where(q.op("<%")(document))
+            .order_by(score.desc(), Hotels.id)
+            .limit(limit)
+        )
+        if after is not None:
+            after_score = db.cast(after[0], db.REAL)
+            query = query.where(or_(score < after_score,
+                                    and_(score == after_score, Hotels.id > after[1])))
+        return [(score, hotel_id, tuple(fields))
+                for score, hotel_id, *fields in db.session.execute(query)]
+
+
+@query_budget(get=4)
 class SingleHotel(Resource):
+    fields = (
+        "id",
+        "name",
+        "address",
+        "city",
+        "country",
+        "email",
+        "phone",
+        "rooms.room_name",
+        "rooms.room_type",
+        "rooms.price_per_night",
+        "rooms.is_available",
+        "hotel_amenities",
+    )
+
+    @staticmethod
+    def state(id):
+        """The hotel's updated_at plus count/max(updated_at) of what it embeds."""
+        rooms = (
+            db.select(func.count(Rooms.id), func.max(Rooms.updated_at),
+                      func.max(RoomTypes.updated_at))
+            .outerjoin(RoomTypes, RoomTypes.id == Rooms.room_type_id)
+            .where(Rooms.hotel_id == id)
+            .subquery()
+        )
+        amenities = (
+            db.select(func.count(HotelAmenities.id), func.max(HotelAmenities.updated_at),
+                      func.max(Amenities.updated_at))
+            .outerjoin(Amenities, Amenities.id == HotelAmenities.amenity_id)
+            .where(HotelAmenities.hotel_id == id)
+            .subquery()
+        )
+        # Each subquery is a single aggregate row, joined on true rather than
+        # listed in FROM so the query is not a cartesian product
+        return db.session.execute(
+            db.select(Hotels.updated_at, rooms, amenities)
+            .select_from(Hotels)
+            .join(rooms, true())
+            .join(amenities, true())
+            .where(Hotels.id == id)
+        ).first()
+
     def get(self, id):
-        hotel = Hotels.query.get_or_404(id)
-        return make_response(hotel.to_dict(only=(
-            "id",
-            "name",
-            "address",
-            "city",
-            "country",
-            "email",
-            "phone",
-            "rooms.room_name",
-            "rooms.room_type",
-            "rooms.price_per_night",
-            "rooms.is_available",
-            "hotel_amenities",
-        )), 200)
+        # Keyed on database state, so an edit made through another worker
+        # is never served from this worker's cache
+        state = self.state(id)
+        if state is None:
+            return {"error": "Hotel not found"}, 404
+        etag = catalog_etag(*state)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        def load():
+            hotel = (
+                Hotels.query.options(*eager_options(Hotels, self.fields))
+                .get_or_404(id)
+            )
+            return serialize(hotel, self.fields)
+
+        payload = catalog_cache.get_or_load(
+            "hotel", (f"hotel:{id}", "room_types", "amenities"), load, variant=etag)
+        response = make_response(payload, 200)
+        response.set_etag(etag)
+        return response
 
     def put(self, id):
         hotel = Hotels.query.get_or_404(id)
@@ -541,19 +1281,161 @@ class SingleHotel(Resource):
         db.session.commit()
         return {"message": f"Hotel {id} deleted"}, 200
     
+@query_budget(get=2)
 class AdminHotel(Resource):
+    fields = (
+        "id", "name", "city", "country", "email", "address", "phone",
+        "rooms.id","rooms.room_name","rooms.is_available","rooms.price_per_night","rooms.room_type",
+    )
+
     def get(self):
         admin_id = session.get("admin_id")
 
         if not admin_id:
             return {"error": "Unauthorized"}, 401
         
-        my_hotel = Hotels.query.filter_by(admin_id=admin_id).first()
+        my_hotel = (
+            Hotels.query.filter_by(admin_id=admin_id)
+            .options(*eager_options(Hotels, self.fields))
+            .first()
+        )
+
+        return make_response(serialize(my_hotel, self.fields), 200)
+
+
+
+def period_start(column, period, dialect):
+    """SQL expression for the first night of the day/week/month of `column`."""
+    if period == "day":
+        return column
+    if dialect == "postgresql":
+        return func.date_trunc(period, column).cast(db.Date)
+    if period == "week":
+        # Weeks start on Monday, as date_trunc does
+        return func.date(column, "weekday 0", "-6 days")
+    return func.date(column, "start of month")
+
+
+def python_period_start(night, period):
+    if period == "week":
+        return night - timedelta(days=night.weekday())
+    if period == "month":
+        return night.replace(day=1)
+    return night
+
+
+def occupancy_metrics(sold, revenue, available):
+    return {
+        "room_nights_sold": sold,
+        "available_room_nights": available,
+        "occupancy": round(sold / available, 4) if available else None,
+        "adr": round(float(revenue) / sold, 2) if sold else None,
+        "revenue": round(float(revenue), 2),
+    }
+
 
-        return make_response(my_hotel.to_dict(only=(
-            "id", "name", "city", "country", "email", "address", "phone",
-            "rooms.id","rooms.room_name","rooms.is_available","rooms.price_per_night","rooms.room_type",
-        )), 200)
+@query_budget(get=3)
+class AdminHotelAnalytics(Resource):
+    """Occupancy, room-nights sold, ADR and revenue for the admin's hotel.
+
+    `?from=&to=` (ISO dates, inclusive, default the last 30 days) and
+    `?period=day|week|month`. Returns totals, a series per period and a
+    breakdown per room type, aggregated from daily_room_type_stats, so
+    only confirmed bookings count as sold. Available room-nights are the
+    hotel's current rooms times the nights in range.
+    """
+    PERIODS = ("day", "week", "month")
+    MAX_DAYS = 3 * 366
+
+    def get(self):
+        admin_id = session.get("admin_id")
+        if not admin_id:
+            return {"error": "Unauthorized"}, 401
+
+        args = request.args
+        period = args.get("period", "day")
+        if period not in self.PERIODS:
+            return {"error": f"period must be one of {', '.join(self.PERIODS)}"}, 400
+        try:
+            end = date.fromisoformat(args["to"]) if "to" in args else datetime.utcnow().date()
+            start = date.fromisoformat(args["from"]) if "from" in args else end - timedelta(days=29)
+        except ValueError:
+            return {"error": "from and to must be ISO dates"}, 400
+        if end < start:
+            return {"error": "to must not be before from"}, 400
+        if (end - start).days >= self.MAX_DAYS:
+            return {"error": f"range is limited to {self.MAX_DAYS} days"}, 400
+
+        hotel_id = db.session.scalar(db.select(Hotels.id).where(Hotels.admin_id == admin_id))
+        if hotel_id is None:
+            return {"error": "Admin has no hotel"}, 404
+
+        room_types = {
+            room_type_id or 0: {"name": name, "rooms": count}
+            for room_type_id, name, count in db.session.execute(
+                db.select(Rooms.room_type_id, RoomTypes.type_name, func.count(Rooms.id))
+                .outerjoin(RoomTypes, RoomTypes.id == Rooms.room_type_id)
+                .where(Rooms.hotel_id == hotel_id)
+                .group_by(Rooms.room_type_id, RoomTypes.type_name)
+            )
+        }
+
+        bucket = period_start(DailyRoomTypeStats.night, period, db.engine.dialect.name)
+        rows = db.session.execute(
+            db.select(
+                bucket, DailyRoomTypeStats.room_type_id,
+                func.sum(DailyRoomTypeStats.room_nights),
+                func.sum(DailyRoomTypeStats.revenue),
+            )
+            .where(
+                DailyRoomTypeStats.hotel_id == hotel_id,
+                DailyRoomTypeStats.night.between(start, end),
+            )
+            .group_by(bucket, DailyRoomTypeStats.room_type_id)
+        ).all()
+
+        # Every period in range is reported, including ones with no sales
+        nights_in = {}
+        night = start
+        while night <= end:
+            key = python_period_start(night, period)
+            nights_in[key] = nights_in.get(key, 0) + 1
+            night += timedelta(days=1)
+        total_rooms = sum(t["rooms"] for t in room_types.values())
+        days = (end - start).days + 1
+
+        by_period = {key: [0, Decimal(0)] for key in nights_in}
+        by_type = {key: [0, Decimal(0)] for key in room_types}
+        for period_key, room_type_id, sold, revenue in rows:
+            period_key = date.fromisoformat(str(period_key)[:10])
+            for totals in (by_period.setdefault(period_key, [0, Decimal(0)]),
+                           by_type.setdefault(room_type_id, [0, Decimal(0)])):
+                totals[0] += sold or 0
+                totals[1] += Decimal(revenue or 0)
+
+        return make_response(jsonify({
+            "hotel_id": hotel_id,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "period": period,
+            "totals": occupancy_metrics(
+                sum(v[0] for v in by_period.values()),
+                sum(v[1] for v in by_period.values()),
+                total_rooms * days),
+            "series": [
+                {"start": key.isoformat(),
+                 **occupancy_metrics(sold, revenue, total_rooms * nights_in.get(key, 0))}
+                for key, (sold, revenue) in sorted(by_period.items())
+            ],
+            "room_types": [
+                {"room_type_id": room_type_id or None,
+                 "room_type": room_types.get(room_type_id, {}).get("name"),
+                 "rooms": room_types.get(room_type_id, {}).get("rooms", 0),
+                 **occupancy_metrics(
+                     sold, revenue, room_types.get(room_type_id, {}).get("rooms", 0) * days)}
+                for room_type_id, (sold, revenue) in sorted(by_type.items())
+            ],
+        }), 200)
 
     
         
@@ -564,11 +1446,15 @@ class AdminLogin(Resource):
         admin = Admins.query.filter_by(name=data.get('name')).first()
 
         if admin and admin.authenticate(data.get('password')):
+            if db.session.is_modified(admin):
+                # cost factor changed since the hash was stored
+                db.session.commit()
             session['admin_id'] = admin.id
-            return make_response({'message': 'Login successful', 'admin':admin.to_dict(only=("id", "name"))}, 200)
+            return make_response({'message': 'Login successful', 'admin':serialize(admin, ("id", "name"))}, 200)
         else:
             return make_response({'Error 401': 'Invalid Email or Password'}, 401)
 
+@query_budget(get=1)
 class CheckAdminSession(Resource):
     def get(self):
         admin_id = session.get('admin_id')
@@ -576,12 +1462,15 @@ class CheckAdminSession(Resource):
         if not admin_id:
             return make_response({'message': '401: Not authorized'}, 401)
 
-        valid_admin = Admins.query.filter(Admins.id == admin_id).first()
+        identity = identity_cache.get(identity_key("admin", admin_id))
+        if identity is None:
+            valid_admin = Admins.query.filter(Admins.id == admin_id).first()
+            if not valid_admin:
+                return make_response({'message': '401: Not authorized'}, 401)
+            identity = serialize(valid_admin, ("id", "name"))
+            identity_cache.set(identity_key("admin", admin_id), identity)
 
-        if valid_admin:
-            return make_response(valid_admin.to_dict(only=("id", "name")), 200)
-        else:
-            return make_response({'message': '401: Not authorized'}, 401)
+        return make_response(identity, 200)
 
         
 class AdminLogout(Resource):
@@ -603,21 +1492,46 @@ class AdminsList(Resource):
         db.session.add(new_admin)
         db.session.commit()
         
-        return new_admin.to_dict(only=("id", "name")), 201
+        return serialize(new_admin, ("id", "name")), 201
     
 
 # Amenities Resource
+@query_budget(get=3)
 class HotelAmenitiesResource(Resource):
     def get(self, hotel_id):
-        hotel = Hotels.query.get(hotel_id)
+        state = (
+            db.session.query(
+                func.count(HotelAmenities.id),
+                func.max(HotelAmenities.updated_at),
+                func.max(Amenities.updated_at),
+            )
+            .select_from(Hotels)
+            .outerjoin(HotelAmenities, HotelAmenities.hotel_id == Hotels.id)
+            .outerjoin(Amenities, Amenities.id == HotelAmenities.amenity_id)
+            .filter(Hotels.id == hotel_id)
+            .group_by(Hotels.id)
+            .first()
+        )
+        if state is None:
+            return {"error": "Hotel not found"}, 404
+        etag = catalog_etag(*state)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        fields = ("hotel_amenities.amenity.id", "hotel_amenities.amenity.name",
+                  "hotel_amenities.amenity.description")
+        hotel = Hotels.query.options(*eager_options(Hotels, fields)).get(hotel_id)
         if not hotel:
             return {"error": "Hotel not found"}, 404
 
         amenities = [
-            ha.amenity.to_dict(only=("id", "name", "description"))
+            serialize(ha.amenity, ("id", "name", "description"))
             for ha in hotel.hotel_amenities
         ]
-        return amenities, 200
+        response = make_response(jsonify(amenities), 200)
+        response.set_etag(etag)
+        return response
 
 
     def post(self, hotel_id):
@@ -650,12 +1564,41 @@ class HotelAmenitiesResource(Resource):
 
         return {
             "message": "Amenity created and linked successfully",
-            "amenity": amenity.to_dict(only=("id", "name", "description")),
+            "amenity": serialize(amenity, ("id", "name", "description")),
         }, 201
 
 
     
     
+# Internal Resources
+def internal_request_allowed() -> bool:
+    token = app.config.get("METRICS_TOKEN")
+    if token:
+        return request.headers.get("X-Metrics-Token") == token
+    return request.remote_addr in ("127.0.0.1", "::1")
+
+
+class SqlMetricsResource(Resource):
+    def get(self):
+        if not internal_request_allowed():
+            return {"error": "Forbidden"}, 403
+        return make_response(jsonify(sql_metrics.snapshot()), 200)
+
+
+class PoolStatsResource(Resource):
+    def get(self):
+        if not internal_request_allowed():
+            return {"error": "Forbidden"}, 403
+        return make_response(jsonify(sql_metrics.pool_snapshot(db.engine.pool)), 200)
+
+
+class CacheStatsResource(Resource):
+    def get(self):
+        if not internal_request_allowed():
+            return {"error": "Forbidden"}, 403
+        return make_response(jsonify(catalog_cache.stats()), 200)
+
+
 # -----------------------------------Routes--------------------------------------
 
 
@@ -665,10 +1608,12 @@ api.add_resource(AdminLogin, "/api/admin/login")
 api.add_resource(CheckAdminSession, "/api/admin")
 api.add_resource(AdminLogout, "/api/admin/logout")
 api.add_resource(AdminHotel, "/api/admin/hotel")
+api.add_resource(AdminHotelAnalytics, "/api/admin/hotel/analytics")
 
 # Hotels
 api.add_resource(HotelsList, "/api/hotels")
 api.add_resource(SingleHotel, "/api/hotels/<int:id>")
+api.add_resource(HotelSearch, "/api/hotels/search")
 
 # Guests
 api.add_resource(GuestsList, "/api/guests")
@@ -683,38 +1628,139 @@ api.add_resource(RoomsList, "/api/rooms")
 api.add_resource(SingleRoom, "/api/rooms/<int:id>")
 api.add_resource(AvailableRoomsPerHotel, "/api/rooms/<int:hotel_id>/available")
 api.add_resource(RoomsPerHotel, "/api/hotels/<int:hotel_id>/rooms")
+api.add_resource(RoomRates, "/api/rooms/<int:id>/rates")
+api.add_resource(Quotes, "/api/quotes")
 
 # RoomTypes
 api.add_resource(RoomTypesResource, "/api/room_types")
 
+# Search
+api.add_resource(SearchRooms, "/api/search")
+
 # Bookings
 api.add_resource(BookingListResource, "/api/bookings")
 api.add_resource(GuestBookings, "/api/my_bookings")
+api.add_resource(GuestBookingsBatch, "/api/my_bookings/batch")
 api.add_resource(BookingById, "/api/bookings/<int:booking_id>")
 api.add_resource(BookingByHotelId, "/api/hotels/<int:hotel_id>/bookings")
 
 # HotelAmenities
 api.add_resource(HotelAmenitiesResource, "/api/hotel/<int:hotel_id>/amenities")
 
+# Internal
+api.add_resource(SqlMetricsResource, "/api/internal/metrics")
+api.add_resource(CacheStatsResource, "/api/internal/cache")
+api.add_resource(PoolStatsResource, "/api/internal/pool")
+
+
+# ----------------------CLI commands-----------------------------
+
+@app.cli.command("backfill-room-nights")
+def backfill_room_nights():
+    """Rebuild room_nights from existing bookings."""
+    rows = (
+        db.session.query(
+            BookedRoom.room_id, BookedRoom.booking_id,
+            Bookings.check_in_date, Bookings.check_out_date,
+        )
+        .join(Bookings, Bookings.id == BookedRoom.booking_id)
+        .order_by(Bookings.check_in_date, Bookings.id)
+        .all()
+    )
+
+    db.session.query(RoomNights).delete()
+    seen = set()
+    batch = []
+    clashes = set()
+    for room_id, booking_id, check_in, check_out in rows:
+        for night in stay_nights(check_in, check_out):
+            if (room_id, night) in seen:
+                clashes.add(booking_id)
+                continue
+            seen.add((room_id, night))
+            batch.append({"room_id": room_id, "night": night, "booking_id": booking_id})
+        if len(batch) >= 5000:
+            db.session.execute(RoomNights.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(RoomNights.__table__.insert(), batch)
+    rebuild_daily_stats(db.session.connection())
+    db.session.commit()
+
+    print(f"Backfilled {len(seen)} room nights.")
+    if clashes:
+        print(f"Skipped overlapping nights from bookings: {sorted(clashes)}")
+
+
+@app.cli.command("rebuild-daily-stats")
+def rebuild_daily_stats_command():
+    """Recompute the analytics rollup from room_nights.
+
+    Booking changes made through the app keep it current; this is for data
+    loaded or deleted outside the ORM.
+    """
+    rebuild_daily_stats(db.session.connection())
+    db.session.commit()
+    print("Daily stats rebuilt.")
+
+
+@app.cli.command("recompile-rate-calendars")
+def recompile_rate_calendars():
+    """Recompile every rate calendar from its rules, starting today.
+
+    Calendars cover RATE_CALENDAR_DAYS nights from when they were saved;
+    run this from cron (e.g. monthly) so they keep reaching that far ahead.
+    """
+    today = datetime.utcnow().date()
+    calendars = RoomRateCalendars.query.all()
+    for calendar in calendars:
+        calendar.start_date = today
+        calendar.nightly_cents = compile_calendar(calendar.rules, today)
+    db.session.commit()
+    print(f"Recompiled {len(calendars)} rate calendars ({CALENDAR_DAYS} nights each).")
+
+
+@app.cli.command("compress-assets")
+def compress_assets():
+    """Write gzip/brotli variants of the React build for serve_frontend."""
+    print(f"Wrote {compress(BUILD_DIR)} compressed assets.")
+
+
+@app.cli.command("refresh-room-availability")
+def refresh_room_availability_command():
+    """Recompute rooms.is_available from the bookings covering today.
+
+    Booking changes keep the flag current, but stays starting or ending are
+    not events; run this from cron (e.g. hourly or just after check-in time).
+    """
+    refresh_room_availability(db.session.connection())
+    db.session.commit()
+    catalog_cache.invalidate(*(
+        tag for (hotel_id,) in db.session.query(Hotels.id)
+        for tag in (f"hotel:{hotel_id}", f"rooms:{hotel_id}")
+    ))
+    print("Room availability refreshed.")
+
 
 # ----------------------Front-end serving-----------------------------
 
 # Absolute path to React build folder
 BUILD_DIR = os.path.join(app.root_path, "static")
+frontend = StaticAssets(BUILD_DIR)
 
 @app.route("/", defaults={"path": ""})
 @app.route("/<path:path>")
 def serve_frontend(path):
     """
     Serves React frontend:
-    - If the requested file exists in the build folder, serve it.
-    - Otherwise, always serve index.html (for React Router).
+    - If the requested file is in the build manifest, serve it (precompressed
+      and immutable-cached where possible).
+    - Otherwise, serve index.html from memory (for React Router).
     """
-    requested_path = os.path.join(BUILD_DIR, path)
-    if path != "" and os.path.exists(requested_path):
-        return send_from_directory(BUILD_DIR, path)
-    else:
-        return send_from_directory(BUILD_DIR, "index.html")
+    response = None if path.startswith("api/") else frontend.serve(path)
+    if response is None:
+        abort(404)
+    return response
 
 
 
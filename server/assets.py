@@ -0,0 +1,137 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+import brotli
+from flask import Response, request, send_file
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Text formats worth compressing; images and fonts are already compressed
+COMPRESSIBLE = {".js", ".css", ".html", ".json", ".map", ".txt", ".svg", ".ico"}
+MIN_COMPRESS_SIZE = 1024
+
+# (Content-Encoding, file suffix) in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class Asset:
+    __slots__ = ("path", "mimetype", "etag", "cache_control", "variants")
+
+    def __init__(self, path, mimetype, etag, cache_control):
+        self.path = path
+        self.mimetype = mimetype
+        self.etag = etag
+        self.cache_control = cache_control
+        self.variants = {}
+
+
+class StaticAssets:
+    """In-memory manifest of the React build directory.
+
+    The directory is walked once at startup, so requests never touch the
+    filesystem to decide what to serve. Files listed in asset-manifest.json
+    carry a content hash in their name and are served as immutable; anything
+    else revalidates by ETag. `.br` / `.gz` siblings made by `compress()` are
+    served to clients that accept them, and index.html is kept in memory for
+    client-side routes.
+    """
+
+    def __init__(self, build_dir):
+        self.build_dir = build_dir
+        self.assets = {}
+        self.index = None
+        self.index_etag = None
+        if os.path.isdir(build_dir):
+            self._load()
+
+    def _load(self):
+        hashed = set()
+        manifest = os.path.join(self.build_dir, "asset-manifest.json")
+        if os.path.exists(manifest):
+            with open(manifest) as f:
+                files = json.load(f).get("files", {})
+            hashed = {os.path.normpath(p) for p in files.values()}
+            hashed.discard("index.html")
+
+        for root, _, names in os.walk(self.build_dir):
+            for name in names:
+                full = os.path.join(root, name)
+                rel = os.path.relpath(full, self.build_dir).replace(os.sep, "/")
+                if rel.endswith((".br", ".gz")) and os.path.exists(full[:-3]):
+                    continue
+                stat = os.stat(full)
+                self.assets[rel] = Asset(
+                    full,
+                    mimetypes.guess_type(name)[0] or "application/octet-stream",
+                    f"{stat.st_mtime_ns:x}-{stat.st_size:x}",
+                    IMMUTABLE if rel in hashed else REVALIDATE,
+                )
+
+        for rel, asset in self.assets.items():
+            for encoding, suffix in ENCODINGS:
+                if os.path.exists(asset.path + suffix):
+                    asset.variants[encoding] = asset.path + suffix
+
+        index = os.path.join(self.build_dir, "index.html")
+        if os.path.exists(index):
+            with open(index, "rb") as f:
+                self.index = f.read()
+            self.index_etag = hashlib.sha1(self.index).hexdigest()
+
+    def serve(self, path):
+        """Response for `path`, falling back to index.html; None if neither exists."""
+        asset = self.assets.get(path) if path and path != "index.html" else None
+        if asset is not None:
+            return self._send(asset)
+        if self.index is None or path.startswith("static/"):
+            # A missing hashed bundle must not come back as HTML
+            return None
+        response = Response(self.index, mimetype="text/html")
+        response.set_etag(self.index_etag)
+        response.headers["Cache-Control"] = REVALIDATE
+        return response.make_conditional(request)
+
+    def _send(self, asset):
+        path, etag, encoding = asset.path, asset.etag, None
+        accepted = request.accept_encodings
+        for candidate, _ in ENCODINGS:
+            if candidate in asset.variants and accepted[candidate]:
+                path, etag, encoding = asset.variants[candidate], f"{etag}-{candidate}", candidate
+                break
+
+        response = send_file(path, mimetype=asset.mimetype, etag=etag, conditional=True)
+        response.headers["Cache-Control"] = asset.cache_control
+        if asset.variants:
+            response.vary.add("Accept-Encoding")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        return response
+
+
+def compress(build_dir):
+    """Write .gz and .br variants next to compressible files.
+
+    Returns the number of files written.
+    """
+    written = 0
+    for root, _, names in os.walk(build_dir):
+        for name in names:
+            full = os.path.join(root, name)
+            if (os.path.splitext(name)[1] not in COMPRESSIBLE
+                    or os.path.getsize(full) < MIN_COMPRESS_SIZE):
+                continue
+            with open(full, "rb") as f:
+                data = f.read()
+            variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0)),
+                        (".br", brotli.compress(data, quality=11))]
+            for suffix, body in variants:
+                # Only keep variants that actually save bytes
+                if len(body) < len(data):
+                    with open(full + suffix, "wb") as f:
+                        f.write(body)
+                    written += 1
+    return written
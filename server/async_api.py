@@ -0,0 +1,292 @@
+"""Async serving mode for the read-heavy endpoints.
+
+An ASGI app that answers
+
+    GET /api/hotels                      (HotelsList)
+    GET /api/hotels/<id>/rooms           (RoomsPerHotel)
+    GET /api/rooms/<id>/available        (AvailableRoomsPerHotel)
+    GET /api/my_bookings                 (GuestBookings)
+    GET /api/hotels/<id>/bookings        (BookingByHotelId)
+
+on an async SQLAlchemy engine with the same models, serializers, ETags and
+catalog cache, and hands every other request to the Flask app. A request
+waiting on the database only holds a coroutine, so one process can serve
+many slow clients at once.
+
+Served by uvicorn; the async driver is aiosqlite for SQLite and asyncpg
+for PostgreSQL:
+
+    uvicorn async_api:asgi_app --host 0.0.0.0 --port 5000 --workers 4
+
+The async URL is derived from DATABASE_URI (sqlite -> sqlite+aiosqlite,
+postgresql -> postgresql+asyncpg) unless ASYNC_DATABASE_URI is set. The
+guest session is read from the same signed cookie Flask issues.
+"""
+
+import json
+import os
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import NullPool
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+from app import (
+    GUEST_BOOKING_FIELDS, AvailableRoomsPerHotel, BookingByHotelId,
+    HotelsList, RoomsPerHotel, decode_cursor, encode_cursor, etag_for)
+from config import app
+from models import BookedRoom, Bookings, Hotels, Rooms, RoomTypes, catalog_cache
+from serializers import eager_options, serialize
+
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_database_uri():
+    uri = os.environ.get("ASYNC_DATABASE_URI")
+    if uri:
+        return uri
+    url = make_url(app.config["SQLALCHEMY_DATABASE_URI"])
+    backend = url.get_backend_name()
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def async_engine_options(url):
+    """Pool options for the async engine (see config.engine_options)."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    if os.environ.get("DB_POOLER") == "transaction":
+        # asyncpg prepares every statement; a transaction pooler may run the
+        # next one on a different server connection.
+        return {
+            "poolclass": NullPool,
+            "connect_args": {"statement_cache_size": 0,
+                             "prepared_statement_cache_size": 0},
+        }
+    return {
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "1") == "1",
+        "pool_size": int(os.environ.get("ASYNC_DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.environ.get("ASYNC_DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+    }
+
+
+engine_url = async_database_uri()
+engine = create_async_engine(engine_url, **async_engine_options(engine_url))
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+
+# -------------------------------helpers---------------------------------
+
+def json_response(payload, status=200, etag=None):
+    # Same body as Flask's jsonify so both modes return identical bytes
+    response = Response(app.json.response(payload).get_data(), status,
+                        media_type="application/json")
+    if etag:
+        response.headers["ETag"] = f'"{etag}"'
+    return response
+
+
+def error(message, status):
+    return json_response({"error": message}, status)
+
+
+def request_etag(request, state):
+    return etag_for(request.url.path, request.scope["query_string"], tuple(state))
+
+
+def not_modified(request, etag):
+    candidates = request.headers.get("if-none-match", "")
+    if f'"{etag}"' in candidates or candidates.strip() == "*":
+        return Response(status_code=304, headers={"ETag": f'"{etag}"'})
+    return None
+
+
+def session_guest_id(request):
+    """guest_id from Flask's signed session cookie, or None."""
+    cookie = request.cookies.get(app.config["SESSION_COOKIE_NAME"])
+    if not cookie:
+        return None
+    serializer = app.session_interface.get_signing_serializer(app)
+    try:
+        data = serializer.loads(
+            cookie, max_age=int(app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return None
+    return data.get("guest_id")
+
+
+async def list_response(request, session, stmt, key, to_dict, cache=None):
+    """Async counterpart of app.list_response (plain, paged or streamed)."""
+    args = request.query_params
+    stmt = stmt.order_by(key)
+
+    fmt = args.get("stream")
+    if fmt:
+        if fmt not in ("ndjson", "json"):
+            return error("stream must be ndjson or json", 400)
+        return StreamingResponse(
+            _stream(stmt, to_dict, fmt),
+            media_type="application/x-ndjson" if fmt == "ndjson" else "application/json")
+
+    async def load():
+        if "limit" not in args and "after" not in args:
+            rows = (await session.scalars(stmt)).all()
+            return [to_dict(row) for row in rows]
+
+        limit = max(1, min(int(args.get("limit", 20)), 100))
+        page = stmt
+        if "after" in args:
+            page = page.where(key > int(decode_cursor(args["after"])[0]))
+        rows = (await session.scalars(page.limit(limit + 1))).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(getattr(rows[-1], key.key))
+        return {"results": [to_dict(row) for row in rows], "next_cursor": next_cursor}
+
+    try:
+        payload = await (cache(load) if cache else load())
+    except (ValueError, IndexError):
+        return error("Invalid limit or cursor", 400)
+    return json_response(payload)
+
+
+async def _stream(stmt, to_dict, fmt):
+    # Own session: the request's one is closed once the response starts
+    async with Session() as session:
+        rows = await session.stream_scalars(stmt.execution_options(yield_per=1000))
+        first = True
+        if fmt == "json":
+            yield "["
+        async for row in rows:
+            line = json.dumps(to_dict(row), default=str)
+            if fmt == "ndjson":
+                yield line + "\n"
+            else:
+                yield ("" if first else ",") + line
+            first = False
+        if fmt == "json":
+            yield "]"
+
+
+# ------------------------------endpoints--------------------------------
+
+async def hotels_list(request):
+    async with Session() as session:
+        state = (await session.execute(
+            select(func.count(Hotels.id), func.max(Hotels.updated_at)))).one()
+        etag = request_etag(request, state)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        response = await list_response(
+            request, session, select(Hotels), Hotels.id,
+            lambda h: serialize(h, HotelsList.fields),
+            cache=lambda load: catalog_cache.get_or_load_async(
+                "hotels", ("hotels",), load, variant=etag),
+        )
+    if response.status_code == 200:
+        response.headers["ETag"] = f'"{etag}"'
+    return response
+
+
+async def rooms_per_hotel(request):
+    hotel_id = request.path_params["hotel_id"]
+    fields = RoomsPerHotel.fields
+    async with Session() as session:
+        state = (await session.execute(
+            select(func.count(Rooms.id), func.max(Rooms.updated_at),
+                   func.max(RoomTypes.updated_at))
+            .outerjoin(RoomTypes, RoomTypes.id == Rooms.room_type_id)
+            .where(Rooms.hotel_id == hotel_id))).one()
+        etag = request_etag(request, state)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        async def load():
+            rooms = await session.scalars(
+                select(Rooms).where(Rooms.hotel_id == hotel_id)
+                .options(*eager_options(Rooms, fields)))
+            return [serialize(r, fields) for r in rooms]
+
+        payload = await catalog_cache.get_or_load_async(
+            "hotel_rooms", (f"rooms:{hotel_id}", "room_types"), load, variant=etag)
+    return json_response(payload, etag=etag)
+
+
+async def available_rooms_per_hotel(request):
+    fields = AvailableRoomsPerHotel.fields
+    try:
+        async with Session() as session:
+            rooms = await session.scalars(
+                select(Rooms).where(
+                    Rooms.currently_available == True,
+                    Rooms.is_available == True,
+                    Rooms.hotel_id == request.path_params["hotel_id"],
+                ).options(*eager_options(Rooms, fields)))
+            payload = [serialize(r, fields) for r in rooms]
+    except Exception as e:
+        return json_response(
+            {"message": f"An error occurred fetching rooms: {str(e)}"}, 500)
+    return json_response(payload)
+
+
+async def guest_bookings(request):
+    guest_id = session_guest_id(request)
+    if not guest_id:
+        return error("Unauthorized", 401)
+
+    async with Session() as session:
+        bookings = await session.scalars(
+            select(Bookings).where(Bookings.guest_id == guest_id)
+            .options(*eager_options(Bookings, GUEST_BOOKING_FIELDS)))
+        payload = [serialize(b, GUEST_BOOKING_FIELDS) for b in bookings]
+    return json_response(payload)
+
+
+async def bookings_by_hotel(request):
+    hotel_booking_ids = (
+        select(BookedRoom.booking_id)
+        .join(Rooms, Rooms.id == BookedRoom.room_id)
+        .where(Rooms.hotel_id == request.path_params["hotel_id"])
+    )
+    stmt = (
+        select(Bookings)
+        .where(Bookings.id.in_(hotel_booking_ids))
+        .options(
+            selectinload(Bookings.guest),
+            selectinload(Bookings.booked_rooms).selectinload(BookedRoom.room),
+        )
+    )
+    async with Session() as session:
+        return await list_response(
+            request, session, stmt, Bookings.id, BookingByHotelId.serialize)
+
+
+routes = [
+    Route("/api/hotels", hotels_list, methods=["GET"]),
+    Route("/api/hotels/{hotel_id:int}/rooms", rooms_per_hotel, methods=["GET"]),
+    Route("/api/rooms/{hotel_id:int}/available", available_rooms_per_hotel, methods=["GET"]),
+    Route("/api/my_bookings", guest_bookings, methods=["GET"]),
+    Route("/api/hotels/{hotel_id:int}/bookings", bookings_by_hotel, methods=["GET"]),
+    # Writes and every other endpoint stay on the Flask app
+    Mount("/", app=WSGIMiddleware(app)),
+]
+
+@asynccontextmanager
+async def lifespan(_):
+    yield
+    await engine.dispose()
+
+
+asgi_app = Starlette(routes=routes, lifespan=lifespan)
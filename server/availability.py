@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+# Seconds the index is served from memory before it is reloaded. Commits in
+# this worker are applied as they happen; this bounds how long a booking made
+# in another worker can go unseen.
+ROOM_NIGHTS_TTL = float(os.environ.get("ROOM_NIGHTS_TTL", 30))
+
+
+class RoomNightIndex:
+    """In-process mirror of room_nights from yesterday on.
+
+    Each room's booked nights are kept as a sorted array of date ordinals with
+    the booking id of each night alongside, so asking whether a room is taken
+    on a night is a bisect: O(log n) and no database round trip. It is the
+    same (room_id, night) definition the booking path enforces with the
+    room_nights primary key.
+
+    Everything is loaded in one query through `loader(first_night)`, which
+    returns `(room_id, night, booking_id)` rows for nights on or after
+    `first_night`, and reloaded after `ttl` seconds. Commits in this process
+    are applied through `add` and `release` (see apply_room_night_ops).
+    Nights before the loaded window cannot be answered and raise ValueError.
+    """
+
+    def __init__(self, loader, ttl=ROOM_NIGHTS_TTL):
+        self.loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.rooms = {}  # room_id -> (night ordinals, booking ids)
+        self.first_night = None
+        self.loaded_at = None
+
+    def _load(self):
+        if self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl:
+            return
+        first_night = datetime.utcnow().date() - timedelta(days=1)
+        rooms = {}
+        for room_id, night, booking_id in sorted(self.loader(first_night)):
+            nights, booking_ids = rooms.setdefault(room_id, (array("i"), array("q")))
+            nights.append(night.toordinal())
+            booking_ids.append(booking_id)
+        self.rooms = rooms
+        self.first_night = first_night.toordinal()
+        self.loaded_at = time.monotonic()
+
+    def _taken(self, room_id, night):
+        if night < self.first_night:
+            raise ValueError(f"night {night} is before the indexed window")
+        entry = self.rooms.get(room_id)
+        if entry is None:
+            return False
+        nights = entry[0]
+        i = bisect_left(nights, night)
+        return i < len(nights) and nights[i] == night
+
+    def is_booked(self, room_id, night) -> bool:
+        """Whether any booking holds `room_id` on the date `night`."""
+        with self._lock:
+            self._load()
+            return self._taken(room_id, night.toordinal())
+
+    def is_free(self, room_id, nights) -> bool:
+        """Whether none of the dates in `nights` is booked for `room_id`."""
+        with self._lock:
+            self._load()
+            return not any(self._taken(room_id, night.toordinal()) for night in nights)
+
+    def add(self, room_id, booking_id, nights):
+        """Record a committed booking's nights; a no-op until loaded."""
+        with self._lock:
+            if self.loaded_at is None:
+                return
+            entry = self.rooms.setdefault(room_id, (array("i"), array("q")))
+            for night in nights:
+                night = night.toordinal()
+                if night < self.first_night:
+                    continue
+                i = bisect_left(entry[0], night)
+                entry[0].insert(i, night)
+                entry[1].insert(i, booking_id)
+
+    def release(self, room_id, booking_id):
+        """Forget every night `booking_id` held on `room_id`."""
+        with self._lock:
+            entry = self.rooms.get(room_id)
+            if entry is None:
+                return
+            kept = [(n, b) for n, b in zip(*entry) if b != booking_id]
+            self.rooms[room_id] = (array("i", (n for n, _ in kept)),
+                                   array("q", (b for _, b in kept)))
+
+    def invalidate(self):
+        with self._lock:
+            self._reset()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Compare the room_nights key probe with the bookings range-overlap query.
+
+Run against a seeded database:  python bench_room_nights.py [probes]
+"""
+
+import sys
+import time
+from random import Random
+
+from app import app
+from config import db, timedelta
+from models import Bookings, BookedRoom, Rooms, RoomNights, datetime
+
+
+def range_query_is_free(room_id, check_in, check_out):
+    conflict = (
+        Bookings.query
+        .join(BookedRoom)
+        .filter(
+            BookedRoom.room_id == room_id,
+            Bookings.check_in_date < check_out,
+            Bookings.check_out_date > check_in
+        )
+        .first()
+    )
+    return conflict is None
+
+
+def timed(label, probe, probes):
+    start = time.perf_counter()
+    free = sum(probe(*p) for p in probes)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<14} {elapsed * 1000:9.1f} ms total  "
+          f"{elapsed / len(probes) * 1e6:8.1f} us/probe  ({free} free)")
+    return free
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = Random(42)
+
+    with app.app_context():
+        room_ids = [r for (r,) in db.session.query(Rooms.id)]
+        if not room_ids:
+            sys.exit("No rooms found; seed the database first.")
+
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        probes = []
+        for _ in range(count):
+            check_in = today + timedelta(days=rng.randint(-180, 180))
+            probes.append((rng.choice(room_ids), check_in,
+                           check_in + timedelta(days=rng.randint(1, 10))))
+
+        print(f"{count} probes over {len(room_ids)} rooms, "
+              f"{RoomNights.query.count()} room nights")
+        a = timed("range query", range_query_is_free, probes)
+        b = timed("room_nights", RoomNights.is_free, probes)
+        if a != b:
+            print("Results differ; run `flask backfill-room-nights` first.")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Compare serializers.serialize() with SerializerMixin.to_dict().
+
+Builds 10k transient Rooms and Bookings in memory, so no database rows are
+needed:  python bench_serializers.py [rows]
+"""
+
+import os
+import sys
+import time
+from decimal import Decimal
+
+os.environ.setdefault("DATABASE_URI", "sqlite://")
+
+from app import app
+from config import timedelta
+from models import BookedRoom, Bookings, Hotels, Rooms, RoomTypes, datetime
+from serializers import serialize
+
+ROOM_SPEC = (
+    "id",
+    "room_name",
+    "room_type.type_name",
+    "hotel.id",
+    "is_available",
+    "price_per_night",
+)
+BOOKING_SPEC = (
+    'id', 'rooms.hotel.name', 'rooms.room_name', 'rooms.price_per_night',
+    'rooms.room_type.type_name', 'check_in_date', 'check_out_date', 'status',
+)
+
+
+def build(count):
+    hotels = [Hotels(id=i, name=f"Hotel {i}") for i in range(20)]
+    room_types = [RoomTypes(id=i, type_name=f"Type {i}") for i in range(5)]
+    rooms = [
+        Rooms(
+            id=i,
+            room_name=f"Room-{i}",
+            price_per_night=Decimal("100.00") + i % 500,
+            is_available=bool(i % 2),
+            hotel=hotels[i % len(hotels)],
+            room_type=room_types[i % len(room_types)],
+        )
+        for i in range(count)
+    ]
+    start = datetime(2030, 1, 1, 14)
+    bookings = []
+    for i in range(count):
+        booking = Bookings(
+            id=i,
+            check_in_date=start + timedelta(days=i % 365),
+            check_out_date=start + timedelta(days=i % 365 + 3),
+            status="Confirmed",
+        )
+        booking.booked_rooms = [BookedRoom(room=rooms[i]), BookedRoom(room=rooms[-i - 1])]
+        bookings.append(booking)
+    return rooms, bookings
+
+
+def timed(label, fn, rows, spec):
+    start = time.perf_counter()
+    out = [fn(row, spec) for row in rows]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<10} {elapsed * 1000:9.1f} ms  {len(rows) / elapsed:10.0f} rows/s")
+    return out, elapsed
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+
+    with app.app_context():
+        rooms, bookings = build(count)
+        for name, rows, spec in (("Rooms", rooms, ROOM_SPEC),
+                                 ("Bookings", bookings, BOOKING_SPEC)):
+            print(f"{name} x {count}")
+            expected, slow = timed("to_dict", lambda o, s: o.to_dict(only=s), rows, spec)
+            actual, fast = timed("compiled", serialize, rows, spec)
+            assert actual == expected, "compiled output differs from to_dict"
+            print(f"  speedup    {slow / fast:9.1f}x")
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""Endpoint benchmarks for every route registered with `api.add_resource`.
+
+    python benchmark.py                                  # SQLite, small + medium
+    python benchmark.py --sizes small,medium,large \\
+        --postgres postgresql://bench@localhost/bench_scratch
+    python benchmark.py --compare bench_results/<earlier>.json
+
+For each backend and data size a fresh process builds the schema, seeds it
+with seed.py and drives the Flask app in-process through the test client,
+so only the application and the database are measured, not a network stack.
+Each route/method runs --requests times from a single client and reports
+p50/p95/p99 latency, requests/s, SQL statements per request (from the
+Server-Timing header SqlMetrics adds) and the process peak RSS so far. A
+route or method registered without a case fails the run before seeding.
+
+Results go to a JSON file (bench_results/<UTC timestamp>.json by default);
+--compare prints the p95 and query count change against an earlier file.
+
+The PostgreSQL database is dropped and recreated table by table: point it
+at a scratch database, never a real one. Write routes create their own rows
+(guests, rooms, hotels, bookings) and delete them where the API allows, so
+the seeded data stays comparable across routes.
+"""
+
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+
+from load_test import percentile
+
+SIZES = {
+    "small": {"guests": 1_000, "hotels": 20, "rooms_per_hotel": 10},
+    "medium": {"guests": 20_000, "hotels": 200, "rooms_per_hotel": 20},
+    "large": {"guests": 200_000, "hotels": 1_000, "rooms_per_hotel": 40},
+}
+PASSWORD = "bench-password"
+SQL_COUNT = re.compile(r'desc="(\d+) queries"')
+# Enough for build_cases to list its routes without a seeded database
+PLACEHOLDER_CTX = {"hotels": 1, "rooms": 1, "rooms_per_hotel": 1, "guests": 1,
+                   "future_days": 0, "guest_email": "", "admin_name": "",
+                   "search_terms": [("", "")]}
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class Case:
+    """One route/method: `build(i)` returns (path, json body) for request i.
+
+    `setup(client, i)` runs untimed before request i (e.g. logging in as an
+    admin without a hotel) and `record(response)` sees every response, which lets a
+    later case delete what an earlier one created.
+    """
+
+    def __init__(self, method, rule, build, role=None, setup=None, record=None,
+                 warmup=True, max_requests=None):
+        self.method = method
+        self.rule = rule
+        self.build = build
+        self.role = role
+        self.setup = setup
+        self.record = record
+        self.warmup = warmup
+        # bcrypt-bound routes take ~0.3 s per request at the default cost
+        self.max_requests = max_requests
+
+
+def build_cases(ctx):
+    """Cases in run order; reads first, then writes that clean up after themselves."""
+    from random import Random
+
+    rng = Random(0)
+    hotels, rooms, guests = ctx["hotels"], ctx["rooms"], ctx["guests"]
+    hotel = lambda: rng.randint(1, hotels)
+    # Stays past the seeded horizon so new bookings never conflict
+    horizon = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) \
+        + timedelta(days=ctx["future_days"] + 30)
+
+    def stay(i, offset_days, room_count=1):
+        slot = i * room_count
+        check_in = horizon + timedelta(days=offset_days + (slot // rooms) * 3, hours=14)
+        return {"room_ids": [(slot + n) % rooms + 1 for n in range(room_count)],
+                "check_in": check_in.isoformat(),
+                "check_out": (check_in + timedelta(days=2)).isoformat()}
+
+    search_from = (horizon - timedelta(days=20)).date()
+    my_bookings = []
+    created = {"guests": [], "hotels": []}
+
+    def keep(key, field="id"):
+        def record(response):
+            body = response.get_json(silent=True)
+            if response.status_code == 201 and isinstance(body, dict) and field in body:
+                created[key].append(body[field])
+        return record
+
+    def keep_booking(response):
+        body = response.get_json(silent=True)
+        if response.status_code == 201:
+            my_bookings.extend(b["id"] for b in (body if isinstance(body, list) else [body]))
+
+    def owner_login(client, i):
+        # admins made by the POST /api/admins case, none of which owns a hotel
+        client.post("/api/admin/login", json={"name": f"bench-owner-{i}", "password": PASSWORD})
+
+    def search_query(i):
+        # exact word, prefix being typed, a typo, and name plus city
+        word, city = ctx["search_terms"][i % len(ctx["search_terms"])]
+        q = (word, word[:3], word[:2] + word[3:], f"{word} {city[:4]}")[i % 4]
+        return urlencode({"q": q, "limit": 20})
+
+    def created_hotel(i):
+        return created["hotels"][i % len(created["hotels"])] if created["hotels"] else 0
+
+    return [
+        # catalog reads
+        Case("GET", "/api/hotels", lambda i: ("/api/hotels?limit=50", None)),
+        Case("GET", "/api/hotels/<int:id>", lambda i: (f"/api/hotels/{hotel()}", None)),
+        Case("GET", "/api/hotels/search", lambda i: (f"/api/hotels/search?{search_query(i)}", None)),
+        Case("GET", "/api/hotels/<int:hotel_id>/rooms",
+             lambda i: (f"/api/hotels/{hotel()}/rooms", None)),
+        Case("GET", "/api/rooms/<int:hotel_id>/available",
+             lambda i: (f"/api/rooms/{hotel()}/available", None)),
+        Case("GET", "/api/rooms", lambda i: ("/api/rooms?limit=50", None)),
+        Case("GET", "/api/room_types", lambda i: ("/api/room_types", None)),
+        Case("GET", "/api/hotel/<int:hotel_id>/amenities",
+             lambda i: (f"/api/hotel/{hotel()}/amenities", None)),
+        Case("GET", "/api/search", lambda i: (
+            f"/api/search?check_in={search_from + timedelta(days=i % 14)}"
+            f"&check_out={search_from + timedelta(days=i % 14 + 3)}&limit=20", None)),
+        Case("GET", "/api/rooms/<int:id>/rates", lambda i: (
+            f"/api/rooms/{rng.randint(1, rooms)}/rates?days=90", None)),
+        Case("POST", "/api/quotes", lambda i: ("/api/quotes", {"stays": [
+            {"room_id": rng.randint(1, rooms),
+             "check_in": (search_from + timedelta(days=n % 30)).isoformat(),
+             "check_out": (search_from + timedelta(days=n % 30 + 1 + n % 7)).isoformat()}
+            for n in range(50)]})),
+        Case("GET", "/api/guests", lambda i: ("/api/guests?limit=50", None)),
+        Case("GET", "/api/guests/<int:id>",
+             lambda i: (f"/api/guests/{rng.randint(1, guests)}", None)),
+        Case("GET", "/api/admins", lambda i: ("/api/admins", None)),
+        Case("GET", "/api/bookings", lambda i: ("/api/bookings?limit=50", None)),
+        Case("GET", "/api/hotels/<int:hotel_id>/bookings",
+             lambda i: (f"/api/hotels/{hotel()}/bookings?limit=50", None)),
+        # sessions
+        Case("POST", "/api/guests/login",
+             lambda i: ("/api/guests/login", {"email": ctx["guest_email"], "password": PASSWORD}),
+             max_requests=50),
+        Case("GET", "/api/guest", lambda i: ("/api/guest", None), role="guest"),
+        Case("GET", "/api/my_bookings", lambda i: ("/api/my_bookings", None), role="guest"),
+        Case("DELETE", "/api/guests/logout", lambda i: ("/api/guests/logout", None),
+             role="guest", max_requests=50),
+        Case("POST", "/api/admin/login",
+             lambda i: ("/api/admin/login", {"name": ctx["admin_name"], "password": PASSWORD}),
+             max_requests=50),
+        Case("GET", "/api/admin", lambda i: ("/api/admin", None), role="admin"),
+        Case("GET", "/api/admin/hotel", lambda i: ("/api/admin/hotel", None), role="admin"),
+        Case("GET", "/api/admin/hotel/analytics", lambda i: (
+            f"/api/admin/hotel/analytics?from={search_from - timedelta(days=365)}"
+            f"&to={search_from}&period={('day', 'week', 'month')[i % 3]}", None),
+            role="admin"),
+        Case("DELETE", "/api/admin/logout", lambda i: ("/api/admin/logout", None),
+             role="admin", max_requests=50),
+        # internal
+        Case("GET", "/api/internal/metrics", lambda i: ("/api/internal/metrics", None)),
+        Case("GET", "/api/internal/cache", lambda i: ("/api/internal/cache", None)),
+        Case("GET", "/api/internal/pool", lambda i: ("/api/internal/pool", None)),
+        # bookings
+        Case("POST", "/api/bookings", lambda i: (
+            "/api/bookings", {"guest_id": rng.randint(1, guests), **stay(i, 0)}),
+            warmup=False),
+        Case("POST", "/api/my_bookings", lambda i: ("/api/my_bookings", stay(i, 400)),
+             role="guest", record=keep_booking, warmup=False),
+        Case("POST", "/api/my_bookings/batch", lambda i: (
+            "/api/my_bookings/batch", {"bookings": [stay(i, 800, 2), stay(i, 1200)]}),
+            role="guest", record=keep_booking, warmup=False),
+        Case("PATCH", "/api/bookings/<int:booking_id>", lambda i: (
+            f"/api/bookings/{my_bookings[i % len(my_bookings)] if my_bookings else 0}",
+            {"status": "Confirmed"}), role="admin"),
+        Case("DELETE", "/api/bookings/<int:booking_id>", lambda i: (
+            f"/api/bookings/{my_bookings.pop() if my_bookings else 0}", None),
+            role="guest", warmup=False),
+        # catalog writes
+        Case("POST", "/api/guests", lambda i: ("/api/guests", {
+            "name": f"Bench Guest {i}", "email": f"bench{i}@example.com",
+            "password": PASSWORD}), record=keep("guests"), warmup=False, max_requests=50),
+        Case("PATCH", "/api/guests/<int:id>", lambda i: (
+            f"/api/guests/{created['guests'][i % len(created['guests'])] if created['guests'] else 0}",
+            {"name": f"Bench Guest {i}b"})),
+        Case("DELETE", "/api/guests/<int:id>", lambda i: (
+            f"/api/guests/{created['guests'].pop() if created['guests'] else 0}", None),
+            warmup=False),
+        Case("POST", "/api/admins", lambda i: ("/api/admins", {
+            "name": f"bench-owner-{i}", "password": PASSWORD}), warmup=False,
+            max_requests=50),
+        Case("POST", "/api/hotels", lambda i: ("/api/hotels", {
+            "name": f"Bench Hotel {i}", "address": f"{i} Bench Road", "city": "Nairobi",
+            "country": "Kenya", "email": f"bench-hotel{i}@example.com",
+            "phone": f"+2541{i:08d}"}),
+            setup=owner_login, record=keep("hotels"), warmup=False, max_requests=50),
+        Case("PUT", "/api/hotels/<int:id>", lambda i: (
+            f"/api/hotels/{created_hotel(i)}", {"city": f"Mombasa {i}"})),
+        Case("POST", "/api/hotel/<int:hotel_id>/amenities", lambda i: (
+            f"/api/hotel/{created_hotel(i)}/amenities",
+            {"name": f"Bench Amenity {i}", "description": "Benchmark amenity"}),
+            warmup=False),
+        Case("POST", "/api/rooms", lambda i: ("/api/rooms", {
+            "room_name": f"Bench-{i}", "price_per_night": 4500, "hotel_id": hotel(),
+            "room_type": "Suite", "description": "Benchmark room"}), warmup=False),
+        Case("PUT", "/api/rooms/<int:id>", lambda i: (
+            f"/api/rooms/{rng.randint(1, rooms)}", {"is_available": True})),
+        Case("PUT", "/api/rooms/<int:id>/rates", lambda i: (
+            f"/api/rooms/{i % ctx['rooms_per_hotel'] + 1}/rates",
+            {"weekdays": {"fri": 120 + i % 50, "sat": 120 + i % 50},
+             "seasons": [{"name": "Peak", "from": str(search_from),
+                          "to": str(search_from + timedelta(days=30)), "rate": 180}]}),
+             role="admin"),
+        Case("DELETE", "/api/rooms/<int:id>/rates", lambda i: (
+            f"/api/rooms/{i % ctx['rooms_per_hotel'] + 1}/rates", None), role="admin"),
+        Case("DELETE", "/api/rooms/<int:id>", lambda i: (
+            f"/api/rooms/{rooms + i + 1}", None), warmup=False),
+        Case("DELETE", "/api/hotels/<int:id>", lambda i: (
+            f"/api/hotels/{created['hotels'].pop() if created['hotels'] else 0}", None),
+            warmup=False),
+    ]
+
+
+def run_case(app, case, requests, logins):
+    requests = min(requests, case.max_requests or requests)
+    client = app.test_client()
+    if case.role:
+        path, body = logins[case.role]
+        client.post(path, json=body)
+
+    def send(i):
+        path, body = case.build(i)
+        return client.open(path, method=case.method, json=body)
+
+    if case.warmup:
+        for i in range(min(5, requests)):
+            send(i)
+
+    latencies, statuses, queries = [], Counter(), []
+    started = time.perf_counter()
+    for i in range(requests):
+        if case.setup:
+            case.setup(client, i)
+        if case.role and case.method == "DELETE" and case.rule.endswith("logout"):
+            # log straight back in so every request logs a session out
+            path, body = logins[case.role]
+            client.post(path, json=body)
+        start = time.perf_counter()
+        response = send(i)
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] += 1
+        match = SQL_COUNT.search(response.headers.get("Server-Timing", ""))
+        if match:
+            queries.append(int(match.group(1)))
+        if case.record:
+            case.record(response)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "method": case.method,
+        "rule": case.rule,
+        "role": case.role,
+        "requests": requests,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        # includes untimed setup for cases that need one
+        "rps": round(requests / elapsed, 1),
+        "sql_mean": round(sum(queries) / len(queries), 2) if queries else None,
+        "sql_max": max(queries) if queries else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def uncovered_routes(app, api, cases):
+    """`METHOD rule` for every api.add_resource route and method no case runs."""
+    # api.resources is only filled when the Api is created without an app
+    registered = {(method, rule.rule) for rule in app.url_map.iter_rules()
+                  if rule.endpoint in api.endpoints
+                  for method in rule.methods - {"HEAD", "OPTIONS"}}
+    covered = {(case.method, case.rule) for case in cases}
+    return sorted(f"{m} {u}" for m, u in registered - covered)
+
+
+def run_one(backend, size, requests, output):
+    """Child process: seed DATABASE_URI at `size`, run every case, write JSON."""
+    from app import api, app
+    from config import db
+    from models import Admins, Guests, Hotels, create_hotel_search_index
+    from seed import Writer, finish, generate
+
+    # Checked before seeding, so a new route without a case fails in seconds
+    uncovered = uncovered_routes(app, api, build_cases(PLACEHOLDER_CTX))
+    if uncovered:
+        sys.exit(f"No benchmark case for: {', '.join(uncovered)}")
+
+    params = argparse.Namespace(
+        seed=42, history_days=180, future_days=60, occupancy=0.6, rate_calendars=0.3,
+        password=PASSWORD, batch_size=10_000, **SIZES[size])
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        connection = db.session.connection()
+        writer = Writer(connection, params.batch_size)
+        generate(writer, params)
+        finish(writer)
+        create_hotel_search_index(connection)
+        db.session.commit()
+        seed_seconds = time.perf_counter() - started
+        if db.engine.dialect.name == "postgresql":
+            with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.exec_driver_sql("VACUUM ANALYZE")
+        else:
+            db.session.execute(db.text("ANALYZE"))
+            db.session.commit()
+        ctx = {
+            "hotels": params.hotels,
+            "rooms": params.hotels * params.rooms_per_hotel,
+            "rooms_per_hotel": params.rooms_per_hotel,
+            "guests": params.guests,
+            "future_days": params.future_days,
+            "guest_email": db.session.get(Guests, 1).email,
+            "admin_name": db.session.get(Admins, 1).name,
+            "search_terms": [
+                (name.split()[0].strip(",").lower(), city.lower())
+                for name, city in db.session.execute(
+                    db.select(Hotels.name, Hotels.city).order_by(Hotels.id).limit(50))
+            ],
+        }
+        db.session.remove()
+
+    logins = {
+        "guest": ("/api/guests/login", {"email": ctx["guest_email"], "password": PASSWORD}),
+        "admin": ("/api/admin/login", {"name": ctx["admin_name"], "password": PASSWORD}),
+    }
+    results = []
+    for case in build_cases(ctx):
+        print(f"  {backend}/{size} {case.method} {case.rule}", file=sys.stderr)
+        results.append(run_case(app, case, requests, logins))
+
+    with open(output, "w") as f:
+        json.dump({
+            "backend": backend,
+            "size": size,
+            "params": SIZES[size],
+            "rows": writer.counts,
+            "seed_seconds": round(seed_seconds, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "endpoints": results,
+        }, f)
+
+
+def compare(current, previous):
+    """Print p95 and SQL count changes between two result files."""
+    before = {(r["backend"], r["size"], e["method"], e["rule"]): e
+              for r in previous["runs"] for e in r["endpoints"]}
+    print(f"\n{'backend/size':<18} {'route':<48} {'p95 ms':>18} {'sql':>10}")
+    for run in current["runs"]:
+        for e in run["endpoints"]:
+            old = before.get((run["backend"], run["size"], e["method"], e["rule"]))
+            if old is None:
+                continue
+            change = (e["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0
+            print(f"{run['backend'] + '/' + run['size']:<18} "
+                  f"{e['method'] + ' ' + e['rule']:<48} "
+                  f"{old['p95_ms']:>7.1f} -> {e['p95_ms']:>7.1f} {change:+5.0f}% "
+                  f"{old['sql_mean'] or 0:>4} -> {e['sql_mean'] or 0}")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="small,medium",
+                        help=f"comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--sqlite", default=None,
+                        help="SQLite file to use (default: a temporary file)")
+    parser.add_argument("--postgres", default=os.environ.get("BENCH_POSTGRES_URI"),
+                        help="scratch PostgreSQL URI (or BENCH_POSTGRES_URI)")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", help="earlier result file to diff against")
+    parser.add_argument("--run-one", nargs=3, metavar=("BACKEND", "SIZE", "OUTPUT"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        backend, size, output = args.run_one
+        run_one(backend, size, args.requests, output)
+        return
+
+    sizes = args.sizes.split(",")
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    tmpdir = tempfile.mkdtemp(prefix="bench-")
+    backends = [("sqlite", f"sqlite:///{os.path.abspath(args.sqlite or os.path.join(tmpdir, 'bench.db'))}")]
+    if args.postgres:
+        backends.append(("postgresql", args.postgres))
+
+    stamp = datetime.now(timezone.utc)
+    output = args.output or os.path.join("bench_results", stamp.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    runs = []
+    for backend, uri in backends:
+        for size in sizes:
+            print(f"{backend}/{size}: seeding and running...", file=sys.stderr)
+            part = os.path.join(tmpdir, f"{backend}-{size}.json")
+            env = dict(os.environ, DATABASE_URI=uri)
+            child = subprocess.run(
+                [sys.executable, __file__, "--requests", str(args.requests),
+                 "--run-one", backend, size, part],
+                env=env, stdout=subprocess.DEVNULL)
+            if child.returncode:
+                sys.exit(f"{backend}/{size} run failed")
+            with open(part) as f:
+                runs.append(json.load(f))
+
+    result = {
+        "started_at": stamp.isoformat(),
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "requests_per_route": args.requests,
+        "runs": runs,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    for run in runs:
+        print(f"\n{run['backend']}/{run['size']}  seed {run['seed_seconds']}s  "
+              f"peak RSS {run['peak_rss_mb']} MB")
+        print(f"  {'route':<48} {'p50':>7} {'p95':>7} {'p99':>7} {'req/s':>7} {'sql':>5}  status")
+        for e in run["endpoints"]:
+            print(f"  {e['method'] + ' ' + e['rule']:<48} {e['p50_ms']:>7.1f} "
+                  f"{e['p95_ms']:>7.1f} {e['p99_ms']:>7.1f} {e['rps']:>7.0f} "
+                  f"{e['sql_mean'] if e['sql_mean'] is not None else '-':>5}  "
+                  f"{' '.join(f'{k}x{v}' for k, v in e['statuses'].items())}")
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
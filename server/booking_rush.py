@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Booking-rush soak test: many guests booking the same few rooms at once.
+
+    python booking_rush.py http://127.0.0.1:5000 [--guests 100] [--rooms 3] \\
+        [--attempts 10] [--password password123] [--json rush.json]
+
+Logs in --guests seeded guests (seed.py gives them all the same password),
+holds them at a barrier, then releases them together. Each guest sends
+--attempts bookings for a random hot room and a short random stay inside a
+--spread-day window, so most requests collide. Requests are split between
+POST /api/my_bookings (session) and POST /api/bookings (guest_id in the
+body) by --my-share.
+
+Afterwards every booking on the hot rooms is read back from
+/api/hotels/<id>/bookings and checked in id order. A booking whose
+check-in/check-out times overlap those of an earlier booking on the same
+room is a double booking. The check deliberately does not reuse the
+server's room_nights arithmetic. Every 201 the clients saw must also be in
+that list. The exit status is 1 if either check fails.
+
+Stays start --start-days ahead (default 365), past what seed.py books, so
+the hot rooms begin empty. Reruns without reseeding need a new --start-days.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from load_test import percentile
+
+OUTCOMES = {201: "booked", 409: "conflict", 503: "contention"}
+
+
+def outcome(status):
+    if status in OUTCOMES:
+        return OUTCOMES[status]
+    return "error" if status >= 500 else "rejected"
+
+
+class Connection:
+    """Keep-alive connection that carries the session cookie."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.cookie = None
+        self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+
+    def request(self, method, path, body=None):
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        try:
+            self.conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                              headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            return 599, None
+        cookie = response.getheader("Set-Cookie")
+        if cookie:
+            self.cookie = cookie.split(";", 1)[0]
+        return response.status, data
+
+    def json(self, path):
+        status, data = self.request("GET", path)
+        if status != 200:
+            raise SystemExit(f"GET {path} returned {status}")
+        return json.loads(data)
+
+    def close(self):
+        self.conn.close()
+
+
+class Guest(threading.Thread):
+    def __init__(self, url, guest, password, stays, barrier, attempts, my_share, seed):
+        super().__init__(daemon=True)
+        self.conn = Connection(url)
+        self.guest = guest
+        self.password = password
+        self.stays = stays
+        self.barrier = barrier
+        self.attempts = attempts
+        self.my_share = my_share
+        self.rng = random.Random(seed)
+        self.results = []  # (endpoint, outcome, latency, booking id)
+        self.logged_in = False
+
+    def run(self):
+        status, _ = self.conn.request(
+            "POST", "/api/guests/login",
+            {"email": self.guest["email"], "password": self.password})
+        self.logged_in = status == 200
+        self.barrier.wait()
+        if not self.logged_in:
+            self.conn.close()
+            return
+
+        for _ in range(self.attempts):
+            room_id, check_in, check_out = self.rng.choice(self.stays)
+            body = {"room_id": room_id, "check_in": check_in, "check_out": check_out}
+            if self.rng.random() < self.my_share:
+                path = "/api/my_bookings"
+            else:
+                path = "/api/bookings"
+                body["guest_id"] = self.guest["id"]
+            start = time.perf_counter()
+            status, data = self.conn.request("POST", path, body)
+            latency = time.perf_counter() - start
+            booking_id = json.loads(data)["id"] if status == 201 else None
+            self.results.append((path, outcome(status), latency, booking_id))
+        self.conn.close()
+
+
+def load_guests(conn, count):
+    guests, after = [], None
+    while len(guests) < count:
+        page = conn.json("/api/guests?limit=100" + (f"&after={after}" if after else ""))
+        guests += page["results"]
+        after = page["next_cursor"]
+        if not after:
+            break
+    if len(guests) < count:
+        raise SystemExit(f"only {len(guests)} guests exist; seed more or lower --guests")
+    return guests[:count]
+
+
+def hot_stays(room_ids, start, spread, rng, count=200):
+    """Overlapping stays of 1-3 nights inside `spread` days from `start`."""
+    stays = []
+    for _ in range(count):
+        check_in = start + timedelta(days=rng.randrange(spread), hours=14)
+        check_out = (check_in + timedelta(days=rng.randint(1, 3))).replace(hour=10)
+        stays.append((rng.choice(room_ids), check_in.isoformat(), check_out.isoformat()))
+    return stays
+
+
+def audit(conn, hotel_id, room_ids, created_ids):
+    """Find hot-room bookings whose stay overlaps an earlier one's.
+
+    hot_stays always checks in at 14:00 and out at 10:00, so two stays on a
+    room overlap in time exactly when they share a night.
+    """
+    bookings, after = [], None
+    while True:
+        page = conn.json(f"/api/hotels/{hotel_id}/bookings?limit=100"
+                         + (f"&after={after}" if after else ""))
+        bookings += page["results"]
+        after = page["next_cursor"]
+        if not after:
+            break
+
+    stays = {room_id: [] for room_id in room_ids}
+    double_bookings, stored = [], set()
+    for booking in sorted(bookings, key=lambda b: b["id"]):
+        stored.add(booking["id"])
+        check_in = datetime.fromisoformat(booking["check_in_date"])
+        check_out = datetime.fromisoformat(booking["check_out_date"])
+        for room in booking["rooms"]:
+            if room["id"] not in stays:
+                continue
+            earlier = stays[room["id"]]
+            if any(start < check_out and check_in < end for start, end in earlier):
+                double_bookings.append({"booking_id": booking["id"], "room_id": room["id"],
+                                        "check_in": booking["check_in_date"],
+                                        "check_out": booking["check_out_date"]})
+            earlier.append((check_in, check_out))
+    return double_bookings, sorted(set(created_ids) - stored)
+
+
+def run(url, guests=100, rooms=3, attempts=10, password="password123", hotel_id=None,
+        start_days=365, spread=7, my_share=0.5, seed=0):
+    rng = random.Random(seed)
+    conn = Connection(url)
+    if hotel_id is None:
+        hotel_id = conn.json("/api/hotels?limit=1")["results"][0]["id"]
+    room_ids = [r["id"] for r in conn.json(f"/api/hotels/{hotel_id}/rooms")][:rooms]
+    if not room_ids:
+        raise SystemExit(f"hotel {hotel_id} has no rooms")
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) \
+        + timedelta(days=start_days)
+    stays = hot_stays(room_ids, start, spread, rng)
+
+    barrier = threading.Barrier(guests + 1)
+    threads = [Guest(url, g, password, stays, barrier, attempts, my_share, seed=seed + i)
+               for i, g in enumerate(load_guests(conn, guests))]
+    for t in threads:
+        t.start()
+    barrier.wait()  # every guest has logged in
+    began = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - began
+
+    results = [r for t in threads for r in t.results]
+    latencies = sorted(r[2] for r in results)
+    created = [r[3] for r in results if r[3] is not None]
+    counts = Counter(r[1] for r in results)
+    by_endpoint = {path: dict(Counter(r[1] for r in results if r[0] == path))
+                   for path in ("/api/my_bookings", "/api/bookings")}
+    double_bookings, lost = audit(conn, hotel_id, room_ids, created)
+    conn.close()
+
+    total = len(results) or 1
+    return {
+        "hotel_id": hotel_id,
+        "rooms": room_ids,
+        "guests": guests,
+        "logged_in": sum(t.logged_in for t in threads),
+        "requests": len(results),
+        "seconds": round(elapsed, 2),
+        "rps": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "bookings_per_s": round(len(created) / elapsed, 1) if elapsed else 0.0,
+        "outcomes": dict(counts),
+        "by_endpoint": by_endpoint,
+        "conflict_rate": round(counts["conflict"] / total, 4),
+        "error_rate": round((counts["error"] + counts["contention"]) / total, 4),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "double_bookings": double_bookings,
+        "lost_bookings": lost,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("url")
+    parser.add_argument("--guests", type=int, default=100)
+    parser.add_argument("--rooms", type=int, default=3, help="hot rooms")
+    parser.add_argument("--attempts", type=int, default=10, help="bookings per guest")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--hotel", type=int, help="hotel id (default: the first one)")
+    parser.add_argument("--start-days", type=int, default=365)
+    parser.add_argument("--spread", type=int, default=7, help="days the stays fall within")
+    parser.add_argument("--my-share", type=float, default=0.5,
+                        help="fraction of requests sent to /api/my_bookings")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the result to this file")
+    args = parser.parse_args()
+
+    result = run(args.url, args.guests, args.rooms, args.attempts, args.password,
+                 args.hotel, args.start_days, args.spread, args.my_share, args.seed)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    outcomes = ", ".join(f"{k} {v}" for k, v in sorted(result["outcomes"].items()))
+    print(f"{result['logged_in']}/{result['guests']} guests on rooms {result['rooms']} "
+          f"of hotel {result['hotel_id']}")
+    print(f"{result['requests']} requests in {result['seconds']} s: {result['rps']} req/s, "
+          f"{result['bookings_per_s']} bookings/s")
+    print(f"outcomes: {outcomes}")
+    for path, counts in result["by_endpoint"].items():
+        print(f"  {path:<18} {', '.join(f'{k} {v}' for k, v in sorted(counts.items()))}")
+    print(f"conflict rate {result['conflict_rate']:.1%}, error rate {result['error_rate']:.1%}, "
+          f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms")
+    print(f"double bookings: {len(result['double_bookings'])}, "
+          f"lost bookings: {len(result['lost_bookings'])}")
+    for d in result["double_bookings"][:10]:
+        print(f"  booking {d['booking_id']} room {d['room_id']} {d['check_in']} -> {d['check_out']}")
+    raise SystemExit(1 if result["double_bookings"] or result["lost_bookings"] else 0)
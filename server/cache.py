@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL.
+
+    Each gunicorn worker has its own copy, so `ttl` bounds how long a change
+    made through another worker can go unseen.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+    # Counters live outside the LRU so they are never evicted.
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counters(self, keys):
+        with self._lock:
+            return [self._counters.get(key, 0) for key in keys]
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisBackend:
+    """Cache backend over a redis-py compatible client (redis, fakeredis)."""
+
+    def __init__(self, client, ttl=60):
+        self.client = client
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        raw = self.client.get(key)
+        return default if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(key, json.dumps(value, default=str), ex=max(int(ttl), 1))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def incr(self, key):
+        return self.client.incr(key)
+
+    def counters(self, keys):
+        return [int(v or 0) for v in self.client.mget(keys)] if keys else []
+
+
+def make_backend(url=None, maxsize=1024, ttl=60):
+    """Build a cache backend from a URL.
+
+    - unset or `memory://`: in-process LRUCache
+    - `redis://...`: a Redis server (needs the `redis` package)
+    - `fakeredis://`: in-process Redis stand-in (needs `fakeredis`), for
+      exercising the Redis code path locally
+    """
+    if not url or url.startswith("memory://"):
+        return LRUCache(maxsize=maxsize, ttl=ttl)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+        return RedisBackend(redis.Redis.from_url(url), ttl=ttl)
+    if url.startswith("fakeredis://"):
+        import fakeredis
+        return RedisBackend(fakeredis.FakeRedis(), ttl=ttl)
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+class ReadThroughCache:
+    """Read-through cache whose entries are invalidated by tag.
+
+    Every key embeds the current version of each of its tags. Invalidating a
+    tag bumps its version, so all entries built on the old data stop being
+    addressable and simply age out. A load that races with a write stores
+    under the old version, which is already unreachable.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    def _key(self, name, tags, variant):
+        versions = self.backend.counters([f"tag:{tag}" for tag in tags])
+        return ":".join(
+            ["catalog", name, variant]
+            + [f"{tag}@{version}" for tag, version in zip(tags, versions)]
+        )
+
+    def get_or_load(self, name, tags, loader, variant=""):
+        key = self._key(name, tags, variant)
+        value = self.backend.get(key)
+        if value is not None:
+            self._count(name, "hits")
+            return value
+        self._count(name, "misses")
+        value = loader()
+        self.backend.set(key, value)
+        return value
+
+    async def get_or_load_async(self, name, tags, loader, variant=""):
+        """get_or_load() for a coroutine `loader`; the backend stays sync."""
+        key = self._key(name, tags, variant)
+        value = self.backend.get(key)
+        if value is not None:
+            self._count(name, "hits")
+            return value
+        self._count(name, "misses")
+        value = await loader()
+        self.backend.set(key, value)
+        return value
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.incr(f"tag:{tag}")
+
+    def _count(self, name, field):
+        with self._lock:
+            self._stats[name][field] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: dict(counts, hit_ratio=(
+                    counts["hits"] / (counts["hits"] + counts["misses"])))
+                for name, counts in self._stats.items()
+            }
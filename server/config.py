@@ -12,24 +12,88 @@ from flask_migrate import Migrate
 from flask_restful import Api, Resource, reqparse
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import MetaData, event
+from sqlalchemy.pool import NullPool
 from datetime import datetime, timedelta
 
 # Local imports
 from flask_bcrypt import Bcrypt
+from instrumentation import SqlMetrics, TimedQueuePool
 
 # Instantiate app, set attributes
+# The React build in static/ is served by serve_frontend (see assets.py)
 app = Flask(
     __name__, 
-    static_folder="static", 
-    static_url_path="/"     
+    static_folder=None,
 )
 
+def engine_options(uri):
+    """SQLAlchemy engine options from the environment.
+
+    Every gunicorn worker has its own pool, so the app-wide connection budget
+    (DB_MAX_CONNECTIONS) is split across WEB_CONCURRENCY workers: each keeps
+    up to GUNICORN_THREADS connections open and may overflow to its share.
+    With DB_POOLER=transaction an external pooler (PgBouncer in transaction
+    mode) owns the pooling, so connections are not held between requests.
+    """
+    options = {
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "1") == "1",
+        "query_cache_size": int(os.environ.get("DB_QUERY_CACHE_SIZE", 500)),
+    }
+    if not uri or uri.startswith("sqlite"):
+        # Flask-SQLAlchemy picks the right pool for SQLite
+        return options
+
+    if os.environ.get("DB_POOLER") == "transaction":
+        options["poolclass"] = NullPool
+        options["pool_pre_ping"] = False
+        if uri.startswith("postgresql+psycopg:"):
+            # Server-side prepared statements don't survive switching backends
+            options["connect_args"] = {"prepare_threshold": None}
+        return options
+
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    threads = int(os.environ.get("GUNICORN_THREADS", 1))
+    per_worker = max(int(os.environ.get("DB_MAX_CONNECTIONS", 20)) // workers, 1)
+    pool_size = int(os.environ.get("DB_POOL_SIZE", min(threads, per_worker)))
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", max(per_worker - pool_size, 0))),
+        pool_timeout=float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        # below typical server/load balancer idle timeouts
+        pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+        pool_use_lifo=True,
+    )
+    return options
+
+
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URI')
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.json.compact = False
+# bcrypt work factor; stored hashes with a different cost are rehashed on login
+app.config["BCRYPT_LOG_ROUNDS"] = int(os.environ.get("BCRYPT_LOG_ROUNDS", 12))
+app.config["BCRYPT_POOL_WORKERS"] = int(os.environ.get("BCRYPT_POOL_WORKERS", os.cpu_count() or 2))
+app.config["BCRYPT_POOL_QUEUE"] = int(os.environ.get("BCRYPT_POOL_QUEUE", 16))
+app.config["BCRYPT_POOL_TIMEOUT"] = float(os.environ.get("BCRYPT_POOL_TIMEOUT", 5))
 bcrypt = Bcrypt(app)
 app.config['SECRET_KEY'] = os.environ.get("SECRET_KEY", "dev-secret-key")
 app.config["SESSION_COOKIE_HTTPONLY"] = True
+app.config["ENFORCE_QUERY_BUDGETS"] = os.environ.get("ENFORCE_QUERY_BUDGETS") == "1"
+app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN")
+app.config["IDENTITY_CACHE_SIZE"] = int(os.environ.get("IDENTITY_CACHE_SIZE", 10000))
+app.config["IDENTITY_CACHE_TTL"] = float(os.environ.get("IDENTITY_CACHE_TTL", 60))
+# memory:// (default), redis://host:6379/0 or fakeredis://
+app.config["CATALOG_CACHE_URL"] = os.environ.get("CATALOG_CACHE_URL")
+app.config["CATALOG_CACHE_SIZE"] = int(os.environ.get("CATALOG_CACHE_SIZE", 2048))
+app.config["CATALOG_CACHE_TTL"] = float(os.environ.get("CATALOG_CACHE_TTL", 300))
+# Shared backend for session identities. With WEB_CONCURRENCY > 1 this must be
+# a redis:// URL: without one the identity cache is disabled (with a warning at
+# startup) and every session check queries the database.
+app.config["IDENTITY_CACHE_URL"] = os.environ.get(
+    "IDENTITY_CACHE_URL", app.config["CATALOG_CACHE_URL"])
+# extra attempts for a booking that hits a deadlock or serialization failure
+app.config["BOOKING_RETRIES"] = int(os.environ.get("BOOKING_RETRIES", 3))
 
 
 # Define metadata, instantiate db
@@ -37,11 +101,22 @@ metadata = MetaData(naming_convention={
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
 })
 db = SQLAlchemy(metadata=metadata)
-migrate = Migrate(app, db)
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # The hotel search trigram index only exists where pg_trgm does, so it
+    # lives in its migration rather than the models
+    return not (type_ == "index" and name == "ix_hotels_search_trgm")
+
+
+migrate = Migrate(app, db, include_object=include_object)
 db.init_app(app)
 
 # Instantiate REST API
 api = Api(app)
 
+# Instantiate per-request SQL metrics
+sql_metrics = SqlMetrics(app)
+
 # Instantiate CORS
 CORS(app, supports_credentials=True, origins=["http://localhost:3000"])
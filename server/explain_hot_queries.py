@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Fail if a hot query plans a sequential scan over a large table.
+
+Runs EXPLAIN for the queries behind create_bookings, GuestBookings,
+BookingByHotelId, AdminHotel and friends and exits non-zero when a plan
+reads all of bookings, booked_rooms, room_nights, rooms, hotels or guests.
+
+An empty database is first filled with synthetic rows (Core bulk inserts)
+and ANALYZEd so the planner sees realistic sizes; a populated one is only
+read. Defaults to an in-memory SQLite database:
+
+    python explain_hot_queries.py [hotels]
+    DATABASE_URI=postgresql://... python explain_hot_queries.py
+"""
+
+import json
+import os
+import re
+import sys
+from random import Random
+
+os.environ.setdefault("DATABASE_URI", "sqlite://")
+
+from sqlalchemy import event, func, select, text
+
+from app import app, period_start
+from config import db, timedelta
+from models import (
+    Admins, BookedRoom, Bookings, DailyRoomTypeStats, Guests, Hotels, RoomNights,
+    RoomRateCalendars, Rooms, RoomTypes, datetime, rebuild_daily_stats, stay_nights)
+
+BIG_TABLES = {"bookings", "booked_rooms", "room_nights", "rooms", "hotels", "guests",
+              "daily_room_type_stats", "room_rate_calendars"}
+ROOMS_PER_HOTEL = 20
+STAYS_PER_ROOM = 12
+
+
+def seed(hotels):
+    """Bulk insert `hotels` hotels with rooms, guests and non-overlapping stays."""
+    rng = Random(7)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    insert = lambda model, rows: db.session.execute(model.__table__.insert(), rows)
+
+    insert(RoomTypes, [{"id": 1, "type_name": "Standard"}, {"id": 2, "type_name": "Suite"}])
+    insert(Admins, [{"id": i, "name": f"admin{i}", "_password_hash": "x"}
+                    for i in range(1, hotels + 1)])
+    insert(Hotels, [{"id": i, "name": f"Hotel {i}", "address": f"{i} Main St",
+                     "city": f"City {i % 50}", "country": "Kenya",
+                     "email": f"hotel{i}@example.com", "phone": str(i), "admin_id": i}
+                    for i in range(1, hotels + 1)])
+    guests = hotels * 10
+    insert(Guests, [{"id": i, "name": f"guest{i}", "email": f"guest{i}@example.com",
+                     "_password_hash": "x"} for i in range(1, guests + 1)])
+
+    rooms, bookings, booked, nights = [], [], [], []
+    for room_id in range(1, hotels * ROOMS_PER_HOTEL + 1):
+        rooms.append({"id": room_id, "hotel_id": (room_id - 1) // ROOMS_PER_HOTEL + 1,
+                      "room_type_id": rng.randint(1, 2), "room_name": f"R{room_id}",
+                      "price_per_night": rng.randint(50, 500),
+                      "is_available": rng.random() < 0.8})
+        check_in = today - timedelta(days=rng.randint(200, 400))
+        for _ in range(STAYS_PER_ROOM):
+            check_in += timedelta(days=rng.randint(1, 20))
+            check_out = check_in + timedelta(days=rng.randint(1, 7))
+            booking_id = len(bookings) + 1
+            bookings.append({"id": booking_id, "guest_id": rng.randint(1, guests),
+                             "check_in_date": check_in, "check_out_date": check_out,
+                             "status": "Confirmed"})
+            booked.append({"booking_id": booking_id, "room_id": room_id})
+            nights.extend({"room_id": room_id, "night": night, "booking_id": booking_id}
+                          for night in stay_nights(check_in, check_out))
+            check_in = check_out
+    insert(Rooms, rooms)
+    insert(Bookings, bookings)
+    insert(BookedRoom, booked)
+    insert(RoomNights, nights)
+    rebuild_daily_stats(db.session.connection())
+    db.session.commit()
+    db.session.execute(text("ANALYZE"))
+    db.session.commit()
+
+
+def hot_queries():
+    now = datetime.utcnow()
+    later = now + timedelta(days=3)
+    week = period_start(DailyRoomTypeStats.night, "week", db.engine.dialect.name)
+    return {
+        "room_nights conflict probe (create_bookings)":
+            select(RoomNights.room_id).where(RoomNights.matching(
+                [(room_id, night) for room_id in (42, 43)
+                 for night in stay_nights(now, later)])),
+        "room_nights release (apply_booking_changes)":
+            select(RoomNights.room_id).where(RoomNights.booking_id == 42),
+        "GuestBookings":
+            select(Bookings).where(Bookings.guest_id == 42),
+        "BookingByHotelId":
+            select(Bookings).where(Bookings.id.in_(
+                select(BookedRoom.booking_id)
+                .join(Rooms, Rooms.id == BookedRoom.room_id)
+                .where(Rooms.hotel_id == 7))),
+        "AdminHotel":
+            select(Hotels).where(Hotels.admin_id == 7),
+        "RoomsPerHotel":
+            select(Rooms).where(Rooms.hotel_id == 7),
+        "AvailableRoomsPerHotel":
+            select(Rooms).where(Rooms.currently_available == True,
+                                Rooms.is_available == True,
+                                Rooms.hotel_id == 7),
+        "AdminHotelAnalytics":
+            select(week, DailyRoomTypeStats.room_type_id,
+                   func.sum(DailyRoomTypeStats.room_nights))
+            .where(DailyRoomTypeStats.hotel_id == 7,
+                   DailyRoomTypeStats.night.between(now.date() - timedelta(days=90),
+                                                    now.date()))
+            .group_by(week, DailyRoomTypeStats.room_type_id),
+        "Quotes":
+            select(Rooms.id, Rooms.price_per_night,
+                   RoomRateCalendars.start_date, RoomRateCalendars.nightly_cents)
+            .outerjoin(RoomRateCalendars, RoomRateCalendars.room_id == Rooms.id)
+            .where(Rooms.id.in_([3, 41, 97])),
+        "bookings in range":
+            select(Bookings.id).where(Bookings.check_in_date < later,
+                                      Bookings.check_out_date > now),
+    }
+
+
+class _Captured(Exception):
+    pass
+
+
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    raise _Captured(statement, parameters)
+
+
+def explain(connection, stmt):
+    """Return `(plan_lines, scanned_tables)` for a Core statement."""
+    event.listen(connection, "before_cursor_execute", _capture)
+    try:
+        connection.execute(stmt)
+    except _Captured as captured:
+        statement, parameters = captured.args
+    finally:
+        event.remove(connection, "before_cursor_execute", _capture)
+
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        if connection.dialect.name == "postgresql":
+            cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            lines, scanned = [], set()
+            _walk_pg(plan[0]["Plan"], 0, lines, scanned)
+            return lines, scanned
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        lines = [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+    # "SCAN t" is a full table scan; "SCAN t USING ... INDEX" walks a whole
+    # index, which is no better for these lookups.
+    scanned = {m.group(1) for m in map(re.compile(r"^SCAN (\w+)").match, lines) if m}
+    return lines, scanned
+
+
+def _walk_pg(node, depth, lines, scanned):
+    relation = node.get("Relation Name")
+    lines.append("  " * depth + node["Node Type"] + (f" on {relation}" if relation else ""))
+    if node["Node Type"] == "Seq Scan":
+        scanned.add(relation)
+    for child in node.get("Plans", ()):
+        _walk_pg(child, depth + 1, lines, scanned)
+
+
+if __name__ == "__main__":
+    hotels = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with app.app_context():
+        db.create_all()
+        if db.session.query(Bookings.id).first() is None:
+            print(f"Seeding {hotels} hotels, {hotels * ROOMS_PER_HOTEL} rooms ...")
+            seed(hotels)
+
+        connection = db.session.connection()
+        failures = 0
+        for name, stmt in hot_queries().items():
+            lines, scanned = explain(connection, stmt)
+            bad = scanned & BIG_TABLES
+            failures += bool(bad)
+            print(f"{'FAIL' if bad else 'ok':<4}  {name}")
+            for line in lines:
+                print(f"        {line}")
+        db.session.rollback()
+
+    if failures:
+        sys.exit(f"{failures} hot queries fall back to sequential scans")
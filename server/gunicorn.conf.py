@@ -0,0 +1,86 @@
+"""Gunicorn settings; picked up automatically when gunicorn starts in server/.
+
+Environment:
+    PORT                          bind port (default 5000)
+    WEB_CONCURRENCY               worker processes (default 2 * CPUs + 1)
+    GUNICORN_WORKER_CLASS         gthread (default), gevent or sync
+    GUNICORN_THREADS              threads per gthread worker (default 4)
+    GUNICORN_CONNECTIONS          greenlets per gevent worker, or open
+                                  keep-alive connections per gthread worker
+                                  (default 1000)
+    GUNICORN_MAX_REQUESTS         recycle a worker after this many requests
+                                  (default 1000, 0 disables)
+    GUNICORN_MAX_REQUESTS_JITTER  random extra requests so workers don't all
+                                  restart together (default 100)
+    GUNICORN_TIMEOUT              seconds before a silent worker is killed
+                                  (default 30)
+
+The app is imported once in the master (preload_app) and forked, so workers
+share the imported code copy-on-write and start instantly. Each worker drops
+the inherited connection pool in post_fork and opens its own.
+
+WEB_CONCURRENCY and GUNICORN_THREADS are exported before the app loads so
+config.engine_options() sizes each worker's pool to its concurrency. With
+more than one worker, point IDENTITY_CACHE_URL (or CATALOG_CACHE_URL) at
+Redis; otherwise session checks are not cached and a warning is logged.
+
+Tested combinations: 1 vCPU container shared with the load generator,
+SQLite, 200 hotels / 4000 rooms, `python load_test.py URL 32 20` (32
+keep-alive clients for 20 s reading hotel lists, rooms per hotel and
+available rooms, every 20th request a guest login at BCRYPT_LOG_ROUNDS=10):
+
+    worker class  workers x concurrency   req/s   p50 ms   p95 ms   p99 ms
+    sync          1 x 1                   116      117     1517     2802
+    sync          3 x 1                   114      140     1242     2311
+    gthread       3 x 4                   109       57     1385     4262
+    gthread       2 x 8                   127      122     1164     2888
+    gevent        3 x 100                 121       19     1063     1330
+
+With one CPU, throughput is CPU-bound whatever the model; what changes is
+how requests queue behind slow ones. A sync worker blocks on every login,
+while threaded and gevent workers keep serving reads. On more cores, scale
+WEB_CONCURRENCY with the CPU count and rerun load_test.py.
+
+gthread is the default because it patches nothing. bcrypt runs on its own
+thread pool (see passwords.py) and releases the GIL. gevent had the best
+latency here. psycogreen makes PostgreSQL queries yield under it. It
+patches the standard library before the app is preloaded;
+passwords.HashingPool sees that and hashes on gevent's native thread pool,
+so a login only parks its own greenlet.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_connections = int(os.environ.get("GUNICORN_CONNECTIONS", 1000))
+
+preload_app = True
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+keepalive = 5
+
+if worker_class == "sync":
+    threads = 1
+elif worker_class == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+    threads = worker_connections
+
+os.environ["WEB_CONCURRENCY"] = str(workers)
+os.environ["GUNICORN_THREADS"] = str(threads)
+
+
+def post_fork(server, worker):
+    from config import app, db
+    with app.app_context():
+        # Connections opened in the master must not be shared across forks
+        db.engine.dispose(close=False)
@@ -0,0 +1,283 @@
+import heapq
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+FIELDS = ("name", "city", "country", "address")
+# A match in the name counts for more than one in the address
+WEIGHTS = (1.0, 0.8, 0.7, 0.5)
+
+# Same default as pg_trgm.similarity_threshold
+SIMILARITY_THRESHOLD = 0.3
+# Vocabulary words a prefix may expand to; the most used ones win
+MAX_EXPANSIONS = 50
+MAX_QUERY_WORDS = 8
+
+# Seconds before the index checks the database for hotels changed by other
+# workers. Changes made through this worker are applied on commit.
+SEARCH_INDEX_TTL = float(os.environ.get("HOTEL_SEARCH_TTL", 60))
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def words(text):
+    """Lowercase, accent-free words of `text`."""
+    if not text:
+        return []
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD.sub(" ", text).split()
+
+
+def trigrams(word):
+    """pg_trgm-style trigrams: two spaces before the word, one after."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class HotelSearchIndex:
+    """In-process inverted index over hotel name, city, country and address.
+
+    Each field maps its words to posting arrays of hotel ids. The words
+    themselves are kept sorted, for prefix lookups by bisect, and in a
+    trigram index, for typo-tolerant lookups by trigram similarity.
+
+    Each query word is expanded to the vocabulary words it matches (exact,
+    prefix for the word being typed, or similar), and every query word must
+    match. Candidates come from the postings of the most selective query word
+    and are checked against the rest, so cost follows the rarest word, not
+    the number of hotels. One-word queries walk their matches from the best
+    score down and stop once the page is full.
+
+    The index is loaded on first use through `loader(since)`, which returns
+    `(rows, deleted)`: `(id, name, city, country, address, updated_at)` rows
+    changed at or after `since` (all of them when None) and the ids of
+    hotels deleted since then. After `ttl` seconds it drops the deleted
+    hotels and re-indexes the changed ones, in that order, so an id deleted
+    and reused is indexed as its new hotel.
+    """
+
+    def __init__(self, loader, ttl=SEARCH_INDEX_TTL):
+        self.loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.docs = {}        # hotel_id -> (name, city, country, address)
+        self.doc_words = {}   # hotel_id -> per-field tuples of words
+        self.postings = tuple({} for _ in FIELDS)  # per field: word -> hotel ids
+        self.vocab = []       # sorted words
+        self.grams = {}       # trigram -> set of words
+        self.seen_until = None
+        self.loaded_at = None
+
+    # ------------------------------------------------------------ upkeep
+
+    def _words_of(self, fields):
+        return tuple(tuple(dict.fromkeys(sys.intern(w) for w in words(text)))
+                     for text in fields)
+
+    def _frequency(self, word):
+        return sum(len(postings.get(word, ())) for postings in self.postings)
+
+    def _add_word(self, word):
+        insort(self.vocab, word)
+        for gram in trigrams(word):
+            self.grams.setdefault(gram, set()).add(word)
+
+    def _build(self, rows):
+        self._reset()
+        postings = tuple({} for _ in FIELDS)
+        for hotel_id, *fields, updated_at in rows:
+            fields = tuple(fields)
+            self.docs[hotel_id] = fields
+            self.doc_words[hotel_id] = field_words = self._words_of(fields)
+            for field, ws in enumerate(field_words):
+                for word in ws:
+                    postings[field].setdefault(word, []).append(hotel_id)
+            self._see(updated_at)
+        self.postings = tuple({word: array("i", ids) for word, ids in field.items()}
+                              for field in postings)
+        self.vocab = sorted(set().union(*postings))
+        for word in self.vocab:
+            for gram in trigrams(word):
+                self.grams.setdefault(gram, set()).add(word)
+
+    def _see(self, updated_at):
+        if updated_at is not None and (self.seen_until is None or updated_at > self.seen_until):
+            self.seen_until = updated_at
+
+    def _add(self, hotel_id, fields):
+        self._remove(hotel_id)
+        self.docs[hotel_id] = fields
+        self.doc_words[hotel_id] = field_words = self._words_of(fields)
+        for field, ws in enumerate(field_words):
+            for word in ws:
+                if not self._frequency(word):
+                    self._add_word(word)
+                self.postings[field].setdefault(word, array("i")).append(hotel_id)
+
+    def _remove(self, hotel_id):
+        if self.docs.pop(hotel_id, None) is None:
+            return
+        for field, ws in enumerate(self.doc_words.pop(hotel_id)):
+            for word in ws:
+                ids = self.postings[field][word]
+                ids.remove(hotel_id)
+                if ids:
+                    continue
+                del self.postings[field][word]
+                if self._frequency(word):
+                    continue
+                del self.vocab[bisect_left(self.vocab, word)]
+                for gram in trigrams(word):
+                    self.grams[gram].discard(word)
+                    if not self.grams[gram]:
+                        del self.grams[gram]
+
+    def add(self, hotel_id, fields):
+        """Index or re-index one hotel; a no-op until the index is loaded."""
+        with self._lock:
+            if self.loaded_at is not None:
+                self._add(hotel_id, tuple(fields))
+
+    def remove(self, hotel_id):
+        with self._lock:
+            if self.loaded_at is not None:
+                self._remove(hotel_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._reset()
+
+    def refresh(self):
+        """Load the index, or catch up with changes if it is older than ttl."""
+        with self._lock:
+            if self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl:
+                return
+            since = self.seen_until if self.loaded_at is not None else None
+            rows, deleted = self.loader(since)
+            if since is None:
+                self._build(rows)
+            else:
+                for hotel_id in deleted:
+                    self._remove(hotel_id)
+                for hotel_id, *fields, updated_at in rows:
+                    self._add(hotel_id, tuple(fields))
+                    self._see(updated_at)
+            self.loaded_at = time.monotonic()
+
+    # ------------------------------------------------------------ queries
+
+    def _matches(self, word, prefix):
+        """Vocabulary words matching one query word, with a 0-1 score."""
+        matches = {}
+        if prefix:
+            lo = bisect_left(self.vocab, word)
+            hi = bisect_left(self.vocab, word + "\uffff", lo)
+            candidates = self.vocab[lo:hi]
+            if len(candidates) > MAX_EXPANSIONS:
+                candidates = heapq.nlargest(MAX_EXPANSIONS, candidates, key=self._frequency)
+            for candidate in candidates:
+                matches[candidate] = 0.6 + 0.4 * len(word) / len(candidate)
+
+        wanted = trigrams(word)
+        shared = Counter()
+        for gram in wanted:
+            shared.update(self.grams.get(gram, ()))
+        for candidate, count in shared.items():
+            similarity = count / (len(wanted) + len(trigrams(candidate)) - count)
+            if similarity >= SIMILARITY_THRESHOLD and similarity > matches.get(candidate, 0):
+                matches[candidate] = similarity
+        return matches
+
+    def _groups(self, matches):
+        """`(score, [hotel id arrays])` per distinct score, best first."""
+        groups = {}
+        for word, similarity in matches.items():
+            for field, postings in enumerate(self.postings):
+                if word in postings:
+                    score = round(WEIGHTS[field] * similarity, 4)
+                    groups.setdefault(score, []).append(postings[word])
+        return sorted(groups.items(), reverse=True)
+
+    def _one_word_page(self, matches, limit, after):
+        # A hotel scores its best match, so the first group it shows up in
+        # is its rank and later groups can skip it
+        page, seen = [], set()
+        for score, id_arrays in self._groups(matches):
+            ids = set().union(*id_arrays) - seen
+            seen |= ids
+            if after is not None:
+                if score > after[0]:
+                    continue
+                if score == after[0]:
+                    ids = {hotel_id for hotel_id in ids if hotel_id > after[1]}
+            page.extend((score, hotel_id)
+                        for hotel_id in heapq.nsmallest(limit - len(page), ids))
+            if len(page) >= limit:
+                break
+        return page
+
+    def search(self, query, limit=20, after=None):
+        """Hotels matching `query` as `(score, hotel_id, fields)`, best first.
+
+        At most `limit` of them, and only those after `after`, the
+        `(score, hotel_id)` of the last hit on a previous page.
+        The last query word is treated as a prefix unless the query ends
+        with a space.
+        """
+        self.refresh()
+        query_words = words(query)[:MAX_QUERY_WORDS]
+        if not query_words:
+            return []
+        typing = not query[-1:].isspace()
+
+        with self._lock:
+            matched = [self._matches(word, typing and i == len(query_words) - 1)
+                       for i, word in enumerate(query_words)]
+            if not all(matched):
+                return []
+            if len(matched) == 1:
+                page = self._one_word_page(matched[0], limit, after)
+                return [(s, h, self.docs[h]) for s, h in page]
+            matched.sort(key=lambda m: sum(map(self._frequency, m)))
+
+            scores = {}
+            for word, similarity in matched[0].items():
+                for field, postings in enumerate(self.postings):
+                    score = WEIGHTS[field] * similarity
+                    for hotel_id in postings.get(word, ()):
+                        if score > scores.get(hotel_id, 0):
+                            scores[hotel_id] = score
+
+            for matches in matched[1:]:
+                for hotel_id, score in list(scores.items()):
+                    best = 0
+                    for field, ws in enumerate(self.doc_words[hotel_id]):
+                        for word in ws:
+                            similarity = matches.get(word)
+                            if similarity and WEIGHTS[field] * similarity > best:
+                                best = WEIGHTS[field] * similarity
+                    if best:
+                        scores[hotel_id] = score + best
+                    else:
+                        del scores[hotel_id]
+
+            ranked = ((round(score / len(query_words), 4), hotel_id)
+                      for hotel_id, score in scores.items())
+            if after is not None:
+                after_score, after_id = after
+                ranked = ((s, h) for s, h in ranked
+                          if s < after_score or (s == after_score and h > after_id))
+            page = heapq.nsmallest(limit, ranked, key=lambda hit: (-hit[0], hit[1]))
+            return [(s, h, self.docs[h]) for s, h in page]
@@ -0,0 +1,188 @@
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection.
+
+    The wait includes opening a new connection when the pool is below its
+    overflow limit, which is time the request spends blocked all the same.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            timed_out = True
+            raise
+        finally:
+            metrics = current_app.extensions.get("sql_metrics") if has_app_context() else None
+            if metrics is not None:
+                metrics.record_pool_wait(time.perf_counter() - start, timed_out)
+
+
+class SqlMetrics:
+    """Per-request SQL statement counts and timings.
+
+    Every statement run through any engine during a request is counted on
+    `flask.g`. When the request ends the totals are sent back in a
+    `Server-Timing` header and folded into per-endpoint aggregates, which
+    `snapshot()` returns for the internal metrics endpoint. Connection pool
+    checkout waits reported by TimedQueuePool are kept in `pool_snapshot()`.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._pool = self._empty_pool_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        event.listen(Engine, "before_cursor_execute", self._before_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_execute)
+        event.listen(Engine, "handle_error", self._execute_failed)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.extensions["sql_metrics"] = self
+
+    # engine events
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        if not has_request_context() or "sql_count" not in g:
+            return
+        g.sql_count += 1
+        g.sql_time += elapsed
+        if elapsed > g.sql_slowest[0]:
+            g.sql_slowest = (elapsed, statement)
+
+    def _execute_failed(self, context):
+        starts = context.connection.info.get("query_start") if context.connection else None
+        if starts:
+            starts.pop()
+
+    # pool events
+    @staticmethod
+    def _empty_pool_stats():
+        return {"checkouts": 0, "timeouts": 0, "wait_ms": 0.0, "max_wait_ms": 0.0}
+
+    def record_pool_wait(self, elapsed, timed_out=False):
+        if has_request_context() and "pool_wait" in g:
+            g.pool_wait += elapsed
+        with self._lock:
+            self._pool["checkouts"] += 1
+            self._pool["timeouts"] += timed_out
+            self._pool["wait_ms"] += elapsed * 1000
+            self._pool["max_wait_ms"] = max(self._pool["max_wait_ms"], elapsed * 1000)
+
+    # request hooks
+    def _start_request(self):
+        g.request_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+        g.sql_slowest = (0.0, None)
+        g.pool_wait = 0.0
+
+    def _finish_request(self, response):
+        if "sql_count" not in g:
+            return response
+        total = time.perf_counter() - g.request_start
+        slowest, statement = g.sql_slowest
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={g.sql_time * 1000:.2f};desc="{g.sql_count} queries", '
+            f'db-slowest;dur={slowest * 1000:.2f}, '
+            f'db-wait;dur={g.pool_wait * 1000:.2f}, '
+            f'app;dur={total * 1000:.2f}'
+        )
+        self._record(request.endpoint or request.path, total, slowest, statement)
+        return response
+
+    def _record(self, endpoint, total, slowest, statement):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {
+                "requests": 0,
+                "queries": 0,
+                "max_queries": 0,
+                "db_time_ms": 0.0,
+                "total_time_ms": 0.0,
+                "slowest_ms": 0.0,
+                "slowest_statement": None,
+            })
+            stats["requests"] += 1
+            stats["queries"] += g.sql_count
+            stats["max_queries"] = max(stats["max_queries"], g.sql_count)
+            stats["db_time_ms"] += g.sql_time * 1000
+            stats["total_time_ms"] += total * 1000
+            if slowest * 1000 > stats["slowest_ms"]:
+                stats["slowest_ms"] = slowest * 1000
+                stats["slowest_statement"] = statement[:500]
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: dict(stats) for endpoint, stats in self._endpoints.items()}
+
+    def pool_snapshot(self, pool=None):
+        with self._lock:
+            stats = dict(self._pool)
+        if stats["checkouts"]:
+            stats["avg_wait_ms"] = stats["wait_ms"] / stats["checkouts"]
+        if isinstance(pool, QueuePool):
+            stats.update(size=pool.size(), checked_out=pool.checkedout(),
+                         overflow=pool.overflow())
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._pool = self._empty_pool_stats()
+
+
+def query_budget(**limits):
+    """Class decorator declaring the most SQL statements each method may run.
+
+        @query_budget(get=2, post=6)
+        class GuestBookings(Resource): ...
+
+    Budgets are only enforced when the app is in testing mode or
+    `ENFORCE_QUERY_BUDGETS` is set, where going over raises
+    QueryBudgetExceeded.
+    """
+    def budgeted(method, limit):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            config = current_app.config
+            if not (current_app.testing or config.get("ENFORCE_QUERY_BUDGETS")):
+                return method(*args, **kwargs)
+            before = g.get("sql_count", 0)
+            result = method(*args, **kwargs)
+            used = g.get("sql_count", 0) - before
+            if used > limit:
+                raise QueryBudgetExceeded(
+                    f"{request.endpoint} {method.__name__.upper()} ran {used} "
+                    f"queries, budget is {limit}"
+                )
+            return result
+        return wrapper
+
+    def decorate(cls):
+        for name, limit in limits.items():
+            setattr(cls, name, budgeted(getattr(cls, name), limit))
+        return cls
+    return decorate
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Closed-loop HTTP load test against a running server.
+
+Each client keeps one keep-alive connection and sends a mix of catalog reads
+(hotel list, rooms per hotel, available rooms), with every Nth request a
+guest login so bcrypt cost shows up in the tail:
+
+    python load_test.py http://127.0.0.1:5000 [clients] [seconds] \\
+        [--login-every N] [--email E --password P]
+
+Prints requests/s and p50/p95/p99 latency. Hotel ids are taken from
+/api/hotels, so point it at a seeded database.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * p), len(sorted_values) - 1)]
+
+
+class Client(threading.Thread):
+    def __init__(self, url, deadline, paths, login, login_every, seed):
+        super().__init__(daemon=True)
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.deadline = deadline
+        self.paths = paths
+        self.login = login
+        self.login_every = login_every
+        self.rng = random.Random(seed)
+        self.latencies = []
+        self.errors = 0
+
+    def request(self, conn, method, path, body=None):
+        headers = {"Content-Type": "application/json"} if body else {}
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+
+    def run(self):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        count = 0
+        while time.monotonic() < self.deadline:
+            count += 1
+            if self.login and self.login_every and count % self.login_every == 0:
+                method, path, body = "POST", "/api/guests/login", self.login
+            else:
+                method, path, body = "GET", self.rng.choice(self.paths), None
+            start = time.perf_counter()
+            try:
+                status = self.request(conn, method, path, body)
+            except (OSError, http.client.HTTPException):
+                # A worker recycled by max_requests closes its keep-alive
+                # connections; retry once on a new one like browsers do.
+                conn.close()
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+                try:
+                    status = self.request(conn, method, path, body)
+                except (OSError, http.client.HTTPException):
+                    conn.close()
+                    conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+                    status = 599
+            self.latencies.append(time.perf_counter() - start)
+            if status >= 500:
+                self.errors += 1
+        conn.close()
+
+
+def build_paths(url, hotel_sample=20):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+    conn.request("GET", "/api/hotels?limit=100")
+    hotels = json.loads(conn.getresponse().read())["results"]
+    conn.close()
+    ids = [h["id"] for h in hotels[:hotel_sample]]
+    paths = ["/api/hotels?limit=20"]
+    for hotel_id in ids:
+        paths += [f"/api/hotels/{hotel_id}/rooms", f"/api/rooms/{hotel_id}/available"]
+    return paths
+
+
+def run(url, clients, seconds, login_every=20, email=None, password=None):
+    paths = build_paths(url)
+    login = json.dumps({"email": email, "password": password}) if email else None
+    deadline = time.monotonic() + seconds
+    threads = [Client(url, deadline, paths, login, login_every, seed=i)
+               for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(l for t in threads for l in t.latencies)
+    return {
+        "requests": len(latencies),
+        "errors": sum(t.errors for t in threads),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("url")
+    parser.add_argument("clients", type=int, nargs="?", default=32)
+    parser.add_argument("seconds", type=float, nargs="?", default=20)
+    parser.add_argument("--login-every", type=int, default=20)
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    result = run(args.url, args.clients, args.seconds,
+                 args.login_every, args.email, args.password)
+    print(f"{result['requests']} requests, {result['errors']} errors, "
+          f"{result['rps']:.1f} req/s, p50 {result['p50_ms']:.1f} ms, "
+          f"p95 {result['p95_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms")
@@ -0,0 +1,32 @@
+"""Add hotel_deletions
+
+Revision ID: 3e9a7c5d2f16
+Revises: f2a6d8c04b91
+Create Date: 2026-10-18 23:41:12.508316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e9a7c5d2f16'
+down_revision = 'f2a6d8c04b91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'hotel_deletions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('hotel_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_hotel_deletions_deleted_at', 'hotel_deletions', ['deleted_at'])
+
+
+def downgrade():
+    op.drop_index('ix_hotel_deletions_deleted_at', table_name='hotel_deletions')
+    op.drop_table('hotel_deletions')
@@ -0,0 +1,32 @@
+"""Add room_nights inventory table
+
+Revision ID: 5c1e8a7d2b4f
+Revises: 197f9a0a06d3
+Create Date: 2026-10-18 09:12:40.118236
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e8a7d2b4f'
+down_revision = '197f9a0a06d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('room_nights',
+    sa.Column('room_id', sa.Integer(), nullable=False),
+    sa.Column('night', sa.Date(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], name=op.f('fk_room_nights_booking_id_bookings')),
+    sa.ForeignKeyConstraint(['room_id'], ['rooms.id'], name=op.f('fk_room_nights_room_id_rooms')),
+    sa.PrimaryKeyConstraint('room_id', 'night')
+    )
+    # Run `flask backfill-room-nights` after upgrading to fill existing bookings.
+
+
+def downgrade():
+    op.drop_table('room_nights')
@@ -0,0 +1,34 @@
+"""Add timestamps to catalog tables
+
+Revision ID: 8d3f0b6c9e21
+Revises: 5c1e8a7d2b4f
+Create Date: 2026-10-18 11:40:05.310927
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3f0b6c9e21'
+down_revision = '5c1e8a7d2b4f'
+branch_labels = None
+depends_on = None
+
+TABLES = ('rooms', 'room_types', 'amenities', 'hotel_amenities')
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=False,
+                                          server_default=sa.func.now()))
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True,
+                                          server_default=sa.func.now()))
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
+            batch_op.drop_column('created_at')
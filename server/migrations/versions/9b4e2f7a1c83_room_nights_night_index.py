@@ -0,0 +1,24 @@
+"""Index room_nights by night
+
+Revision ID: 9b4e2f7a1c83
+Revises: 3e9a7c5d2f16
+Create Date: 2026-10-19 10:12:44.203517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b4e2f7a1c83'
+down_revision = '3e9a7c5d2f16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_room_nights_night', 'room_nights', ['night'])
+
+
+def downgrade():
+    op.drop_index('ix_room_nights_night', table_name='room_nights')
@@ -0,0 +1,38 @@
+"""Cascade room_nights deletes from bookings and rooms
+
+Revision ID: a4b7c2e19f03
+Revises: 8d3f0b6c9e21
+Create Date: 2026-10-18 14:02:51.774310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4b7c2e19f03'
+down_revision = '8d3f0b6c9e21'
+branch_labels = None
+depends_on = None
+
+NAMING_CONVENTION = {
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}
+
+
+def _recreate_foreign_keys(ondelete):
+    with op.batch_alter_table('room_nights', naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(op.f('fk_room_nights_booking_id_bookings'), type_='foreignkey')
+        batch_op.drop_constraint(op.f('fk_room_nights_room_id_rooms'), type_='foreignkey')
+        batch_op.create_foreign_key(op.f('fk_room_nights_booking_id_bookings'),
+                                    'bookings', ['booking_id'], ['id'], ondelete=ondelete)
+        batch_op.create_foreign_key(op.f('fk_room_nights_room_id_rooms'),
+                                    'rooms', ['room_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _recreate_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _recreate_foreign_keys(None)
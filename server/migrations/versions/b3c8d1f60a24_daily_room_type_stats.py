@@ -0,0 +1,54 @@
+"""Add booked_rooms.rate and the daily_room_type_stats rollup
+
+Revision ID: b3c8d1f60a24
+Revises: e61f4d8a3b57
+Create Date: 2026-10-18 19:42:05.318760
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3c8d1f60a24'
+down_revision = 'e61f4d8a3b57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('booked_rooms', sa.Column('rate', sa.Numeric(8, 2), nullable=True))
+    op.execute(
+        "UPDATE booked_rooms SET rate = "
+        "(SELECT price_per_night FROM rooms WHERE rooms.id = booked_rooms.room_id)"
+    )
+
+    op.create_table(
+        'daily_room_type_stats',
+        sa.Column('hotel_id', sa.Integer(), nullable=False),
+        sa.Column('night', sa.Date(), nullable=False),
+        sa.Column('room_type_id', sa.Integer(), nullable=False),
+        sa.Column('room_nights', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(12, 2), nullable=False),
+        sa.PrimaryKeyConstraint('hotel_id', 'night', 'room_type_id'),
+    )
+    op.execute(
+        "INSERT INTO daily_room_type_stats "
+        "(hotel_id, room_type_id, night, room_nights, revenue) "
+        "SELECT rooms.hotel_id, COALESCE(rooms.room_type_id, 0), room_nights.night, "
+        "COUNT(*), SUM(COALESCE(booked_rooms.rate, rooms.price_per_night)) "
+        "FROM room_nights "
+        "JOIN rooms ON rooms.id = room_nights.room_id "
+        "JOIN booked_rooms ON booked_rooms.booking_id = room_nights.booking_id "
+        "AND booked_rooms.room_id = room_nights.room_id "
+        "JOIN bookings ON bookings.id = room_nights.booking_id "
+        "AND bookings.status = 'Confirmed' "
+        "WHERE rooms.hotel_id IS NOT NULL "
+        "GROUP BY rooms.hotel_id, COALESCE(rooms.room_type_id, 0), room_nights.night"
+    )
+
+
+def downgrade():
+    op.drop_table('daily_room_type_stats')
+    with op.batch_alter_table('booked_rooms') as batch_op:
+        batch_op.drop_column('rate')
@@ -0,0 +1,33 @@
+"""Add room_rate_calendars
+
+Revision ID: c7e2a95d1f48
+Revises: b3c8d1f60a24
+Create Date: 2026-10-18 21:06:37.104512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a95d1f48'
+down_revision = 'b3c8d1f60a24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'room_rate_calendars',
+        sa.Column('room_id', sa.Integer(), nullable=False),
+        sa.Column('rules', sa.JSON(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('nightly_cents', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['room_id'], ['rooms.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('room_id'),
+    )
+
+
+def downgrade():
+    op.drop_table('room_rate_calendars')
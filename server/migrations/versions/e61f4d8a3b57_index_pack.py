@@ -0,0 +1,43 @@
+"""Add secondary indexes for the hot read paths
+
+Revision ID: e61f4d8a3b57
+Revises: a4b7c2e19f03
+Create Date: 2026-10-18 15:27:13.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e61f4d8a3b57'
+down_revision = 'a4b7c2e19f03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_hotels_admin_id', 'hotels', ['admin_id'])
+    op.create_index('ix_rooms_hotel_id', 'rooms', ['hotel_id'])
+    op.create_index('ix_rooms_hotel_id_available', 'rooms', ['hotel_id'],
+                    postgresql_where=sa.text('is_available'),
+                    sqlite_where=sa.text('is_available'))
+    op.create_index('ix_rooms_price_per_night_id', 'rooms', ['price_per_night', 'id'])
+    op.create_index('ix_bookings_guest_id_check_in_date', 'bookings',
+                    ['guest_id', 'check_in_date'])
+    op.create_index('ix_bookings_check_out_date_check_in_date', 'bookings',
+                    ['check_out_date', 'check_in_date'])
+    op.create_index('ix_booked_rooms_room_id_booking_id', 'booked_rooms',
+                    ['room_id', 'booking_id'])
+    op.create_index('ix_room_nights_booking_id', 'room_nights', ['booking_id'])
+
+
+def downgrade():
+    op.drop_index('ix_room_nights_booking_id', table_name='room_nights')
+    op.drop_index('ix_booked_rooms_room_id_booking_id', table_name='booked_rooms')
+    op.drop_index('ix_bookings_check_out_date_check_in_date', table_name='bookings')
+    op.drop_index('ix_bookings_guest_id_check_in_date', table_name='bookings')
+    op.drop_index('ix_rooms_price_per_night_id', table_name='rooms')
+    op.drop_index('ix_rooms_hotel_id_available', table_name='rooms')
+    op.drop_index('ix_rooms_hotel_id', table_name='rooms')
+    op.drop_index('ix_hotels_admin_id', table_name='hotels')
@@ -0,0 +1,43 @@
+"""Add the pg_trgm index for hotel search
+
+Revision ID: f2a6d8c04b91
+Revises: c7e2a95d1f48
+Create Date: 2026-10-18 22:14:52.630187
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6d8c04b91'
+down_revision = 'c7e2a95d1f48'
+branch_labels = None
+depends_on = None
+
+DOCUMENT = (
+    "lower(coalesce(name, '') || ' ' || coalesce(city, '') || ' ' "
+    "|| coalesce(country, '') || ' ' || coalesce(address, ''))"
+)
+
+
+def upgrade():
+    # PostgreSQL only, and only where pg_trgm can be installed; everywhere
+    # else hotel search uses the in-process index
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(f"""
+        DO $$
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            CREATE INDEX IF NOT EXISTS ix_hotels_search_trgm ON hotels
+                USING gin (({DOCUMENT}) gin_trgm_ops);
+        EXCEPTION WHEN insufficient_privilege OR undefined_file THEN
+            RAISE NOTICE 'pg_trgm unavailable, hotel search will use the in-process index';
+        END $$;
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("DROP INDEX IF EXISTS ix_hotels_search_trgm")
@@ -1,9 +1,20 @@
+import os
+from collections import defaultdict
+from decimal import Decimal
+
 from sqlalchemy_serializer import SerializerMixin
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.hybrid import hybrid_property
-from config import db, bcrypt, datetime, event
+from config import app, db, datetime, event, timedelta
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy import and_
+from sqlalchemy import and_, func, inspect, or_, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, object_session
+from availability import RoomNightIndex
+from cache import LRUCache, ReadThroughCache, make_backend
+from hotel_search import FIELDS as SEARCH_FIELDS, HotelSearchIndex
+from passwords import hash_password, needs_rehash, verify_password
 
 
 class TimestampMixin:
@@ -34,11 +45,14 @@ class Guests(db.Model, SerializerMixin, TimestampMixin):
 
     @password_hash.setter
     def password_hash(self, password):
-        password_hash = bcrypt.generate_password_hash(password.encode('utf-8'))
-        self._password_hash = password_hash.decode('utf-8')
+        self._password_hash = hash_password(password)
 
     def authenticate(self, password):
-        return bcrypt.check_password_hash(self._password_hash, password.encode('utf-8'))
+        if not verify_password(self._password_hash, password):
+            return False
+        if needs_rehash(self._password_hash):
+            self.password_hash = password
+        return True
 
     # serialization rules
     serialize_rules = ('-bookings.guest', '-_password_hash',)
@@ -56,6 +70,10 @@ class Hotels(db.Model, SerializerMixin, TimestampMixin):
     phone = db.Column(db.String, nullable=False, unique=True)
     admin_id = db.Column(db.Integer,  db.ForeignKey('admins.id'))
 
+    __table_args__ = (
+        db.Index('ix_hotels_admin_id', 'admin_id'),
+    )
+
     # relationships
     admin = db.relationship('Admins', back_populates='hotel')
     rooms = db.relationship('Rooms', back_populates='hotel',
@@ -92,16 +110,19 @@ class Admins(db.Model, SerializerMixin, TimestampMixin):
 
     @password_hash.setter
     def password_hash(self, password):
-        password_hash = bcrypt.generate_password_hash(password.encode('utf-8'))
-        self._password_hash = password_hash.decode('utf-8')
+        self._password_hash = hash_password(password)
 
     def authenticate(self, password):
-        return bcrypt.check_password_hash(self._password_hash, password.encode('utf-8'))
+        if not verify_password(self._password_hash, password):
+            return False
+        if needs_rehash(self._password_hash):
+            self.password_hash = password
+        return True
 
     serialize_rules = ('-hotel.admin', '-_password_hash',)
 
 
-class Rooms(db.Model, SerializerMixin):
+class Rooms(db.Model, SerializerMixin, TimestampMixin):
     __tablename__ = 'rooms'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -111,46 +132,51 @@ class Rooms(db.Model, SerializerMixin):
     price_per_night = db.Column(db.Numeric(6, 2), nullable=False)
     is_available = db.Column(db.Boolean, default=True)
 
+    __table_args__ = (
+        db.Index('ix_rooms_hotel_id', 'hotel_id'),
+        # AvailableRoomsPerHotel only ever wants the available ones
+        db.Index('ix_rooms_hotel_id_available', 'hotel_id',
+                 postgresql_where=db.text('is_available'),
+                 sqlite_where=db.text('is_available')),
+        # SearchRooms keyset pagination
+        db.Index('ix_rooms_price_per_night_id', 'price_per_night', 'id'),
+    )
+
     # relationships
     hotel = db.relationship('Hotels', back_populates='rooms')
     room_type = db.relationship('RoomTypes', back_populates='rooms')
     booked_rooms = db.relationship('BookedRoom', back_populates='room',
                                    cascade="all, delete-orphan")
+    rate_calendar = db.relationship('RoomRateCalendars', uselist=False,
+                                    cascade="all, delete-orphan")
 
     serialize_rules = (
         '-hotel.rooms',
         '-room_type.rooms',
         '-booked_rooms.room',
+        '-rate_calendar',
     )
 
     # association proxy
     bookings = association_proxy('booked_rooms', 'booking')
 
+    # Free tonight: no room_nights row for today's date. Loaded rooms ask the
+    # in-process room_nights_index, so serializing many rooms adds no queries.
     @hybrid_property
     def currently_available(self):
-        from datetime import datetime
-        now = datetime.utcnow()
-        active_booking = any(
-            b.check_in_date <= now < b.check_out_date
-            for b in self.bookings
-        )
-        return not active_booking
+        if self.id is None:
+            return True
+        return not room_nights_index.is_booked(self.id, datetime.utcnow().date())
 
     @currently_available.expression
     def currently_available(cls):
-        from datetime import datetime
-        now = datetime.utcnow()
         return ~db.exists().where(
-            and_(
-                BookedRoom.room_id == cls.id,
-                Bookings.id == BookedRoom.booking_id,
-                Bookings.check_in_date <= now,
-                Bookings.check_out_date > now,
-            )
+            RoomNights.room_id == cls.id,
+            RoomNights.night == datetime.utcnow().date(),
         )
 
 
-class RoomTypes(db.Model, SerializerMixin):
+class RoomTypes(db.Model, SerializerMixin, TimestampMixin):
     __tablename__ = 'room_types'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -172,6 +198,14 @@ class Bookings(db.Model, SerializerMixin):
     check_out_date = db.Column(db.DateTime, nullable=False)
     status = db.Column(db.String, default='Pending') 
 
+    __table_args__ = (
+        db.Index('ix_bookings_guest_id_check_in_date', 'guest_id', 'check_in_date'),
+        # Overlap and "current stay" filters are check_out > x AND check_in < y;
+        # past stays are the bulk of the table, so check_out leads.
+        db.Index('ix_bookings_check_out_date_check_in_date',
+                 'check_out_date', 'check_in_date'),
+    )
+
     guest = db.relationship('Guests', back_populates='bookings')
     booked_rooms = db.relationship('BookedRoom', back_populates='booking',
                                    cascade="all, delete-orphan")
@@ -189,35 +223,523 @@ class BookedRoom(db.Model, SerializerMixin):
 
     booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), primary_key=True)
     room_id = db.Column(db.Integer, db.ForeignKey('rooms.id'), primary_key=True)
+    # Nightly rate when booked, so revenue survives later price changes
+    rate = db.Column(db.Numeric(8, 2))
+
+    # The primary key already covers lookups by booking_id
+    __table_args__ = (
+        db.Index('ix_booked_rooms_room_id_booking_id', 'room_id', 'booking_id'),
+    )
 
     room = db.relationship('Rooms', back_populates='booked_rooms')
     booking = db.relationship('Bookings', back_populates='booked_rooms')
 
     serialize_rules = ('-room.booked_rooms', '-booking.booked_rooms',)
 
+class RoomNights(db.Model):
+    __tablename__ = 'room_nights'
+
+    # Nights are released in bulk once per flush (see apply_booking_changes),
+    # after the bookings or rooms they point at may already be gone.
+    room_id = db.Column(db.Integer, db.ForeignKey('rooms.id', ondelete='CASCADE'),
+                        primary_key=True)
+    night = db.Column(db.Date, primary_key=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id', ondelete='CASCADE'),
+                           nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_room_nights_booking_id', 'booking_id'),
+        # room_nights_index loads the nights from yesterday on
+        db.Index('ix_room_nights_night', 'night'),
+    )
+
+    @classmethod
+    def is_free(cls, room_id, check_in, check_out):
+        # Primary key probe on (room_id, night); no range scan.
+        taken = db.session.query(
+            db.exists().where(
+                cls.room_id == room_id,
+                cls.night.in_(stay_nights(check_in, check_out)),
+            )
+        ).scalar()
+        return not taken
+
+    @classmethod
+    def matching(cls, pairs):
+        """Filter for a set of `(room_id, night)` keys.
+
+        Grouped as `room_id = ? AND night IN (...)` per room so every branch
+        is a primary key lookup; SQLite scans the whole table for a row-value
+        `(room_id, night) IN (...)`.
+        """
+        nights = defaultdict(list)
+        for room_id, night in sorted(pairs):
+            nights[room_id].append(night)
+        return or_(*(and_(cls.room_id == room_id, cls.night.in_(room_nights))
+                     for room_id, room_nights in nights.items()))
+
+
+# Only bookings in this status count as sold in the analytics rollup
+SOLD_STATUS = "Confirmed"
+
+
+class DailyRoomTypeStats(db.Model):
+    """Room-nights sold and revenue per hotel, room type and night.
+
+    A rollup of the room_nights of confirmed bookings, kept current by
+    apply_booking_changes, so hotel analytics read a few rows per day instead
+    of every booking. Rooms without a type are counted under room_type_id 0.
+    Rows that drop to no room-nights are deleted, so the table always holds
+    what rebuild_daily_stats would write.
+    """
+    __tablename__ = 'daily_room_type_stats'
+
+    # Analytics read one hotel over a range of nights
+    hotel_id = db.Column(db.Integer, primary_key=True)
+    night = db.Column(db.Date, primary_key=True)
+    room_type_id = db.Column(db.Integer, primary_key=True)
+    room_nights = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+
+class RoomRateCalendars(db.Model):
+    """Seasonal and weekday rate overrides for one room.
+
+    `rules` is what the admin set (see rates.parse_rules); `nightly_cents`
+    is those rules compiled by rates.compile_calendar into one packed int32
+    per night from `start_date`, 0 where the room's price_per_night applies.
+    Quotes read the packed form only.
+    """
+    __tablename__ = 'room_rate_calendars'
+
+    room_id = db.Column(db.Integer, db.ForeignKey('rooms.id', ondelete='CASCADE'),
+                        primary_key=True)
+    rules = db.Column(db.JSON, nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    nightly_cents = db.Column(db.LargeBinary, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class HotelDeletions(db.Model):
+    """Hotels deleted, so every worker's `hotel_search` index can drop them.
+
+    Written in the deleting transaction by unindex_hotel_for_search; the
+    index's periodic refresh reads the rows newer than what it has seen.
+    """
+    __tablename__ = 'hotel_deletions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    hotel_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_hotel_deletions_deleted_at', 'deleted_at'),
+    )
+
+
+def stay_nights(check_in, check_out):
+    first = check_in.date()
+    count = max((check_out.date() - first).days, 1)
+    return [first + timedelta(days=i) for i in range(count)]
+
+
 #--------------------event listeners----------------------
 
-@event.listens_for(BookedRoom, "after_insert")
-def mark_room_unavailable(mapper, connection, target):
+def _queue_catalog_tags(target, *tags):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("catalog_tags", set()).update(tags)
+
+
+def _room_tags(*hotel_ids):
+    return [tag for hotel_id in hotel_ids if hotel_id is not None
+            for tag in (f"hotel:{hotel_id}", f"rooms:{hotel_id}")]
+
+
+def _insert_room_nights(connection, rows):
+    # Rows go in (room_id, night) order so concurrent flushes take unique-key
+    # locks in the same order. A clash with another booking's night raises
+    # IntegrityError and aborts the whole flush, so double-bookings never
+    # reach the database.
     connection.execute(
-        Rooms.__table__.update()
-        .where(Rooms.id == target.room_id)
-        .values(is_available=False)
+        RoomNights.__table__.insert(),
+        [{"room_id": room_id, "night": night, "booking_id": booking_id}
+         for room_id, night, booking_id in sorted(rows)],
+    )
+
+
+def refresh_room_availability(connection, room_ids=None):
+    """Set rooms.is_available from whether a booking covers the present.
+
+    One set-based UPDATE for `room_ids`, or for every room when None.
+    """
+    stmt = Rooms.__table__.update().values(is_available=Rooms.currently_available)
+    if room_ids is not None:
+        if not room_ids:
+            return
+        stmt = stmt.where(Rooms.id.in_(sorted(room_ids)))
+    connection.execute(stmt)
+
+
+def _daily_stats_upsert(connection):
+    table = DailyRoomTypeStats.__table__
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.hotel_id, table.c.night, table.c.room_type_id],
+        set_={
+            "room_nights": table.c.room_nights + stmt.excluded.room_nights,
+            "revenue": table.c.revenue + stmt.excluded.revenue,
+        },
     )
 
 
+def _add_daily_stats(connection, changes, rooms):
+    """Fold `(room_id, stay, rate, sign, owner)` changes into the rollup.
+
+    `owner` is `(hotel_id, room_type_id)` captured for rooms deleted in the
+    same flush; other rooms are looked up in `rooms`. Increments are added
+    in place by one upsert, so concurrent bookings never overwrite each
+    other's counts; rows a release leaves empty are then deleted.
+    """
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+    for room_id, stay, rate, sign, owner in changes:
+        room = rooms.get(room_id)
+        if room is not None:
+            hotel_id, room_type_id = room.hotel_id, room.room_type_id
+            rate = rate if rate is not None else room.price_per_night
+        elif owner is not None:
+            hotel_id, room_type_id = owner
+        else:
+            continue
+        if hotel_id is None or rate is None:
+            continue
+        for night in stay_nights(*stay):
+            delta = deltas[(hotel_id, room_type_id or 0, night)]
+            delta[0] += sign
+            delta[1] += sign * Decimal(rate)
+
+    # Key order, like room_nights, so concurrent upserts lock rows in turn
+    rows = [
+        {"hotel_id": hotel_id, "room_type_id": room_type_id, "night": night,
+         "room_nights": nights, "revenue": revenue}
+        for (hotel_id, room_type_id, night), (nights, revenue) in sorted(deltas.items())
+        if nights or revenue
+    ]
+    if rows:
+        connection.execute(_daily_stats_upsert(connection), rows)
+    released = [row for row in rows if row["room_nights"] < 0]
+    if released:
+        table = DailyRoomTypeStats.__table__
+        connection.execute(table.delete().where(
+            table.c.room_nights == 0,
+            table.c.hotel_id.in_(sorted({row["hotel_id"] for row in released})),
+            table.c.night.between(min(row["night"] for row in released),
+                                  max(row["night"] for row in released)),
+        ))
+
+
+def rebuild_daily_stats(connection):
+    """Recompute daily_room_type_stats from the room_nights of confirmed bookings.
+
+    For bulk loads that bypass the ORM (seed.py, backfill-room-nights).
+    """
+    table = DailyRoomTypeStats.__table__
+    room_type_id = func.coalesce(Rooms.room_type_id, 0)
+    connection.execute(table.delete())
+    connection.execute(table.insert().from_select(
+        ["hotel_id", "room_type_id", "night", "room_nights", "revenue"],
+        select(
+            Rooms.hotel_id, room_type_id, RoomNights.night, func.count(),
+            func.sum(func.coalesce(BookedRoom.rate, Rooms.price_per_night)),
+        )
+        .select_from(RoomNights)
+        .join(Rooms, Rooms.id == RoomNights.room_id)
+        .join(BookedRoom, and_(BookedRoom.booking_id == RoomNights.booking_id,
+                               BookedRoom.room_id == RoomNights.room_id))
+        .join(Bookings, Bookings.id == RoomNights.booking_id)
+        .where(Rooms.hotel_id.is_not(None), Bookings.status == SOLD_STATUS)
+        .group_by(Rooms.hotel_id, room_type_id, RoomNights.night)
+    ))
+
+
+def _stored_stay(booking):
+    """`((check_in, check_out), status)` last written to the database for `booking`."""
+    attrs = inspect(booking).attrs
+    values = []
+    for attr in (attrs.check_in_date, attrs.check_out_date, attrs.status):
+        history = attr.history
+        values.append(history.deleted[0] if history.deleted else attr.value)
+    check_in, check_out, status = values
+    return (check_in, check_out), status
+
+
+def _select_stays(connection, booking_ids):
+    """`{booking_id: ((check_in, check_out), status)}` as stored."""
+    return {
+        booking_id: ((check_in, check_out), status)
+        for booking_id, check_in, check_out, status in connection.execute(
+            select(Bookings.id, Bookings.check_in_date, Bookings.check_out_date,
+                   Bookings.status)
+            .where(Bookings.id.in_(booking_ids))
+        )
+    }
+
+
+def _flush_work(target):
+    # BookedRoom and Bookings changes are only recorded per row here; the
+    # SQL they imply runs set-based once per flush in apply_booking_changes.
+    session = object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault("booking_changes", {
+        "booked": [], "released": [], "changed": {},
+    })
+
+
+@event.listens_for(BookedRoom, "after_insert")
+def collect_booked_room(mapper, connection, target):
+    work = _flush_work(target)
+    if work is not None:
+        work["booked"].append(target)
+
 
 @event.listens_for(BookedRoom, "after_delete")
-def mark_room_available(mapper, connection, target):
-    connection.execute(
-        Rooms.__table__.update()
-        .where(Rooms.id == target.room_id)
-        .values(is_available=True)
-    )
+def collect_released_room(mapper, connection, target):
+    work = _flush_work(target)
+    if work is None:
+        return
+    # The room or booking may be deleted in this same flush; keep what the
+    # daily stats need while the objects are still at hand.
+    session = object_session(target)
+    room = target.__dict__.get("room") or session.identity_map.get(
+        session.identity_key(Rooms, target.room_id))
+    booking = target.__dict__.get("booking") or session.identity_map.get(
+        session.identity_key(Bookings, target.booking_id))
+    work["released"].append((
+        target.room_id,
+        target.booking_id,
+        room.hotel_id if room else None,
+        room.room_type_id if room else None,
+        target.rate,
+        _stored_stay(booking) if booking is not None else None,
+    ))
+
+
+@event.listens_for(Bookings, "after_update")
+def collect_changed_booking(mapper, connection, target):
+    # New dates move the booking's room_nights; a new status can move it in
+    # or out of the daily stats.
+    attrs = inspect(target).attrs
+    if not (attrs.check_in_date.history.has_changes()
+            or attrs.check_out_date.history.has_changes()
+            or attrs.status.history.has_changes()):
+        return
+    work = _flush_work(target)
+    if work is not None:
+        work["changed"][target.id] = (
+            _stored_stay(target),
+            ((target.check_in_date, target.check_out_date), target.status))
+
+
+@event.listens_for(Session, "after_flush")
+def apply_booking_changes(session, flush_context):
+    work = session.info.pop("booking_changes", None)
+    if not work:
+        return
+    connection = session.connection()
+    changed = work["changed"]
+    touched_rooms = set()
+    hotel_ids = set()
+    nights = []
+    stats = []
+    # Mirrored into room_nights_index once committed; releases go first
+    index_ops = session.info.setdefault("room_night_ops", [])
+
+    released = work["released"]
+    if released:
+        rooms = defaultdict(list)
+        for room_id, booking_id, *_ in released:
+            rooms[booking_id].append(room_id)
+        connection.execute(
+            RoomNights.__table__.delete().where(or_(*(
+                and_(RoomNights.booking_id == booking_id, RoomNights.room_id.in_(room_ids))
+                for booking_id, room_ids in rooms.items()
+            )))
+        )
+        unknown = {entry[1] for entry in released if entry[5] is None}
+        stored = _select_stays(connection, unknown) if unknown else {}
+        for room_id, booking_id, hotel_id, room_type_id, rate, stored_stay in released:
+            index_ops.append(("release", room_id, booking_id))
+            touched_rooms.add(room_id)
+            hotel_ids.add(hotel_id)
+            stay, status = stored_stay or stored.get(booking_id, (None, None))
+            if stay is not None and status == SOLD_STATUS:
+                owner = (hotel_id, room_type_id) if hotel_id is not None else None
+                stats.append((room_id, stay, rate, -1, owner))
+
+    if changed:
+        redated = [booking_id for booking_id, ((old, _), (new, _)) in changed.items()
+                   if old != new]
+        if redated:
+            connection.execute(
+                RoomNights.__table__.delete()
+                .where(RoomNights.booking_id.in_(redated))
+            )
+        rows = connection.execute(
+            select(BookedRoom.room_id, BookedRoom.booking_id, BookedRoom.rate)
+            .where(BookedRoom.booking_id.in_(list(changed)))
+        ).all()
+        # Rooms added in this flush were never counted under the old values
+        added = {(br.booking_id, br.room_id) for br in work["booked"]}
+        for room_id, booking_id, rate in rows:
+            (old, old_status), (new, status) = changed[booking_id]
+            is_new = (booking_id, room_id) in added
+            touched_rooms.add(room_id)
+            if old != new or is_new:
+                index_ops.append(("release", room_id, booking_id))
+                nights.extend((room_id, night, booking_id) for night in stay_nights(*new))
+            if old_status == SOLD_STATUS and not is_new:
+                stats.append((room_id, old, rate, -1, None))
+            if status == SOLD_STATUS:
+                stats.append((room_id, new, rate, 1, None))
+
+    booked = [br for br in work["booked"] if br.booking_id not in changed]
+    if booked:
+        stays = {}
+        for br in booked:
+            booking = br.__dict__.get("booking")
+            if booking is not None:
+                stays[br.booking_id] = (
+                    (booking.check_in_date, booking.check_out_date), booking.status)
+        missing = {br.booking_id for br in booked} - stays.keys()
+        if missing:
+            stays.update(_select_stays(connection, missing))
+        for br in booked:
+            touched_rooms.add(br.room_id)
+            if br.booking_id not in stays:
+                continue
+            stay, status = stays[br.booking_id]
+            nights.extend((br.room_id, night, br.booking_id)
+                          for night in stay_nights(*stay))
+            if status == SOLD_STATUS:
+                stats.append((br.room_id, stay, br.rate, 1, None))
+
+    if nights:
+        _insert_room_nights(connection, nights)
+        held = defaultdict(list)
+        for room_id, night, booking_id in nights:
+            held[room_id, booking_id].append(night)
+        index_ops.extend(("add", room_id, booking_id, room_nights)
+                         for (room_id, booking_id), room_nights in held.items())
+    refresh_room_availability(connection, touched_rooms)
+
+    # One lookup serves the cache tags and the daily stats
+    rooms = {
+        row.id: row for row in connection.execute(
+            select(Rooms.id, Rooms.hotel_id, Rooms.room_type_id, Rooms.price_per_night)
+            .where(Rooms.id.in_(touched_rooms))
+        )
+    } if touched_rooms else {}
+    hotel_ids.update(room.hotel_id for room in rooms.values())
+    _add_daily_stats(connection, stats, rooms)
+
+    session.info.setdefault("catalog_tags", set()).update(_room_tags(*hotel_ids))
+
 
+def make_identity_cache():
+    """Cache for session-check payloads (see identity_key).
 
+    Entries are dropped once a commit changes or deletes their user, which
+    only reaches other gunicorn workers through a shared backend
+    (IDENTITY_CACHE_URL, by default CATALOG_CACHE_URL). With several workers
+    and no shared backend nothing is cached, so a deleted or renamed user is
+    never served from another worker's memory; a warning is logged at startup
+    so the missing Redis URL does not go unnoticed.
+    """
+    url = app.config["IDENTITY_CACHE_URL"]
+    shared = url and url.startswith(("redis://", "rediss://", "unix://"))
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    if not shared and workers > 1:
+        app.logger.warning(
+            "Identity cache disabled: %d workers and no shared backend. "
+            "Set IDENTITY_CACHE_URL (or CATALOG_CACHE_URL) to a redis:// URL "
+            "to cache session checks.", workers)
+        return LRUCache(maxsize=0)
+    return make_backend(url, maxsize=app.config["IDENTITY_CACHE_SIZE"],
+                        ttl=app.config["IDENTITY_CACHE_TTL"])
 
-class Amenities(db.Model, SerializerMixin):
+
+def identity_key(kind, user_id):
+    """`kind` is "guest" or "admin"."""
+    return f"identity:{kind}:{user_id}"
+
+
+identity_cache = make_identity_cache()
+
+
+# Hotel, room, room type and amenity payloads (see ReadThroughCache for tags)
+catalog_cache = ReadThroughCache(make_backend(
+    app.config["CATALOG_CACHE_URL"],
+    maxsize=app.config["CATALOG_CACHE_SIZE"],
+    ttl=app.config["CATALOG_CACHE_TTL"],
+))
+
+
+def _queue_identity_eviction(target, kind):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("identity_keys", set()).add(identity_key(kind, target.id))
+
+
+@event.listens_for(Guests, "after_update")
+@event.listens_for(Guests, "after_delete")
+def forget_guest_identity(mapper, connection, target):
+    _queue_identity_eviction(target, "guest")
+
+
+@event.listens_for(Admins, "after_update")
+@event.listens_for(Admins, "after_delete")
+def forget_admin_identity(mapper, connection, target):
+    _queue_identity_eviction(target, "admin")
+
+
+# Evicted only once the change is committed: a rolled back edit leaves the
+# cached identity as valid as it was.
+@event.listens_for(Session, "after_commit")
+def apply_identity_evictions(session):
+    for key in session.info.pop("identity_keys", ()):
+        identity_cache.delete(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_identity_evictions(session):
+    session.info.pop("identity_keys", None)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_booking_changes(session):
+    session.info.pop("booking_changes", None)
+    session.info.pop("room_night_ops", None)
+
+
+@event.listens_for(Session, "after_commit")
+def apply_room_night_ops(session):
+    for op, *args in session.info.pop("room_night_ops", ()):
+        getattr(room_nights_index, op)(*args)
+
+
+@event.listens_for(Session, "after_commit")
+def apply_catalog_invalidations(session):
+    catalog_cache.invalidate(*session.info.pop("catalog_tags", ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_catalog_invalidations(session):
+    session.info.pop("catalog_tags", None)
+
+
+class Amenities(db.Model, SerializerMixin, TimestampMixin):
     __tablename__ = 'amenities'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -230,7 +752,7 @@ class Amenities(db.Model, SerializerMixin):
     serialize_rules = ('-hotel_amenities.amenity',)
 
 
-class HotelAmenities(db.Model, SerializerMixin):
+class HotelAmenities(db.Model, SerializerMixin, TimestampMixin):
     __tablename__ = 'hotel_amenities'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -248,3 +770,149 @@ class HotelAmenities(db.Model, SerializerMixin):
 
     # serialize_rules
     serialize_rules = ('-amenity.hotel_amenities', '-hotel.hotel_amenities',)
+
+
+#--------------------catalog cache invalidation----------------------
+
+def _old_and_new(target, attr):
+    history = inspect(target).attrs[attr].history
+    return {getattr(target, attr), *history.deleted}
+
+
+@event.listens_for(Hotels, "after_insert")
+@event.listens_for(Hotels, "after_update")
+@event.listens_for(Hotels, "after_delete")
+def invalidate_hotel_catalog(mapper, connection, target):
+    _queue_catalog_tags(target, "hotels", f"hotel:{target.id}")
+
+
+#--------------------hotel search----------------------
+
+HOTEL_SEARCH_INDEX = 'ix_hotels_search_trgm'
+
+# Text the pg_trgm index covers; queries must use the same expression
+HOTEL_SEARCH_DOCUMENT = (
+    "lower(coalesce(name, '') || ' ' || coalesce(city, '') || ' ' "
+    "|| coalesce(country, '') || ' ' || coalesce(address, ''))"
+)
+
+
+def create_hotel_search_index(connection):
+    """Create the trigram index hotel search uses on PostgreSQL.
+
+    Returns False where pg_trgm is not available, in which case searches
+    use the in-process `hotel_search` index.
+    """
+    if connection.dialect.name != "postgresql":
+        return False
+    try:
+        with connection.begin_nested():
+            connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DBAPIError:
+        return False
+    connection.exec_driver_sql(
+        f"CREATE INDEX IF NOT EXISTS {HOTEL_SEARCH_INDEX} ON hotels "
+        f"USING gin (({HOTEL_SEARCH_DOCUMENT}) gin_trgm_ops)")
+    return True
+
+
+def has_hotel_search_index(connection):
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(
+        text("SELECT 1 FROM pg_indexes WHERE indexname = :name"),
+        {"name": HOTEL_SEARCH_INDEX},
+    ).first() is not None
+
+
+def _load_hotel_documents(since):
+    query = select(Hotels.id, Hotels.name, Hotels.city, Hotels.country,
+                   Hotels.address, Hotels.updated_at)
+    if since is None:
+        return db.session.execute(query).all(), []
+    rows = db.session.execute(query.where(Hotels.updated_at >= since)).all()
+    deleted = db.session.scalars(
+        select(HotelDeletions.hotel_id).where(HotelDeletions.deleted_at >= since)).all()
+    return rows, deleted
+
+
+hotel_search = HotelSearchIndex(_load_hotel_documents)
+
+
+def _load_booked_nights(first_night):
+    return db.session.execute(
+        select(RoomNights.room_id, RoomNights.night, RoomNights.booking_id)
+        .where(RoomNights.night >= first_night)
+    ).all()
+
+
+room_nights_index = RoomNightIndex(_load_booked_nights)
+
+
+def _queue_search_op(target, *op):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("hotel_search_ops", []).append(op)
+
+
+@event.listens_for(Hotels, "after_insert")
+def index_new_hotel_for_search(mapper, connection, target):
+    _queue_search_op(target, "add", target.id,
+                     tuple(getattr(target, f) for f in SEARCH_FIELDS))
+
+
+@event.listens_for(Hotels, "after_update")
+def reindex_hotel_for_search(mapper, connection, target):
+    # Re-indexing touches every posting of the hotel's words; skip other edits
+    state = inspect(target)
+    if any(state.attrs[f].history.has_changes() for f in SEARCH_FIELDS):
+        index_new_hotel_for_search(mapper, connection, target)
+
+
+@event.listens_for(Hotels, "after_delete")
+def unindex_hotel_for_search(mapper, connection, target):
+    # This worker drops the hotel on commit; others find the row on refresh
+    connection.execute(HotelDeletions.__table__.insert(),
+                       {"hotel_id": target.id, "deleted_at": datetime.utcnow()})
+    _queue_search_op(target, "remove", target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def apply_hotel_search_ops(session):
+    for op, *args in session.info.pop("hotel_search_ops", ()):
+        getattr(hotel_search, op)(*args)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_hotel_search_ops(session):
+    session.info.pop("hotel_search_ops", None)
+
+
+@event.listens_for(Rooms, "after_insert")
+@event.listens_for(Rooms, "after_update")
+@event.listens_for(Rooms, "after_delete")
+def invalidate_room_catalog(mapper, connection, target):
+    _queue_catalog_tags(target, *_room_tags(*_old_and_new(target, "hotel_id")))
+
+
+@event.listens_for(RoomTypes, "after_insert")
+@event.listens_for(RoomTypes, "after_update")
+@event.listens_for(RoomTypes, "after_delete")
+def invalidate_room_type_catalog(mapper, connection, target):
+    _queue_catalog_tags(target, "room_types")
+
+
+@event.listens_for(Amenities, "after_insert")
+@event.listens_for(Amenities, "after_update")
+@event.listens_for(Amenities, "after_delete")
+def invalidate_amenity_catalog(mapper, connection, target):
+    _queue_catalog_tags(target, "amenities")
+
+
+@event.listens_for(HotelAmenities, "after_insert")
+@event.listens_for(HotelAmenities, "after_update")
+@event.listens_for(HotelAmenities, "after_delete")
+def invalidate_hotel_amenity_catalog(mapper, connection, target):
+    _queue_catalog_tags(target, *(f"hotel:{hotel_id}"
+                                  for hotel_id in _old_and_new(target, "hotel_id")
+                                  if hotel_id is not None))
@@ -0,0 +1,84 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from gevent import monkey as gevent_monkey
+from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+from werkzeug.exceptions import ServiceUnavailable
+
+from config import app, bcrypt
+
+
+class PasswordHashingBusy(ServiceUnavailable):
+    description = "Too many logins in progress, please retry shortly."
+
+
+class HashingPool:
+    """Bounded thread pool for bcrypt work.
+
+    The request waits for its hash, but the hash runs on a pool thread that
+    releases the GIL, so the other threads of a gthread worker keep serving
+    requests. Under gevent, where threading is monkey-patched and a
+    "thread" is a greenlet, the pool uses gevent's native OS threads and the
+    waiting greenlet yields to the others instead of blocking the worker.
+
+    At most `workers + queue_size` jobs are admitted; anything beyond that
+    is shed straight away with a 503 instead of queueing behind seconds of
+    CPU work. A slot is freed when its hash finishes, not when its caller
+    gives up waiting.
+    """
+
+    def __init__(self, workers, queue_size, timeout):
+        if gevent_monkey.is_module_patched("threading"):
+            self._executor = NativeThreadPoolExecutor(max_workers=workers)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self.timeout = timeout
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy(retry_after=1)
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise PasswordHashingBusy(retry_after=1)
+
+
+pool = HashingPool(
+    workers=app.config["BCRYPT_POOL_WORKERS"],
+    queue_size=app.config["BCRYPT_POOL_QUEUE"],
+    timeout=app.config["BCRYPT_POOL_TIMEOUT"],
+)
+
+
+def hash_password(password):
+    hashed = pool.run(bcrypt.generate_password_hash, password.encode('utf-8'))
+    return hashed.decode('utf-8')
+
+
+def verify_password(password_hash, password):
+    try:
+        return pool.run(
+            bcrypt.check_password_hash, password_hash, password.encode('utf-8'))
+    except ValueError:
+        # Not a bcrypt hash (e.g. plain-text seed data): never matches.
+        return False
+
+
+def hash_rounds(password_hash):
+    # bcrypt hashes look like $2b$12$<salt+digest>
+    try:
+        return int(password_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(password_hash):
+    return hash_rounds(password_hash) != app.config["BCRYPT_LOG_ROUNDS"]
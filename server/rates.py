@@ -0,0 +1,181 @@
+import os
+import sys
+from array import array
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Nights compiled into each calendar, starting the day its rules are saved.
+# Nights outside it cost the room's base price; recompile periodically
+# (`flask recompile-rate-calendars`) to roll the window forward.
+CALENDAR_DAYS = int(os.environ.get("RATE_CALENDAR_DAYS", 730))
+
+MAX_CENTS = 99_999_99
+
+
+def to_cents(value) -> int:
+    try:
+        cents = int((Decimal(str(value)) * 100).to_integral_value())
+    except (InvalidOperation, ValueError, TypeError):
+        raise ValueError(f"invalid rate: {value!r}")
+    if not 0 < cents <= MAX_CENTS:
+        raise ValueError(f"rate must be between 0.01 and {MAX_CENTS / 100:.2f}")
+    return cents
+
+
+def _weekday_rates(data, where):
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{where} weekdays must be an object like {{\"sat\": 150}}")
+    unknown = set(data) - set(WEEKDAYS)
+    if unknown:
+        raise ValueError(f"unknown weekday(s) in {where}: {', '.join(sorted(unknown))}")
+    return {day: to_cents(rate) / 100 for day, rate in data.items()}
+
+
+def parse_rules(data) -> dict:
+    """Validate a rate calendar request and return it normalised for storage.
+
+        {
+          "weekdays": {"fri": 150, "sat": 150},
+          "seasons": [
+            {"name": "Festive", "from": "2026-12-20", "to": "2027-01-05",
+             "rate": 200, "weekdays": {"sat": 240}}
+          ]
+        }
+
+    Season dates are nights, both inclusive. Later seasons win over earlier
+    ones, a season's weekday rate over its flat rate, and any season over
+    the room-wide weekday rates. Nights no rule covers cost the room's
+    price_per_night.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("rates must be a JSON object")
+    seasons = data.get("seasons") or []
+    if not isinstance(seasons, list):
+        raise ValueError("seasons must be a list")
+
+    rules = {"weekdays": _weekday_rates(data.get("weekdays"), "weekdays"), "seasons": []}
+    for i, season in enumerate(seasons):
+        if not isinstance(season, dict):
+            raise ValueError(f"season {i} must be an object")
+        where = f"season {season.get('name') or i}"
+        try:
+            first = date.fromisoformat(season["from"])
+            last = date.fromisoformat(season["to"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{where} needs ISO `from` and `to` dates")
+        if last < first:
+            raise ValueError(f"{where} ends before it starts")
+        if season.get("rate") is None and not season.get("weekdays"):
+            raise ValueError(f"{where} needs a rate or weekday rates")
+        rules["seasons"].append({
+            "name": season.get("name"),
+            "from": first.isoformat(),
+            "to": last.isoformat(),
+            "rate": to_cents(season["rate"]) / 100 if season.get("rate") is not None else None,
+            "weekdays": _weekday_rates(season.get("weekdays"), where),
+        })
+    return rules
+
+
+def _fill(cents, first, stop, rate):
+    if first < stop:
+        cents[first:stop] = array("i", [rate]) * (stop - first)
+
+
+def _fill_weekdays(cents, start, first, stop, rates):
+    """Set the given weekdays in cents[first:stop]; index 0 is `start`."""
+    offset = (start.toordinal() + first) % 7  # Monday is ordinal % 7 == 1
+    for day, rate in rates.items():
+        begin = first + (WEEKDAYS.index(day) + 1 - offset) % 7
+        if begin < stop:
+            cents[begin:stop:7] = array("i", [to_cents(rate)]) * len(range(begin, stop, 7))
+
+
+def compile_calendar(rules, start, days=CALENDAR_DAYS) -> bytes:
+    """Per-night override cents for `days` nights from `start`, packed.
+
+    0 means "no override", so the room's base price can change without
+    recompiling. Stored little-endian int32, 4 bytes a night.
+    """
+    cents = array("i", bytes(4 * days))
+    _fill_weekdays(cents, start, 0, days, rules["weekdays"])
+    for season in rules["seasons"]:
+        first = max(0, (date.fromisoformat(season["from"]) - start).days)
+        stop = min(days, (date.fromisoformat(season["to"]) - start).days + 1)
+        if season["rate"] is not None:
+            _fill(cents, first, stop, to_cents(season["rate"]))
+        _fill_weekdays(cents, start, first, stop, season["weekdays"])
+    if sys.byteorder == "big":
+        cents.byteswap()
+    return cents.tobytes()
+
+
+def _unpack(blob):
+    cents = array("i")
+    cents.frombytes(blob)
+    if sys.byteorder == "big":
+        cents.byteswap()
+    return cents
+
+
+class Quoter:
+    """Prices many `(room_id, first_night, nights)` stays at once.
+
+    Every room's nightly rates are laid end to end in one array with a
+    single running total, so a stay costs two lookups and a subtraction no
+    matter how long it is, and the whole batch is a handful of NumPy array
+    operations.
+    """
+
+    def __init__(self):
+        self.rooms = {}
+
+    def add_room(self, room_id, price, start=None, blob=None):
+        """`price` is the base price_per_night; `start`/`blob` a compiled calendar."""
+        base = int((Decimal(price) * 100).to_integral_value())
+        self.rooms[room_id] = (base, start.toordinal() if start else 0, blob or b"")
+
+    def totals(self, stays):
+        """Total cents per stay, or None where the room is unknown."""
+        ids = list(self.rooms)
+        position = {room_id: n for n, room_id in enumerate(ids)}
+        base = np.array([self.rooms[r][0] for r in ids], dtype=np.int64)
+        start = np.array([self.rooms[r][1] for r in ids], dtype=np.int64)
+        chunks = [np.frombuffer(self.rooms[r][2], dtype="<i4") for r in ids]
+        length = np.array([len(c) for c in chunks], dtype=np.int64)
+        offset = np.concatenate(([0], np.cumsum(length)[:-1])).astype(np.int64)
+
+        nightly = np.concatenate(chunks).astype(np.int64) if ids else np.zeros(0, np.int64)
+        owner = np.repeat(np.arange(len(ids)), length)
+        nightly = np.where(nightly == 0, base[owner], nightly)
+        prefix = np.concatenate(([0], np.cumsum(nightly)))
+
+        known = [n for n, (room_id, _, _) in enumerate(stays) if room_id in position]
+        room = np.array([position[stays[n][0]] for n in known], dtype=np.int64)
+        first = np.array([stays[n][1] for n in known], dtype=np.int64)
+        nights = np.array([stays[n][2] for n in known], dtype=np.int64)
+
+        i = np.clip(first - start[room], 0, length[room])
+        j = np.clip(first + nights - start[room], 0, length[room])
+        sums = (prefix[offset[room] + j] - prefix[offset[room] + i]
+                + (nights - (j - i)) * base[room])
+
+        totals = [None] * len(stays)
+        for n, total in zip(known, sums.tolist()):
+            totals[n] = total
+        return totals
+
+    def nightly(self, room_id, first, nights):
+        """Nightly cents for one room, for showing a calendar."""
+        base, start, blob = self.rooms[room_id]
+        cents = _unpack(blob)
+        return [
+            (cents[k - start] or base) if 0 <= k - start < len(cents) else base
+            for k in range(first, first + nights)
+        ]
@@ -1,6 +1,24 @@
 #!/usr/bin/env python3
+"""Generate a synthetic dataset of any size, deterministically from a seed.
+
+    python seed.py                                   # small dev dataset
+    python seed.py --guests 1000000 --hotels 5000 --rooms-per-hotel 40
+
+Rows go in with bulk Core inserts, or COPY on PostgreSQL with psycopg2, in
+batches, so millions of rows never sit in memory or the ORM. Every guest and
+admin shares one bcrypt hash of --password, so any seeded account can log
+in. Each room gets a run of non-overlapping stays from --history-days ago to
+--future-days ahead at roughly --occupancy; room_nights, rooms.is_available
+and the daily analytics rollup are filled to match.
+"""
+
+import argparse
+import csv
+import io
+import json
+import time
+from random import Random
 
-from random import randint, choice as rc
 from faker import Faker
 
 from app import app
@@ -13,202 +31,306 @@ from models import (
     RoomTypes,
     Bookings,
     BookedRoom,
+    RoomNights,
+    DailyRoomTypeStats,
+    HotelDeletions,
+    RoomRateCalendars,
     Amenities,
     HotelAmenities,
     datetime,
+    rebuild_daily_stats,
+    refresh_room_availability,
+    stay_nights,
 )
+from passwords import hash_password
+from rates import compile_calendar, parse_rules
 
-fake = Faker()
+ROOM_TYPES = [
+    "Single Room",
+    "Double Room",
+    "Twin Room",
+    "Suite",
+    "Deluxe Room",
+]
+AMENITIES = [
+    "Free Wi-Fi",
+    "Swimming Pool",
+    "Fitness Center",
+    "Spa Services",
+    "On-site Restaurant",
+    "Bar / Lounge",
+    "Free Parking",
+    "Airport Shuttle",
+    "Business Center",
+    "Laundry Service",
+]
+STATUSES = ["Confirmed", "Confirmed", "Confirmed", "Pending", "Denied"]
 
-if __name__ == "__main__":
-    with app.app_context():
-        print("🚿 Clearing old data...")
+# Dependency order; cleared in reverse
+TABLES = [Guests, Admins, Hotels, RoomTypes, Rooms, Amenities, HotelAmenities,
+          RoomRateCalendars, Bookings, BookedRoom, RoomNights, DailyRoomTypeStats,
+          HotelDeletions]
 
-        # Delete in dependency order
-        BookedRoom.query.delete()
-        Bookings.query.delete()
-        HotelAmenities.query.delete()
-        Rooms.query.delete()
-        RoomTypes.query.delete()
-        Hotels.query.delete()
-        Admins.query.delete()
-        Amenities.query.delete()
-        Guests.query.delete()
 
-        db.session.commit()
-        print("Old data cleared.")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Seed the database with synthetic data.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--guests", type=int, default=50)
+    parser.add_argument("--hotels", type=int, default=10, help="one admin per hotel")
+    parser.add_argument("--rooms-per-hotel", type=int, default=10)
+    parser.add_argument("--history-days", type=int, default=180)
+    parser.add_argument("--future-days", type=int, default=60)
+    parser.add_argument("--occupancy", type=float, default=0.6,
+                        help="rough share of room-nights booked (0-1)")
+    parser.add_argument("--rate-calendars", type=float, default=0.3,
+                        help="share of rooms with weekend and seasonal rates (0-1)")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    return parser.parse_args()
 
-        print("Starting fresh seed...")
 
-        # Guests
-        guests = [
-            Guests(
-                name=fake.name(),
-                email=fake.unique.email(),
-                _password_hash="password123", 
-            )
-            for _ in range(50)
-        ]
-        db.session.add_all(guests)
-        db.session.commit()
-        print("Seeded Guests")
-
-        # Admins
-        admins = [
-            Admins(
-                name=fake.unique.name(),
-                _password_hash="password123",
-            )
-            for _ in range(10)
-        ]
-        db.session.add_all(admins)
-        db.session.commit()
-        print("Seeded Admins")
-
-       # Hotels
-        hotels = []
-        used_emails = set()
-        used_names = set()
-        used_addresses = set()
-        used_phones = set()
-
-        for admin in admins:
-            name = fake.unique.company()
-            email = fake.unique.email()
-            address = fake.unique.address()
-            phone = fake.unique.msisdn()
-
-            hotel = Hotels(
-                name=name,
-                address=address,
-                city=fake.city(),
-                country=fake.country(),
-                email=email,
-                phone=phone,
-                admin=admin,
-            )
-
-            hotels.append(hotel)
-
-        db.session.add_all(hotels)
-        db.session.commit()
+def copy_value(value):
+    """Text form of a value for COPY ... (FORMAT csv)."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, bytes):
+        return "\\x" + value.hex()
+    return value
 
-        print("Seeded Hotels")
-
-        # Room Types
-        room_types_list = [
-            "Single Room",
-            "Double Room",
-            "Twin Room",
-            "Suite",
-            "Deluxe Room",
-        ]
-        room_types = [
-            RoomTypes(
-                type_name=type_name,
-                description=fake.sentence(),
-            )
-            for type_name in room_types_list
-        ]
-        db.session.add_all(room_types)
-        db.session.commit()
-        print("Seeded Room Types")
-        
-        # Rooms
-        rooms = []
-        for _ in range(100):
-            hotel = rc(hotels)
-            room_type = rc(room_types)
-            total_rooms = randint(3, 15)
-            available_rooms = randint(0, total_rooms)
-            room = Rooms(
-                hotel=hotel,
-                room_type=room_type,
-                room_name=f"Room-{randint(100, 999)}",
-                price_per_night=fake.pyfloat(
-                    left_digits=5, right_digits=2, min_value=5000, max_value=80000
-                ),
-                is_available=available_rooms > 0,
-                total_rooms=total_rooms,
-                available_rooms=available_rooms,
-                max_per_booking=randint(1, min(3, total_rooms)),
-            )
-            rooms.append(room)
-
-        db.session.add_all(rooms)
-        db.session.commit()
-        print("Seeded Rooms)")
-
-        # Amenities
-        amenities_list = [
-            "Free Wi-Fi",
-            "Swimming Pool",
-            "Fitness Center",
-            "Spa Services",
-            "On-site Restaurant",
-            "Bar / Lounge",
-            "Free Parking",
-            "Airport Shuttle",
-            "Business Center",
-            "Laundry Service",
-        ]
-
-        amenities = []
-        for amenity_name in amenities_list:
-            amenity = Amenities(
-                name=amenity_name,
-                description=fake.sentence(),
-            )
-            amenities.append(amenity)
-
-        db.session.add_all(amenities)
-        db.session.commit()
-        print("Seeded unique Amenities")
-
-        hotel_amenities = []
-        for hotel in hotels:
-            selected_amenities = fake.random_elements(
-                elements=amenities,
-                length=randint(3, 6),
-                unique=True
-            )
-            for amenity in selected_amenities:
-                ha = HotelAmenities(hotel_id=hotel.id, amenity_id=amenity.id)
-                hotel_amenities.append(ha)
-
-        db.session.add_all(hotel_amenities)
-        db.session.commit()
-        print("Seeded Hotel Amenities (unique per hotel)")
 
+class Writer:
+    """Batched inserts: COPY on PostgreSQL + psycopg2, executemany elsewhere."""
 
-        # Bookings
-        bookings = []
-        for _ in range(40):
-            guest = rc(guests)
-            check_in_date = fake.date_time_between(start_date="-6m", end_date="now")
-            check_out_date = check_in_date + timedelta(days=fake.random_int(min=1, max=10))
+    def __init__(self, connection, batch_size):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.copy = (connection.dialect.name == "postgresql"
+                     and connection.dialect.driver == "psycopg2")
+        self.counts = {}
 
-            booking = Bookings(
-                guest_id=guest.id,
-                check_in_date=check_in_date,
-                check_out_date=check_out_date,
-                status=rc(["Confirmed", "Pending", "Denied"]),
-            )
-            bookings.append(booking)
+    def insert(self, model, rows):
+        table = model.__table__
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._flush(table, batch)
+                batch = []
+        if batch:
+            self._flush(table, batch)
+
+    def _flush(self, table, batch):
+        if self.copy:
+            columns = list(batch[0])
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            for row in batch:
+                writer.writerow([copy_value(row[c]) for c in columns])
+            buf.seek(0)
+            with self.connection.connection.driver_connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                    buf)
+        else:
+            self.connection.execute(table.insert(), batch)
+        self.counts[table.name] = self.counts.get(table.name, 0) + len(batch)
+
+    def reset_sequences(self):
+        # Ids were assigned here, so move PostgreSQL sequences past them
+        if self.connection.dialect.name != "postgresql":
+            return
+        for model in TABLES:
+            table = model.__table__
+            if "id" in table.c and table.c.id.autoincrement:
+                self.connection.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"COALESCE(MAX(id), 1)) FROM {table.name}")
+
+
+def clear(connection):
+    if connection.dialect.name == "postgresql":
+        names = ", ".join(model.__tablename__ for model in TABLES)
+        connection.exec_driver_sql(f"TRUNCATE {names} RESTART IDENTITY CASCADE")
+        return
+    for model in reversed(TABLES):
+        connection.execute(model.__table__.delete())
 
-        db.session.add_all(bookings)
-        db.session.commit()
-        print("Seeded Bookings (linked to Guests)")
 
-        # Booked Rooms
-        booked_rooms = []
-        for booking in bookings:
-            selected_rooms = fake.random_elements(elements=rooms, length=randint(1, 3), unique=True)
-            for room in selected_rooms:
-                booked_rooms.append(BookedRoom(booking_id=booking.id, room_id=room.id))
+def generate(writer, args):
+    rng = Random(args.seed)
+    fake = Faker()
+    fake.seed_instance(args.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    today = now.replace(hour=0, minute=0, second=0)
+    password_hash = hash_password(args.password)
+
+    # Small pools keep Faker out of the per-row path
+    first_names = [fake.first_name() for _ in range(500)]
+    last_names = [fake.last_name() for _ in range(500)]
+    cities = [(fake.city(), fake.country()) for _ in range(200)]
+    sentences = [fake.sentence() for _ in range(50)]
+
+    def person(i):
+        first, last = rng.choice(first_names), rng.choice(last_names)
+        return f"{first} {last}", f"{first}.{last}.{i}@example.com".lower()
+
+    def guests():
+        for i in range(1, args.guests + 1):
+            name, email = person(i)
+            yield {"id": i, "name": name, "email": email, "_password_hash": password_hash,
+                   "created_at": now, "updated_at": now}
+    writer.insert(Guests, guests())
+    print(f"Seeded {args.guests} Guests")
+
+    writer.insert(Admins, (
+        {"id": i, "name": f"{person(i)[0]} #{i}", "_password_hash": password_hash,
+         "created_at": now, "updated_at": now}
+        for i in range(1, args.hotels + 1)))
+    print(f"Seeded {args.hotels} Admins")
+
+    def hotels():
+        # name and address are unique; suffix the index if Faker repeats one
+        names, addresses = set(), set()
+        for i in range(1, args.hotels + 1):
+            city, country = rng.choice(cities)
+            name, address = f"{fake.company()} Hotel", fake.street_address()
+            name = name if name not in names else f"{name} {i}"
+            address = address if address not in addresses else f"{address}, Block {i}"
+            names.add(name)
+            addresses.add(address)
+            yield {"id": i, "name": name, "address": address,
+                   "city": city, "country": country, "email": f"hotel{i}@example.com",
+                   "phone": f"+2547{i:08d}", "admin_id": i,
+                   "created_at": now, "updated_at": now}
+    writer.insert(Hotels, hotels())
+    print(f"Seeded {args.hotels} Hotels")
+
+    writer.insert(RoomTypes, (
+        {"id": i, "type_name": name, "description": rng.choice(sentences),
+         "created_at": now, "updated_at": now}
+        for i, name in enumerate(ROOM_TYPES, 1)))
+    writer.insert(Amenities, (
+        {"id": i, "name": name, "description": rng.choice(sentences),
+         "created_at": now, "updated_at": now}
+        for i, name in enumerate(AMENITIES, 1)))
+
+    def hotel_amenities():
+        link_id = 0
+        for hotel_id in range(1, args.hotels + 1):
+            for amenity_id in sorted(rng.sample(range(1, len(AMENITIES) + 1), rng.randint(3, 6))):
+                link_id += 1
+                yield {"id": link_id, "hotel_id": hotel_id, "amenity_id": amenity_id,
+                       "created_at": now, "updated_at": now}
+    writer.insert(HotelAmenities, hotel_amenities())
+    print("Seeded Room Types and Amenities")
+
+    prices = [None]  # by room id, for booked_rooms.rate
+
+    def rooms():
+        room_id = 0
+        for hotel_id in range(1, args.hotels + 1):
+            for n in range(args.rooms_per_hotel):
+                room_id += 1
+                prices.append(rng.randrange(2500, 10000, 250))
+                yield {"id": room_id, "hotel_id": hotel_id,
+                       "room_type_id": rng.randint(1, len(ROOM_TYPES)),
+                       "room_name": f"Room-{100 + n}",
+                       "price_per_night": prices[room_id],
+                       "is_available": True, "created_at": now, "updated_at": now}
+    writer.insert(Rooms, rooms())
+    print(f"Seeded {args.hotels * args.rooms_per_hotel} Rooms")
+
+    def rate_calendars():
+        # Weekend premium, plus a peak season for some; compiled once per shape
+        compiled = {}
+        for room_id in range(1, len(prices)):
+            if rng.random() >= args.rate_calendars:
+                continue
+            price = prices[room_id]
+            shape = (price, rng.choice((110, 120, 150)), rng.random() < 0.5)
+            if shape not in compiled:
+                weekend = round(price * shape[1] / 100)
+                seasons = [{"name": "Peak", "from": (today + timedelta(days=30)).date().isoformat(),
+                            "to": (today + timedelta(days=60)).date().isoformat(),
+                            "rate": round(price * 1.4)}] if shape[2] else []
+                rules = parse_rules({"weekdays": {"fri": weekend, "sat": weekend},
+                                     "seasons": seasons})
+                compiled[shape] = (rules, compile_calendar(rules, today.date()))
+            rules, blob = compiled[shape]
+            yield {"room_id": room_id, "rules": rules, "start_date": today.date(),
+                   "nightly_cents": blob, "updated_at": now}
+    writer.insert(RoomRateCalendars, rate_calendars())
+    print("Seeded Rate Calendars")
+
+    # Stays are laid out per hotel: each room keeps a cursor of the date it is
+    # free from, and a booking for one or more rooms starts after all of them.
+    start = today - timedelta(days=args.history_days)
+    end = today + timedelta(days=args.future_days)
+    mean_stay = 4
+    mean_gap = mean_stay * (1 - args.occupancy) / max(args.occupancy, 0.01)
+    booking_id = 0
+    for first_hotel in range(0, args.hotels, 100):
+        bookings, booked, nights = [], [], []
+        for hotel in range(first_hotel, min(first_hotel + 100, args.hotels)):
+            first_room = hotel * args.rooms_per_hotel + 1
+            free_from = {first_room + n: start + timedelta(days=rng.randint(0, 10))
+                         for n in range(args.rooms_per_hotel)}
+            while free_from:
+                count = 1 if rng.random() < 0.85 else min(rng.randint(2, 3), len(free_from))
+                room_ids = sorted(rng.sample(sorted(free_from), count))
+                check_in = max(free_from[r] for r in room_ids) + timedelta(
+                    days=round(rng.expovariate(1 / mean_gap)) if mean_gap else 0,
+                    hours=rng.choice((12, 14, 15)))
+                check_out = (check_in + timedelta(days=rng.randint(1, 2 * mean_stay - 1))
+                             ).replace(hour=rng.choice((10, 11)))
+                if check_in >= end:
+                    for r in room_ids:
+                        del free_from[r]
+                    continue
+                booking_id += 1
+                bookings.append({"id": booking_id, "guest_id": rng.randint(1, args.guests),
+                                 "check_in_date": check_in, "check_out_date": check_out,
+                                 "status": rng.choice(STATUSES)})
+                stay = stay_nights(check_in, check_out)
+                for r in room_ids:
+                    booked.append({"booking_id": booking_id, "room_id": r, "rate": prices[r]})
+                    nights.extend({"room_id": r, "night": night, "booking_id": booking_id}
+                                  for night in stay)
+                    free_from[r] = check_out.replace(hour=0) + timedelta(days=1)
+        writer.insert(Bookings, bookings)
+        writer.insert(BookedRoom, booked)
+        writer.insert(RoomNights, nights)
+    print(f"Seeded {booking_id} Bookings")
+
+
+def finish(writer):
+    """Bring derived state up to date: sequences, availability, daily stats."""
+    writer.reset_sequences()
+    refresh_room_availability(writer.connection)
+    rebuild_daily_stats(writer.connection)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.guests < 1 or args.hotels < 1 or args.rooms_per_hotel < 1:
+        raise SystemExit("--guests, --hotels and --rooms-per-hotel must be at least 1")
+
+    with app.app_context():
+        connection = db.session.connection()
+        print("🚿 Clearing old data...")
+        clear(connection)
+        print("Starting fresh seed...")
 
-        db.session.add_all(booked_rooms)
+        started = time.perf_counter()
+        writer = Writer(connection, args.batch_size)
+        generate(writer, args)
+        finish(writer)
         db.session.commit()
-        print("Seeded Booked Rooms")
 
-        print(" All data seeded successfully!\n")
+        total = sum(writer.counts.values())
+        elapsed = time.perf_counter() - started
+        for name, count in writer.counts.items():
+            print(f"  {name:<16} {count:>12,}")
+        print(f" All data seeded successfully! {total:,} rows in {elapsed:.1f}s "
+              f"({total / elapsed:,.0f} rows/s)")
+        print(f"Every guest and admin logs in with password {args.password!r}\n")
@@ -0,0 +1,152 @@
+from sqlalchemy import Date, DateTime, Numeric, Time, inspect
+from sqlalchemy.ext.associationproxy import AssociationProxy
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import (
+    ColumnProperty, RelationshipProperty, joinedload, selectinload)
+
+_compiled = {}
+_eager = {}
+
+
+def serialize(obj, only):
+    """Fast equivalent of `obj.to_dict(only=only)`.
+
+    The `only` spec is compiled once per (model, spec) into plain attribute
+    reads and cached, so rows are not re-parsed against the rule tuples.
+    """
+    key = (type(obj), only)
+    fn = _compiled.get(key)
+    if fn is None:
+        fn = _compiled[key] = compile_spec(type(obj), only)
+    return fn(obj)
+
+
+def eager_options(model, only):
+    """Loader options that fetch every relationship reached by `only`.
+
+    Collections use selectinload and many-to-one links use joinedload, so
+    serializing the result costs a fixed number of queries however many rows
+    come back. Pass the result to `Query.options(*...)`.
+    """
+    key = (model, only)
+    options = _eager.get(key)
+    if options is None:
+        options = _eager[key] = tuple(_node_options(model, _spec_tree(only), None))
+    return options
+
+
+def compile_spec(model, only):
+    return _compile_node(model, _spec_tree(only))
+
+
+def _spec_tree(only):
+    tree = {}
+    for path in only:
+        node = tree
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def _load(parent, attr):
+    strategy = selectinload if attr.property.uselist else joinedload
+    if parent is None:
+        return strategy(attr)
+    return getattr(parent, strategy.__name__)(attr)
+
+
+def _node_options(model, tree, parent):
+    mapper = inspect(model)
+    for name, children in tree.items():
+        descriptor = mapper.all_orm_descriptors.get(name)
+        if isinstance(descriptor, AssociationProxy):
+            proxy = descriptor.for_class(model)
+            step = _load(_load(parent, proxy.local_attr), proxy.remote_attr)
+            target = proxy.remote_attr.property.mapper
+        elif isinstance(mapper.attrs.get(name), RelationshipProperty):
+            step = _load(parent, getattr(model, name))
+            target = mapper.attrs[name].mapper
+        else:
+            continue
+
+        yield step
+        if children:
+            yield from _node_options(target.class_, children, step)
+        else:
+            # A whole related object is rendered by to_dict(), which also
+            # walks its many-to-one links (e.g. hotel_amenities -> amenity).
+            for rel in target.relationships:
+                if not rel.uselist:
+                    yield _load(step, rel.class_attribute)
+
+
+def _column_formatter(model, column):
+    column_type = column.type
+    if isinstance(column_type, DateTime):
+        fmt = model.datetime_format
+        return lambda v: v.strftime(fmt)
+    if isinstance(column_type, Date):
+        fmt = model.date_format
+        return lambda v: v.strftime(fmt)
+    if isinstance(column_type, Time):
+        fmt = model.time_format
+        return lambda v: v.strftime(fmt)
+    if isinstance(column_type, Numeric):
+        return model.decimal_format.format
+    return None
+
+
+def _related(model, name):
+    """Return `(target_model, uselist)` if `name` is a relationship or proxy."""
+    descriptor = inspect(model).all_orm_descriptors.get(name)
+    if isinstance(descriptor, AssociationProxy):
+        proxy = descriptor.for_class(model)
+        return proxy.remote_attr.property.mapper.class_, not proxy.scalar
+    prop = inspect(model).attrs.get(name)
+    if isinstance(prop, RelationshipProperty):
+        return prop.mapper.class_, prop.uselist
+    return None
+
+
+def _compile_field(model, name, children):
+    related = _related(model, name)
+
+    if related is None:
+        prop = inspect(model).attrs.get(name)
+        formatter = None
+        if isinstance(prop, ColumnProperty):
+            formatter = _column_formatter(model, prop.columns[0])
+        elif not isinstance(inspect(model).all_orm_descriptors.get(name), hybrid_property):
+            raise ValueError(f"{model.__name__} has no field {name!r}")
+
+        if formatter is None:
+            return lambda obj: getattr(obj, name)
+
+        def extract(obj):
+            value = getattr(obj, name)
+            return None if value is None else formatter(value)
+        return extract
+
+    if not children:
+        # Whole related objects follow the model's own serialize_rules, which
+        # only to_dict() knows how to apply.
+        return lambda obj: obj.to_dict(only=(name,))[name]
+
+    target, uselist = related
+    nested = _compile_node(target, children)
+    if uselist:
+        return lambda obj: [nested(item) for item in getattr(obj, name)]
+
+    def extract_one(obj):
+        value = getattr(obj, name)
+        return None if value is None else nested(value)
+    return extract_one
+
+
+def _compile_node(model, tree):
+    fields = tuple((name, _compile_field(model, name, children))
+                   for name, children in tree.items())
+
+    def extract(obj):
+        return {name: fn(obj) for name, fn in fields}
+    return extract
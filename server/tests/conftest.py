@@ -0,0 +1,101 @@
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+# The app reads its settings at import time, and the tests drop every table,
+# so point it at a scratch database first (TEST_DATABASE_URI to override).
+os.environ["DATABASE_URI"] = os.environ.get(
+    "TEST_DATABASE_URI",
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="hotel-tests-"), "test.db"))
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app, create_bookings, trigram_search_available  # noqa: E402
+from config import db, sql_metrics  # noqa: E402
+from models import (  # noqa: E402
+    Admins, Amenities, Guests, HotelAmenities, Hotels, Rooms, RoomTypes,
+    catalog_cache, hotel_search, identity_cache, room_nights_index)
+
+PASSWORD = "password123"
+
+
+@pytest.fixture
+def app():
+    flask_app.config["TESTING"] = True
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+    catalog_cache.backend.clear()
+    identity_cache.clear()
+    hotel_search.invalidate()
+    room_nights_index.invalidate()
+    trigram_search_available.cache_clear()
+    sql_metrics.reset()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def catalog(app):
+    """Two hotels with rooms and amenities, an admin for the first and a guest.
+
+    Room 1 is booked by the guest for tonight, room 2 in a month.
+    """
+    admin = Admins(name="owner")
+    admin.password_hash = PASSWORD
+    other_admin = Admins(name="other-owner")
+    other_admin.password_hash = PASSWORD
+    guest = Guests(name="Guest", email="guest@example.com")
+    guest.password_hash = PASSWORD
+    standard = RoomTypes(type_name="Standard", description="One bed")
+    suite = RoomTypes(type_name="Suite", description="Two rooms")
+    hotels = [
+        Hotels(name="Savannah Lodge", address="1 Ngong Road", city="Nairobi",
+               country="Kenya", email="lodge@example.com", phone="+254100", admin=admin),
+        Hotels(name="Coral Beach Resort", address="9 Beach Road", city="Mombasa",
+               country="Kenya", email="coral@example.com", phone="+254200",
+               admin=other_admin),
+    ]
+    wifi = Amenities(name="Free Wi-Fi", description="Everywhere")
+    db.session.add_all([guest, wifi, *hotels])
+    db.session.add_all([
+        Rooms(hotel=hotel, room_type=room_type, room_name=f"{hotel.name[:5]} {n}",
+              price_per_night=100 + 10 * n)
+        for hotel in hotels
+        for n, room_type in enumerate((standard, standard, suite))
+    ])
+    db.session.add_all([HotelAmenities(hotel=hotel, amenity=wifi) for hotel in hotels])
+    db.session.commit()
+
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    create_bookings(guest.id, [
+        ([1], today - timedelta(hours=10), today + timedelta(days=1, hours=10)),
+        ([2], today + timedelta(days=30, hours=14), today + timedelta(days=33, hours=10)),
+    ])
+    return {"admin": admin.id, "guest": guest.id, "hotel": hotels[0].id,
+            "other_hotel": hotels[1].id, "today": today}
+
+
+@pytest.fixture
+def guest_client(app, catalog):
+    client = app.test_client()
+    response = client.post("/api/guests/login",
+                           json={"email": "guest@example.com", "password": PASSWORD})
+    assert response.status_code == 200
+    return client
+
+
+@pytest.fixture
+def admin_client(app, catalog):
+    client = app.test_client()
+    response = client.post("/api/admin/login", json={"name": "owner", "password": PASSWORD})
+    assert response.status_code == 200
+    return client
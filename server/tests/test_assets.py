@@ -0,0 +1,27 @@
+import brotli
+
+from assets import StaticAssets, compress
+
+
+def test_brotli_variant_is_preferred(app, tmp_path):
+    bundle = tmp_path / "static" / "js" / "main.1234.js"
+    bundle.parent.mkdir(parents=True)
+    source = b"console.log('hello');\n" * 200
+    bundle.write_bytes(source)
+    (tmp_path / "asset-manifest.json").write_text('{"files": {"main.js": "static/js/main.1234.js"}}')
+
+    compress(str(tmp_path))
+    assert (tmp_path / "static/js/main.1234.js.br").exists()
+    assets = StaticAssets(str(tmp_path))
+
+    with app.test_request_context(headers={"Accept-Encoding": "gzip, br"}):
+        response = assets.serve("static/js/main.1234.js")
+        response.direct_passthrough = False
+        assert response.headers["Content-Encoding"] == "br"
+        assert brotli.decompress(response.get_data()) == source
+        response.close()
+
+    with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+        response = assets.serve("static/js/main.1234.js")
+        assert response.headers["Content-Encoding"] == "gzip"
+        response.close()
@@ -0,0 +1,45 @@
+import pytest
+from starlette.testclient import TestClient
+
+from conftest import PASSWORD
+
+# Every route async_api answers itself; the rest are mounted Flask
+ASYNC_READS = [
+    "/api/hotels",
+    "/api/hotels?limit=1",
+    "/api/hotels/1/rooms",
+    "/api/rooms/1/available",
+    "/api/my_bookings",
+    "/api/hotels/1/bookings",
+    "/api/hotels/1/bookings?limit=1",
+]
+
+
+@pytest.fixture
+def async_client(catalog):
+    from async_api import asgi_app
+
+    with TestClient(asgi_app) as client:
+        response = client.post("/api/guests/login",
+                               json={"email": "guest@example.com", "password": PASSWORD})
+        assert response.status_code == 200
+        yield client
+
+
+@pytest.mark.parametrize("path", ASYNC_READS)
+def test_async_reads_match_flask(async_client, guest_client, path):
+    expected = guest_client.get(path)
+    response = async_client.get(path)
+    assert response.status_code == expected.status_code == 200
+    assert response.json() == expected.get_json()
+    assert response.headers.get("ETag") == expected.headers.get("ETag")
+
+
+def test_async_routes_are_the_flask_ones():
+    from async_api import routes
+    from app import app
+
+    flask_rules = {rule.rule.replace("<int:", "{").replace(">", "}")
+                   for rule in app.url_map.iter_rules()}
+    for route in routes[:-1]:
+        assert route.path.replace(":int}", "}") in flask_rules
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import create_bookings
+from config import db
+from models import Bookings, Rooms, room_nights_index
+
+
+@pytest.fixture
+def statements(app):
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        seen.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+def test_rooms_answer_without_a_query_each(catalog, statements):
+    rooms = db.session.scalars(db.select(Rooms).order_by(Rooms.id)).all()
+    del statements[:]
+    assert [room.currently_available for room in rooms] == [False] + [True] * 5
+    # One load of the index, whatever the number of rooms
+    assert len(statements) == 1
+
+
+def test_instance_and_expression_agree(catalog):
+    free = set(db.session.scalars(
+        db.select(Rooms.id).where(Rooms.currently_available == True)))
+    rooms = db.session.scalars(db.select(Rooms)).all()
+    assert free == {room.id for room in rooms if room.currently_available}
+
+
+def test_commits_update_the_index(catalog, statements):
+    room = db.session.get(Rooms, 3)
+    assert room.currently_available
+    today = catalog["today"]
+    create_bookings(catalog["guest"], [([3], today, today + timedelta(days=1))])
+    del statements[:]
+    assert room_nights_index.is_booked(3, today.date())
+    assert statements == []
+    assert not room.currently_available
+
+    db.session.delete(db.session.get(Bookings, 1))
+    db.session.commit()
+    assert db.session.get(Rooms, 1).currently_available
+
+
+def test_rollback_leaves_the_index(catalog):
+    room = db.session.get(Rooms, 1)
+    assert not room.currently_available
+    booking = db.session.get(Bookings, 1)
+    booking.check_in_date += timedelta(days=5)
+    booking.check_out_date += timedelta(days=5)
+    db.session.flush()
+    db.session.rollback()
+    assert not room.currently_available
+
+
+def test_nights_before_the_window_are_refused(catalog):
+    with pytest.raises(ValueError):
+        room_nights_index.is_booked(1, catalog["today"].date() - timedelta(days=2))
@@ -0,0 +1,12 @@
+from app import api, app
+from benchmark import PLACEHOLDER_CTX, build_cases, uncovered_routes
+
+
+def test_every_route_has_a_benchmark_case():
+    assert uncovered_routes(app, api, build_cases(PLACEHOLDER_CTX)) == []
+
+
+def test_missing_case_is_reported():
+    cases = [case for case in build_cases(PLACEHOLDER_CTX)
+             if (case.method, case.rule) != ("GET", "/api/hotels")]
+    assert uncovered_routes(app, api, cases) == ["GET /api/hotels"]
@@ -0,0 +1,29 @@
+from booking_rush import audit
+
+
+class Pages:
+    """Serves the given bookings as one /api/hotels/<id>/bookings page."""
+
+    def __init__(self, bookings):
+        self.bookings = bookings
+
+    def json(self, path):
+        return {"results": self.bookings, "next_cursor": None}
+
+
+def booking(id, room_id, check_in, check_out):
+    return {"id": id, "rooms": [{"id": room_id}],
+            "check_in_date": check_in, "check_out_date": check_out}
+
+
+def test_audit_flags_overlapping_stays_only():
+    conn = Pages([
+        booking(1, 7, "2027-05-01T14:00:00", "2027-05-03T10:00:00"),
+        # arrives the morning the first checks out: not a double booking
+        booking(2, 7, "2027-05-03T14:00:00", "2027-05-04T10:00:00"),
+        booking(3, 7, "2027-05-02T14:00:00", "2027-05-03T10:00:00"),
+        booking(4, 8, "2027-05-02T14:00:00", "2027-05-03T10:00:00"),
+    ])
+    double_bookings, lost = audit(conn, 1, [7, 8], [1, 2, 3, 4, 5])
+    assert [d["booking_id"] for d in double_bookings] == [3]
+    assert lost == [5]
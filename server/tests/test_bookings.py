@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from app import guest_foreign_key_failed, is_room_night_clash
+from config import db
+from models import RoomNights
+
+
+def stay(catalog, room_id, days):
+    check_in = catalog["today"] + timedelta(days=days, hours=14)
+    return {"room_id": room_id, "check_in": check_in.isoformat(),
+            "check_out": (check_in + timedelta(days=2, hours=-4)).isoformat()}
+
+
+def test_unknown_guest_is_not_a_conflict(client, catalog):
+    response = client.post("/api/bookings", json={"guest_id": 999, **stay(catalog, 3, 5)})
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Guest not found"}
+
+
+def test_missing_guest_id_is_rejected(client, catalog):
+    response = client.post("/api/bookings", json=stay(catalog, 3, 5))
+    assert response.status_code == 400
+
+
+def test_taken_night_is_a_conflict(client, catalog):
+    response = client.post("/api/bookings",
+                           json={"guest_id": catalog["guest"], **stay(catalog, 2, 31)})
+    assert response.status_code == 409
+
+
+def test_room_night_clash_is_told_apart(app, catalog):
+    db.session.add(RoomNights(room_id=1, night=catalog["today"].date(), booking_id=1))
+    with pytest.raises(IntegrityError) as clash:
+        db.session.flush()
+    db.session.rollback()
+    assert is_room_night_clash(clash.value)
+    assert not guest_foreign_key_failed(clash.value)
+
+
+def test_batch_reads_the_new_bookings_once(guest_client, catalog):
+    reads = []
+
+    def count_reads(conn, cursor, statement, *args):
+        if statement.startswith("SELECT bookings."):
+            reads.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count_reads)
+    try:
+        response = guest_client.post("/api/my_bookings/batch", json={
+            "bookings": [stay(catalog, room_id, 10) for room_id in (3, 4, 5, 6)]})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count_reads)
+    assert response.status_code == 201, response.get_json()
+    assert all(b["rooms"][0]["room_type"]["type_name"] for b in response.get_json())
+    assert len(response.get_json()) == 4
+    assert len(reads) == 1
+
+
+@pytest.mark.parametrize("days, hours, bookable", [
+    # Room 2 is held from day 30 14:00 to day 33 10:00, i.e. nights 30 to 32
+    (33, 9, True),
+    (32, 15, False),
+    (29, 12, True),
+])
+def test_search_and_booking_agree(guest_client, catalog, days, hours, bookable):
+    check_in = catalog["today"] + timedelta(days=days, hours=hours)
+    check_out = check_in + timedelta(days=1)
+    dates = {"check_in": check_in.isoformat(), "check_out": check_out.isoformat()}
+    found = guest_client.get("/api/search", query_string={**dates, "limit": 50})
+    assert (2 in {room["id"] for room in found.get_json()["results"]}) == bookable
+    response = guest_client.post("/api/my_bookings", json={"room_id": 2, **dates})
+    assert response.status_code == (201 if bookable else 409), response.get_json()
@@ -0,0 +1,66 @@
+import re
+import warnings
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import SAWarning
+
+from app import SingleHotel
+from cache import ReadThroughCache, make_backend
+from config import db
+from models import Hotels, Rooms
+
+SQL_COUNT = re.compile(r'desc="(\d+) queries"')
+
+
+def other_worker_update(table, row_id, **values):
+    """Write like another gunicorn worker would: no listeners, no local invalidation."""
+    db.session.execute(table.__table__.update().where(table.id == row_id).values(
+        updated_at=datetime.utcnow() + timedelta(seconds=1), **values))
+    db.session.commit()
+
+
+def test_single_hotel_sees_edits_from_other_workers(client, catalog):
+    assert client.get("/api/hotels/1").get_json()["city"] == "Nairobi"
+    other_worker_update(Hotels, 1, city="Naivasha")
+    assert client.get("/api/hotels/1").get_json()["city"] == "Naivasha"
+
+    other_worker_update(Rooms, 1, room_name="Renamed")
+    rooms = client.get("/api/hotels/1").get_json()["rooms"]
+    assert "Renamed" in [room["room_name"] for room in rooms]
+
+
+def test_single_hotel_etag(client, catalog):
+    response = client.get("/api/hotels/1")
+    etag = response.headers["ETag"]
+    cached = client.get("/api/hotels/1", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert SQL_COUNT.search(cached.headers["Server-Timing"]).group(1) == "1"
+    assert client.get("/api/hotels/99").status_code == 404
+
+
+def test_redis_backend_invalidates_by_tag():
+    pytest.importorskip("fakeredis")
+    cache = ReadThroughCache(make_backend("fakeredis://", ttl=60))
+    loads = []
+    load = lambda: loads.append(1) or {"name": f"v{len(loads)}"}
+    assert cache.get_or_load("hotel", ("hotel:1",), load) == {"name": "v1"}
+    assert cache.get_or_load("hotel", ("hotel:1",), load) == {"name": "v1"}
+    cache.invalidate("hotel:1")
+    assert cache.get_or_load("hotel", ("hotel:1",), load) == {"name": "v2"}
+
+
+@pytest.mark.parametrize("query", ["limit=x", "limit=1.5", "after=bogus"])
+def test_rejected_hotel_list_has_no_etag(client, catalog, query):
+    response = client.get(f"/api/hotels?{query}")
+    assert response.status_code == 400
+    assert "ETag" not in response.headers
+
+
+def test_single_hotel_state_is_not_a_cartesian_product(catalog):
+    # Compiled afresh: the FROM linter only warns when the statement compiles
+    db.session.close()
+    db.session.connection(execution_options={"compiled_cache": None})
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", SAWarning)
+        assert SingleHotel.state(catalog["hotel"]).updated_at is not None
@@ -0,0 +1,91 @@
+import os
+from datetime import timedelta
+
+from flask_migrate import stamp, upgrade
+from sqlalchemy import text
+
+from config import db
+from models import BookedRoom, Bookings, DailyRoomTypeStats, rebuild_daily_stats
+
+
+def rollup():
+    table = DailyRoomTypeStats.__table__
+    return db.session.execute(
+        db.select(table).order_by(table.c.hotel_id, table.c.night, table.c.room_type_id)
+    ).all()
+
+
+def assert_matches_rebuild():
+    kept = rollup()
+    rebuild_daily_stats(db.session.connection())
+    assert rollup() == kept
+    db.session.rollback()
+
+
+def test_only_confirmed_bookings_are_sold(admin_client, catalog):
+    # The catalog's bookings are pending
+    assert rollup() == []
+
+    response = admin_client.patch("/api/bookings/2", json={"status": "Confirmed"})
+    assert response.status_code == 200
+    assert [row.room_nights for row in rollup()] == [1, 1, 1]
+    assert_matches_rebuild()
+
+    response = admin_client.patch("/api/bookings/2", json={"status": "Denied"})
+    assert response.status_code == 200
+    assert rollup() == []
+
+
+def test_redated_confirmed_booking_moves_its_nights(admin_client, catalog):
+    admin_client.patch("/api/bookings/2", json={"status": "Confirmed"})
+    check_in = catalog["today"] + timedelta(days=40, hours=14)
+    response = admin_client.patch("/api/bookings/2", json={
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=1, hours=-4)).isoformat()})
+    assert response.status_code == 200
+    assert [row.night for row in rollup()] == [check_in.date()]
+    assert_matches_rebuild()
+
+
+def test_room_added_with_the_confirmation_is_counted_once(app, catalog):
+    booking = db.session.get(Bookings, 2)
+    booking.status = "Confirmed"
+    booking.booked_rooms.append(BookedRoom(room_id=3, rate=50))
+    db.session.commit()
+    # rooms 2 and 3 are of different types: one row per type and night
+    assert [row.room_nights for row in rollup()] == [1] * 6
+    assert_matches_rebuild()
+
+
+def test_deleted_booking_leaves_no_empty_rows(admin_client, catalog):
+    admin_client.patch("/api/bookings/1", json={"status": "Confirmed"})
+    admin_client.patch("/api/bookings/2", json={"status": "Confirmed"})
+    booking = db.session.get(Bookings, 1)
+    db.session.delete(booking)
+    db.session.commit()
+    assert all(row.room_nights > 0 for row in rollup())
+    assert len(rollup()) == 3
+    assert_matches_rebuild()
+
+
+def test_migration_backfill_matches_rebuild(admin_client, catalog):
+    # Booking 1 stays pending, so its nights must not be backfilled
+    admin_client.patch("/api/bookings/2", json={"status": "Confirmed"})
+    expected = rollup()
+    assert expected
+
+    # Back to the schema before b3c8d1f60a24, keeping the bookings
+    DailyRoomTypeStats.__table__.drop(db.engine)
+    with db.engine.begin() as connection:
+        connection.execute(text("ALTER TABLE booked_rooms DROP COLUMN rate"))
+    migrations = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations")
+    db.session.remove()
+    try:
+        stamp(migrations, "e61f4d8a3b57")
+        upgrade(migrations, "b3c8d1f60a24")
+        assert rollup() == expected
+        assert_matches_rebuild()
+    finally:
+        db.session.remove()
+        with db.engine.begin() as connection:
+            connection.execute(text("DROP TABLE alembic_version"))
@@ -0,0 +1,56 @@
+import base64
+import json
+
+import pytest
+
+from config import db
+from models import Hotels, hotel_search
+
+
+def cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+@pytest.mark.parametrize("after", [
+    "not base64!",
+    cursor({"score": 1}),
+    cursor(["0.5"]),
+    cursor(["0.5", "2", "3"]),
+    cursor(["high", "2"]),
+    cursor(["0.5", "two"]),
+    cursor([["0.5"], "2"]),
+    cursor(["nan", "2"]),
+])
+def test_bad_cursor_is_rejected(client, catalog, after):
+    response = client.get(f"/api/hotels/search?q=lodge&after={after}")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid cursor"}
+
+
+def test_next_cursor_round_trips(client, catalog):
+    first = client.get("/api/hotels/search?q=kenya&limit=1").get_json()
+    second = client.get(f"/api/hotels/search?q=kenya&limit=1&after={first['next_cursor']}")
+    assert second.status_code == 200
+    assert [h["id"] for h in first["results"] + second.get_json()["results"]] == [1, 2]
+
+
+def names(client, q):
+    return [hit["name"] for hit in client.get(f"/api/hotels/search?q={q}").get_json()["results"]]
+
+
+def test_delete_by_another_worker_is_picked_up(client, catalog, monkeypatch):
+    assert names(client, "coral") == ["Coral Beach Resort"]
+
+    # Another worker deletes a hotel and adds one, keeping the count; only
+    # the database tells this worker about either change
+    db.session.delete(db.session.get(Hotels, catalog["other_hotel"]))
+    db.session.add(Hotels(name="Acacia Camp", address="2 Mara Road", city="Narok",
+                          country="Kenya", email="acacia@example.com", phone="+254300"))
+    db.session.flush()
+    db.session.info.pop("hotel_search_ops")
+    db.session.commit()
+    assert names(client, "coral") == ["Coral Beach Resort"]
+
+    monkeypatch.setattr(hotel_search, "ttl", 0)
+    assert names(client, "coral") == []
+    assert names(client, "acacia") == ["Acacia Camp"]
@@ -0,0 +1,51 @@
+import pytest
+
+from cache import LRUCache, RedisBackend
+from config import app as flask_app, db
+from models import Guests, identity_cache, identity_key, make_identity_cache
+
+
+def test_session_check_is_served_from_cache(guest_client, catalog):
+    assert guest_client.get("/api/guest").get_json()["name"] == "Guest"
+    assert identity_cache.get(identity_key("guest", catalog["guest"]))["name"] == "Guest"
+
+
+def test_rename_is_seen_after_commit(guest_client, catalog):
+    guest_client.get("/api/guest")
+    response = guest_client.patch(f"/api/guests/{catalog['guest']}", json={"name": "Renamed"})
+    assert response.status_code == 200
+    assert guest_client.get("/api/guest").get_json()["name"] == "Renamed"
+
+
+def test_rolled_back_change_keeps_the_entry(guest_client, catalog):
+    guest_client.get("/api/guest")
+    guest = db.session.get(Guests, catalog["guest"])
+    guest.name = "Never committed"
+    db.session.flush()
+    db.session.rollback()
+    assert identity_cache.get(identity_key("guest", catalog["guest"]))["name"] == "Guest"
+
+
+def test_deleted_guest_loses_the_session(guest_client, catalog):
+    guest_client.get("/api/guest")
+    assert guest_client.delete(f"/api/guests/{catalog['guest']}").status_code == 200
+    assert guest_client.get("/api/guest").status_code == 401
+
+
+@pytest.mark.parametrize("url, workers, expected", [
+    (None, "1", LRUCache),
+    ("redis://localhost:6379/0", "4", RedisBackend),
+])
+def test_identity_backend(monkeypatch, url, workers, expected):
+    monkeypatch.setitem(flask_app.config, "IDENTITY_CACHE_URL", url)
+    monkeypatch.setenv("WEB_CONCURRENCY", workers)
+    assert isinstance(make_identity_cache(), expected)
+
+
+def test_no_per_process_identity_cache_with_several_workers(monkeypatch, caplog):
+    monkeypatch.setitem(flask_app.config, "IDENTITY_CACHE_URL", None)
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    cache = make_identity_cache()
+    assert "IDENTITY_CACHE_URL" in caplog.text
+    cache.set(identity_key("guest", 1), {"id": 1})
+    assert cache.get(identity_key("guest", 1)) is None
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+import threading
+import textwrap
+
+import pytest
+
+from passwords import HashingPool, PasswordHashingBusy, hash_password, verify_password
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_hash_and_verify():
+    hashed = hash_password("secret")
+    assert verify_password(hashed, "secret")
+    assert not verify_password(hashed, "wrong")
+    assert not verify_password("plain-text", "plain-text")
+
+
+def test_pool_sheds_load_once_full():
+    pool = HashingPool(workers=1, queue_size=0, timeout=5)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait()
+
+    busy = threading.Thread(target=pool.run, args=(slow_hash,))
+    busy.start()
+    try:
+        started.wait()
+        with pytest.raises(PasswordHashingBusy):
+            pool.run(lambda: None)
+    finally:
+        release.set()
+        busy.join()
+
+
+def test_gevent_worker_keeps_serving_while_hashing():
+    script = textwrap.dedent("""
+        from gevent import monkey; monkey.patch_all()
+        import time, gevent
+        import passwords
+
+        ticks = []
+        def tick():
+            while True:
+                ticks.append(time.perf_counter())
+                gevent.sleep(0.01)
+
+        ticker = gevent.spawn(tick)
+        gevent.sleep(0.05)
+        gevent.joinall([gevent.spawn(passwords.hash_password, "secret") for _ in range(2)])
+        ticker.kill()
+        print(type(passwords.pool._executor).__module__,
+              max(b - a for a, b in zip(ticks, ticks[1:])))
+    """)
+    env = dict(os.environ, BCRYPT_LOG_ROUNDS="12")
+    result = subprocess.run([sys.executable, "-c", script], cwd=SERVER_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    module, longest_pause = result.stdout.split()
+    assert module == "gevent.threadpool"
+    # each hash takes ~0.2 s at cost 12; the other greenlet never waits that long
+    assert float(longest_pause) < 0.1
@@ -0,0 +1,97 @@
+import re
+from datetime import timedelta
+
+import pytest
+from flask_restful import Resource
+
+from instrumentation import QueryBudgetExceeded, query_budget
+from models import Hotels
+
+SQL_COUNT = re.compile(r'desc="(\d+) queries"')
+
+# Every budgeted read, cold (empty caches) and paged where it pages. The
+# query_budget decorator raises QueryBudgetExceeded in testing mode, so a
+# regression fails the request rather than the assertion.
+HOT_READS = [
+    (None, "/api/hotels"),
+    (None, "/api/hotels?limit=1"),
+    (None, "/api/hotels/1"),
+    (None, "/api/hotels/search?q=savana"),
+    (None, "/api/hotels/search?q=kenya%20mom"),
+    (None, "/api/hotels/1/rooms"),
+    (None, "/api/rooms"),
+    (None, "/api/rooms?limit=2"),
+    (None, "/api/rooms/1/available"),
+    (None, "/api/rooms/1/rates?days=60"),
+    (None, "/api/room_types"),
+    (None, "/api/hotel/1/amenities"),
+    (None, "/api/guests?limit=1"),
+    (None, "/api/bookings?limit=1"),
+    (None, "/api/hotels/1/bookings?limit=1"),
+    ("guest", "/api/guest"),
+    ("guest", "/api/my_bookings"),
+    ("admin", "/api/admin"),
+    ("admin", "/api/admin/hotel"),
+    ("admin", "/api/admin/hotel/analytics?period=week"),
+]
+
+
+@pytest.fixture
+def clients(client, guest_client, admin_client):
+    return {None: client, "guest": guest_client, "admin": admin_client}
+
+
+@pytest.mark.parametrize("role, path", HOT_READS)
+def test_hot_reads_stay_within_budget(clients, role, path):
+    response = clients[role].get(path)
+    assert response.status_code == 200, response.get_json()
+    assert SQL_COUNT.search(response.headers["Server-Timing"])
+
+
+def test_search_rooms_within_budget(client, catalog):
+    check_in = catalog["today"] + timedelta(days=29)
+    response = client.get(f"/api/search?check_in={check_in.isoformat()}"
+                          f"&check_out={(check_in + timedelta(days=3)).isoformat()}&limit=2")
+    assert response.status_code == 200
+    # room 2 is booked over these nights
+    assert 2 not in [room["id"] for room in response.get_json()["results"]]
+    after = response.get_json()["next_cursor"]
+    response = client.get(f"/api/search?check_in={check_in.isoformat()}"
+                          f"&check_out={(check_in + timedelta(days=3)).isoformat()}"
+                          f"&limit=2&after={after}")
+    assert response.status_code == 200
+
+
+def test_quotes_within_budget(client, catalog):
+    first = catalog["today"].date()
+    response = client.post("/api/quotes", json={"stays": [
+        {"room_id": room_id, "check_in": str(first + timedelta(days=n)),
+         "check_out": str(first + timedelta(days=n + 3))}
+        for n, room_id in enumerate([1, 2, 3, 4, 99])
+    ]})
+    assert response.status_code == 200
+    quotes = response.get_json()["quotes"]
+    assert quotes[0]["total"] == 300.0
+    assert quotes[-1]["error"] == "Room not found"
+
+
+def test_cached_reads_use_fewer_queries(client, catalog):
+    counts = []
+    for _ in range(2):
+        response = client.get("/api/hotels/1")
+        counts.append(int(SQL_COUNT.search(response.headers["Server-Timing"]).group(1)))
+    assert counts[1] < counts[0]
+
+
+def test_budget_overrun_raises(app, catalog):
+    @query_budget(get=1)
+    class TwoQueries(Resource):
+        def get(self):
+            Hotels.query.all()
+            Hotels.query.all()
+            return {}
+
+    with app.test_request_context("/api/hotels"):
+        app.preprocess_request()
+        with pytest.raises(QueryBudgetExceeded, match="ran 2 queries, budget is 1"):
+            TwoQueries().get()
@@ -0,0 +1,19 @@
+import pytest
+
+from config import db
+from explain_hot_queries import BIG_TABLES, explain, hot_queries, seed
+
+
+@pytest.fixture
+def seeded(app):
+    seed(20)
+    return db.session.connection()
+
+
+def test_hot_queries_use_indexes(seeded):
+    scans = {}
+    for name, stmt in hot_queries().items():
+        _, scanned = explain(seeded, stmt)
+        if scanned & BIG_TABLES:
+            scans[name] = sorted(scanned & BIG_TABLES)
+    assert scans == {}
@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+
+from rates import Quoter, compile_calendar, parse_rules
+
+
+def test_totals_match_the_nightly_rates():
+    start = date(2026, 12, 1)
+    rules = parse_rules({
+        "weekdays": {"sat": 150},
+        "seasons": [{"name": "Festive", "from": "2026-12-20", "to": "2027-01-05",
+                     "rate": 200, "weekdays": {"sat": 240}}],
+    })
+    quoter = Quoter()
+    quoter.add_room(1, "100.00", start, compile_calendar(rules, start, days=60))
+    quoter.add_room(2, "80.50")
+
+    stays = [(room_id, (start + timedelta(days=offset)).toordinal(), nights)
+             for room_id in (1, 2)
+             for offset, nights in ((-5, 3), (-2, 10), (15, 10), (55, 20), (90, 1))]
+    stays.append((3, start.toordinal(), 2))
+
+    totals = quoter.totals(stays)
+    assert totals[-1] is None
+    for (room_id, first, nights), total in zip(stays[:-1], totals):
+        assert total == sum(quoter.nightly(room_id, first, nights))
+    # 2026-12-26 is a Saturday inside the season
+    assert quoter.nightly(1, date(2026, 12, 26).toordinal(), 1) == [24000]
+
+
+def test_no_stays():
+    assert Quoter().totals([]) == []
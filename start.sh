@@ -20,6 +20,9 @@ echo "⚙️ Applying database migrations..."
 export FLASK_APP=app.py
 flask db upgrade || echo "No migrations found or database not configured yet."
 
+echo "🗜️ Precompressing frontend assets..."
+flask compress-assets
+
 echo "🚀 Starting Gunicorn server..."
-# Bind to Render's assigned port
-exec gunicorn app:app --bind 0.0.0.0:${PORT:-5000}
+# Workers, threads and the bind port (Render's $PORT) come from gunicorn.conf.py
+exec gunicorn app:app